@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: apps
+"""
+
+from django.apps import AppConfig
+
+
+class VolontuloConfig(AppConfig):
+    u"""Volontulo application configuration."""
+    name = 'apps.volontulo'
+    verbose_name = u'Volontulo'
+
+    def ready(self):
+        u"""Connect signal receivers."""
+        # pylint: disable=unused-variable
+        from apps.volontulo import signals  # NOQA
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: backends
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+
+
+class UserProfileBackend(ModelBackend):
+    u"""Authentication backend loading user together with its profile.
+
+    Logged user is fetched once per request, so request.user.userprofile
+    used by views and templates doesn't run additional queries.
+    """
+
+    def get_user(self, user_id):
+        u"""Return user with profile joined or None if user doesn't exist.
+
+        :param user_id: int User database unique identifier (primary key)
+        """
+        try:
+            return User.objects.select_related('userprofile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
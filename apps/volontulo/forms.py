@@ -211,8 +211,15 @@ class AdministratorContactForm(ContactForm):
         ('VOLUNTEER', u'wolontariusz'),
         ('ORGANIZATION', u'organizacja'),
     )
-    ADMINISTRATORS = [
-        (key, value) for key, value in get_administrators_emails().items()
-    ]
     applicant = forms.Select(choices=APPLICANTS)
-    administrator = forms.Select(choices=ADMINISTRATORS)
+
+    def __init__(self, *args, **kwargs):
+        u"""Initialize AdministratorContactForm object.
+
+        Administrators are looked up for every form instance, so importing
+        this module doesn't touch database.
+        """
+        super(AdministratorContactForm, self).__init__(*args, **kwargs)
+        self.administrator = forms.Select(
+            choices=sorted(get_administrators_emails().items())
+        )
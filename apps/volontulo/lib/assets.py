@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: assets
+"""
+import gzip
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.assets')
+
+# bundle name: files concatenated into it, in order
+BUNDLES = {
+    'volontulo/javascripts/bundle.js': (
+        'volontulo/javascripts/cookielaw/js/cookielaw.js',
+        'volontulo/javascripts/bootstrap.js',
+    ),
+}
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# encoding: suffix of precompressed sibling file, best first
+PRECOMPRESSED_SUFFIXES = (
+    ('br', '.br'),
+    ('gzip', '.gz'),
+)
+
+
+def gzip_compress(content):
+    u"""Return content compressed with gzip, same for the same content.
+
+    :param content: bytes Content to compress
+    """
+    output = BytesIO()
+    with gzip.GzipFile(
+            fileobj=output, mode='wb', compresslevel=9, mtime=0) as archive:
+        archive.write(content)
+    return output.getvalue()
+
+
+def compress(content):
+    u"""Return dict of content compressed with all available encodings.
+
+    Encodings not making content smaller are skipped.
+
+    :param content: bytes Content to compress
+    """
+    compressed = {'gzip': gzip_compress(content)}
+    if brotli is not None:
+        compressed['br'] = brotli.compress(content)
+    return {
+        encoding: data for encoding, data in compressed.items()
+        if len(data) < len(content)
+    }
+
+
+def build_bundle(storage, sources):
+    u"""Return content of bundle made from static files.
+
+    :param storage: Storage instance keeping collected static files
+    :param sources: list Names of bundled files
+    """
+    parts = []
+    for source in sources:
+        with storage.open(source) as source_file:
+            parts.append(source_file.read().decode(settings.FILE_CHARSET))
+    # semicolon protects against files not ending with one:
+    content = u'\n;\n'.join(parts)
+    if rjsmin is not None:
+        content = rjsmin.jsmin(content, keep_bang_comments=True)
+    return content.encode('utf-8')
+
+
+class AssetsStorage(ManifestStaticFilesStorage):
+    u"""Static files storage bundling, fingerprinting and compressing assets.
+
+    On collectstatic JavaScript bundles are built, all files get copies
+    with content hash in name and compressible ones get precompressed
+    .gz (and .br, if brotli is installed) siblings.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        u"""Build bundles, hash file names and compress hashed files."""
+        if dry_run:
+            return
+        if rjsmin is None:
+            logger.warning(
+                u"rjsmin is not installed, JavaScript bundles won't be "
+                u"minified."
+            )
+        if brotli is None:
+            logger.warning(
+                u"brotli is not installed, static files won't be "
+                u"precompressed with it."
+            )
+        for bundle, sources in BUNDLES.items():
+            if all(source in paths for source in sources):
+                if self.exists(bundle):
+                    self.delete(bundle)
+                self._save(bundle, ContentFile(build_bundle(self, sources)))
+                paths[bundle] = (self, bundle)
+
+        for processed in super(AssetsStorage, self).post_process(
+                paths, dry_run, **options):
+            yield processed
+
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress_file(hashed_name)
+
+    def compress_file(self, name):
+        u"""Save precompressed siblings of static file.
+
+        :param name: string Name of static file
+        """
+        with self.open(name) as original:
+            content = original.read()
+        suffixes = dict(PRECOMPRESSED_SUFFIXES)
+        for encoding, data in compress(content).items():
+            compressed_name = name + suffixes[encoding]
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(data))
+
+
+def find_precompressed(request, fullpath, encoding=None):
+    u"""Return path and encoding of precompressed file accepted by client.
+
+    :param request: WSGIRequest instance
+    :param fullpath: string Absolute path of original file
+    :param encoding: string Encoding of original file or None
+    :return: tuple Path and encoding, original ones if there's no better file
+    """
+    accepted = set()
+    for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        parts = value.replace(' ', '').split(';')
+        if 'q=0' not in parts[1:]:
+            accepted.add(parts[0])
+    for compressed_encoding, suffix in PRECOMPRESSED_SUFFIXES:
+        if compressed_encoding in accepted and \
+                os.path.isfile(fullpath + suffix):
+            return fullpath + suffix, compressed_encoding
+    return fullpath, encoding
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: benchmarks
+
+Benchmarks of main views and OffersManager methods on synthetic data.
+"""
+import subprocess
+import time
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.volontulo.lib.pagination import PER_PAGE
+from apps.volontulo.lib.search import search_offers
+from apps.volontulo.lib.synthetic import DataGenerator
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+RESULTS_VERSION = 1
+# generated organizations and volunteers per generated offer:
+ORGANIZATIONS_RATIO = 0.02
+VOLUNTEERS_RATIO = 1
+
+
+def _percentile(values, percent):
+    u"""Return percentile of sorted values.
+
+    :param values: list Sorted values
+    :param percent: Integer percentile
+    """
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def measure(func, repeat):
+    u"""Return time and queries stats of calling function.
+
+    Function is called once before measuring, to warm up process caches.
+    Shared cache is cleared before each call, so pages are rendered.
+
+    :param func: callable Measured function
+    :param repeat: Integer number of measured calls
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.time()
+            func()
+            times.append((time.time() - started) * 1000)
+    times.sort()
+    return {
+        'min': times[0],
+        'median': _percentile(times, 50),
+        'p95': _percentile(times, 95),
+        'mean': sum(times) / len(times),
+        'queries': len(queries),
+    }
+
+
+def _get(client, url):
+    u"""Return function requesting URL and checking response.
+
+    :param client: django.test.Client instance
+    :param url: string Requested URL
+    """
+    def get():
+        u"""Request URL."""
+        response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(u"{} returned {}".format(
+                url, response.status_code,
+            ))
+        return response
+    return get
+
+
+def targets():
+    u"""Return list of measured (name, function) pairs.
+
+    Views are requested by anonymous user, like most of the traffic.
+    """
+    client = Client()
+    offer = Offer.objects.get_active().order_by('weight', 'id').first()
+    organization = Organization.objects.order_by('id').first()
+    query = offer.title.split()[0] if offer else u'pomoc'
+    measured = [
+        ('view:homepage', _get(client, reverse('homepage'))),
+        ('view:offers_list', _get(client, reverse('offers_list'))),
+        ('view:offers_archived', _get(client, reverse('offers_archived'))),
+        ('view:organizations_list', _get(
+            client, reverse('organizations_list'),
+        )),
+        ('view:offers_search', _get(
+            client, u'{}?q={}'.format(reverse('offers_search'), query),
+        )),
+    ]
+    if offer:
+        measured.append(('view:offers_view', _get(client, reverse(
+            'offers_view', args=(slugify(offer.title), offer.id),
+        ))))
+    if organization:
+        measured.append(('view:organization_view', _get(client, reverse(
+            'organization_view',
+            args=(slugify(organization.name), organization.id),
+        ))))
+    measured += [
+        ('OffersManager.get_active', lambda: list(
+            Offer.objects.get_active().as_cards().order_by(
+                'weight', 'id',
+            )[:PER_PAGE]
+        )),
+        ('OffersManager.get_archived', lambda: list(
+            Offer.objects.get_archived().as_cards().order_by(
+                'weight', 'id',
+            )[:PER_PAGE]
+        )),
+        ('OffersManager.get_for_administrator', lambda: list(
+            Offer.objects.get_for_administrator().as_cards()[:PER_PAGE]
+        )),
+        ('OffersManager.get_weightened', lambda: list(
+            Offer.objects.get_weightened()
+        )),
+        ('OffersManager.update_statuses', Offer.objects.update_statuses),
+        ('search_offers', lambda: list(search_offers(
+            Offer.objects.get_active().as_cards(),
+            query,
+        ))),
+    ]
+    return measured
+
+
+def current_commit():
+    u"""Return hash of checked out git commit or None."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, repeat, seed=0, log=None):
+    u"""Grow data to each scale and measure all targets on it.
+
+    Data is only added, so scales should be given in ascending order.
+
+    :param scales: list Integer numbers of offers
+    :param repeat: Integer number of measured calls of each target
+    :param seed: Integer random seed of generated data
+    :param log: callable receiving progress messages or None
+    :return: dict Results ready to be saved as JSON
+    """
+    results = {
+        'version': RESULTS_VERSION,
+        'commit': current_commit(),
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'repeat': repeat,
+        'scales': [],
+    }
+    generator = DataGenerator(seed)
+    for scale in scales:
+        missing = scale - Offer.objects.count()
+        if missing > 0:
+            generator.generate(
+                max(1, int(missing * ORGANIZATIONS_RATIO)),
+                missing,
+                int(missing * VOLUNTEERS_RATIO),
+            )
+        scale_results = {
+            'scale': scale,
+            'offers': Offer.objects.count(),
+            'organizations': Organization.objects.count(),
+            'results': {},
+        }
+        for name, func in targets():
+            scale_results['results'][name] = measure(func, repeat)
+            if log:
+                log(u"{:>7} offers {:<40} {:>9.2f} ms {:>4} queries".format(
+                    scale_results['offers'],
+                    name,
+                    scale_results['results'][name]['median'],
+                    scale_results['results'][name]['queries'],
+                ))
+        results['scales'].append(scale_results)
+    return results
+
+
+def compare(previous, current):
+    u"""Return rows comparing median times of the same targets and scales.
+
+    :param previous: dict Earlier results
+    :param current: dict Current results
+    :return: list Tuples of scale, target name, previous and
+        current median time and their ratio
+    """
+    previous_scales = {
+        scale['scale']: scale['results'] for scale in previous['scales']
+    }
+    rows = []
+    for scale in current['scales']:
+        before = previous_scales.get(scale['scale'], {})
+        for name, stats in sorted(scale['results'].items()):
+            if name in before:
+                rows.append((
+                    scale['scale'],
+                    name,
+                    before[name]['median'],
+                    stats['median'],
+                    stats['median'] / (before[name]['median'] or 1e-9),
+                ))
+    return rows
@@ -3,6 +3,8 @@
 u"""
 .. module:: email
 """
+import logging
+import smtplib
 
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.mail import EmailMultiAlternatives
@@ -10,14 +12,24 @@ from django.core.mail import get_connection
 from django.template import Context
 from django.template.loader import get_template
 
+from apps.volontulo.models import OutgoingEmail
 from apps.volontulo.utils import get_administrators_emails
 
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.email')
+
 FROM_ADDRESS = 'support@volontuloapp.org'
 FAIL_SILENTLY = False
 AUTH_USER = None
 AUTH_PASSWORD = None
 CONNECTION = None
 
+# outbox settings:
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60
+CLAIM_TIMEOUT = 300
+
 SUBJECTS = {
     'offer_application': u'Zgłoszenie chęci pomocy w ofercie',
     'offer_creation': u'Zgłoszenie oferty na Volontulo',
@@ -28,12 +40,11 @@ SUBJECTS = {
 
 
 def send_mail(request, templates_name, recipient_list, context=None):
-    """Proxy for sending emails."""
-    fail_silently = FAIL_SILENTLY
-    auth_user = AUTH_USER
-    auth_password = AUTH_PASSWORD
-    connection = CONNECTION
+    """Proxy for sending emails.
 
+    Email is rendered within request and put into outbox, from which it is
+    sent by send_queued_emails management command.
+    """
     context = Context(context or {})
     context.update({
         'protocol': 'https' if request.is_secure() else 'http',
@@ -42,23 +53,97 @@ def send_mail(request, templates_name, recipient_list, context=None):
     text_template = get_template('emails/{}.txt'.format(templates_name))
     html_template = get_template('emails/{}.html'.format(templates_name))
 
-    bcc = list(get_administrators_emails().values())
-    connection = connection or get_connection(
-        username=auth_user,
-        password=auth_password,
-        fail_silently=fail_silently
+    return OutgoingEmail.objects.create(
+        subject=SUBJECTS[templates_name],
+        from_email=FROM_ADDRESS,
+        recipients='\n'.join(r for r in recipient_list if r),
+        bcc='\n'.join(get_administrators_emails().values()),
+        body=text_template.render(context),
+        html_body=html_template.render(context),
     )
+
+
+def _build_message(outgoing_email, connection):
+    u"""Build message ready to be sent from outbox email.
+
+    :param outgoing_email: OutgoingEmail model instance
+    :param connection: email backend instance
+    """
+    bcc = outgoing_email.bcc.split()
     # required, if omitted then no emails from BCC are send
     headers = {'bcc': ','.join(bcc)}
     email = EmailMultiAlternatives(
-        SUBJECTS[templates_name],
-        text_template.render(context),
-        FROM_ADDRESS,
-        recipient_list,
+        outgoing_email.subject,
+        outgoing_email.body,
+        outgoing_email.from_email,
+        outgoing_email.recipients.split(),
         bcc,
         connection=connection,
         headers=headers
     )
-    email.attach_alternative(html_template.render(context), 'text/html')
+    if outgoing_email.html_body:
+        email.attach_alternative(outgoing_email.html_body, 'text/html')
+    return email
+
 
-    return email.send()
+def _open(connection):
+    u"""Open connection, return False if mail server can't be reached.
+
+    :param connection: email backend instance
+    """
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as ex:
+        logger.error(u"Cannot connect to mail server: %s", ex)
+        return False
+    return True
+
+
+def send_queued_emails(batch_size=BATCH_SIZE):
+    u"""Send pending emails from outbox reusing one connection.
+
+    Each email is claimed before sending, so concurrent senders (e.g. cron
+    and --loop) don't send it twice. Emails that failed to be sent, for any
+    reason, are retried with exponential backoff until MAX_ATTEMPTS is
+    reached, so one broken email doesn't block the outbox.
+
+    :param batch_size: Integer number of emails fetched from outbox at once
+    :return: tuple Numbers of sent and failed emails
+    """
+    connection = CONNECTION or get_connection(
+        username=AUTH_USER,
+        password=AUTH_PASSWORD,
+        fail_silently=FAIL_SILENTLY
+    )
+    sent = failed = 0
+    if not _open(connection):
+        return sent, failed
+    try:
+        while True:
+            batch = list(
+                OutgoingEmail.objects.get_pending(MAX_ATTEMPTS)[:batch_size]
+            )
+            if not batch:
+                break
+            for outgoing_email in batch:
+                if not outgoing_email.claim(CLAIM_TIMEOUT):
+                    continue
+                try:
+                    _build_message(outgoing_email, connection).send()
+                except Exception as ex:  # pylint: disable=broad-except
+                    logger.exception(
+                        u"Cannot send email %d", outgoing_email.id
+                    )
+                    outgoing_email.mark_failed(ex, RETRY_DELAY)
+                    failed += 1
+                    if isinstance(ex, (smtplib.SMTPException, OSError)):
+                        # connection might be broken, so it is reestablished:
+                        connection.close()
+                        if not _open(connection):
+                            return sent, failed
+                else:
+                    outgoing_email.mark_sent()
+                    sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: export
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+
+from apps.volontulo.models import Offer
+
+BATCH_SIZE = 2000
+VOLUNTEERS_HEADER = (
+    u'ID oferty',
+    u'Tytuł oferty',
+    u'ID wolontariusza',
+    u'Imię',
+    u'Nazwisko',
+    u'Email',
+    u'Telefon',
+)
+VOLUNTEERS_FIELDS = (
+    'offer_id',
+    'offer__title',
+    'user_id',
+    'user__first_name',
+    'user__last_name',
+    'user__email',
+    'user__userprofile__phone_no',
+)
+
+
+# spreadsheets evaluate cells starting with these characters as formulas:
+FORMULA_PREFIXES = (u'=', u'+', u'-', u'@', u'\t', u'\r')
+
+
+class Echo(object):
+    u"""File-like object returning written value instead of storing it."""
+
+    @staticmethod
+    def write(value):
+        u"""Return written value.
+
+        :param value: string Written value
+        """
+        return value
+
+
+def iterate_volunteers(batch_size=BATCH_SIZE, **filters):
+    u"""Yield rows of offers volunteers, selected in batches.
+
+    Batches are selected by id of the last row, so memory use doesn't
+    depend on the number of volunteers, on any database.
+
+    :param batch_size: Integer number of rows selected at once
+    :param filters: Lookups of Offer.volunteers through model, e.g.
+        offer_id or offer__organization_id
+    """
+    applications = Offer.volunteers.through.objects.filter(**filters)
+    last_id = 0
+    while True:
+        batch = applications.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list('id', *VOLUNTEERS_FIELDS)[:batch_size]
+        count = 0
+        for row in batch.iterator():
+            count += 1
+            last_id = row[0]
+            yield row[1:]
+        if count < batch_size:
+            return
+
+
+def escape_formula(value):
+    u"""Return value which spreadsheets won't evaluate as formula.
+
+    Text values entered by users, starting with formula characters, are
+    prefixed with apostrophe, so they are shown as text.
+
+    :param value: Value of CSV cell
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return u"'" + value
+    return value
+
+
+def stream_csv(filename, header, rows):
+    u"""Return response streaming rows as CSV file.
+
+    Byte order mark is sent first, so spreadsheets recognize UTF-8. Values
+    are escaped, so they can't inject formulas.
+
+    :param filename: string Name of downloaded file
+    :param header: tuple Names of columns
+    :param rows: iterable Rows of values
+    """
+    writer = csv.writer(Echo())
+
+    def lines():
+        u"""Yield CSV lines."""
+        yield u'\ufeff' + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([escape_formula(value) for value in row])
+
+    response = StreamingHttpResponse(
+        lines(),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        filename,
+    )
+    return response
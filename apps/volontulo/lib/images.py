@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: images
+"""
+import logging
+import os
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from PIL import Image
+from PIL import ImageOps
+
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.page_cache import offer_key
+from apps.volontulo.models import ImageJob
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserGallery
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.images')
+
+# variant name: (width, height, crop)
+VARIANTS = {
+    'avatar': (180, 180, True),
+    'card': (480, 360, True),
+    'profile': (400, 400, False),
+    'hero': (1200, 800, False),
+}
+JPEG_QUALITY = 85
+
+# queue settings:
+BATCH_SIZE = 100
+
+IMAGE_FIELDS = (
+    (OfferImage, 'path'),
+    (OrganizationGallery, 'path'),
+    (UserGallery, 'image'),
+)
+
+ORIENTATION_TAG = 274
+ORIENTATIONS = {
+    2: (Image.FLIP_LEFT_RIGHT,),
+    3: (Image.ROTATE_180,),
+    4: (Image.FLIP_TOP_BOTTOM,),
+    5: (Image.ROTATE_90, Image.FLIP_TOP_BOTTOM),
+    6: (Image.ROTATE_270,),
+    7: (Image.ROTATE_90, Image.FLIP_LEFT_RIGHT),
+    8: (Image.ROTATE_90,),
+}
+
+
+def variant_name(name, variant):
+    u"""Return path of image variant stored next to the original.
+
+    PNG images stay PNG (they may be transparent), others become JPEG.
+
+    :param name: string Original image path relative to storage
+    :param variant: string Variant name, one of VARIANTS keys
+    """
+    root, ext = os.path.splitext(name)
+    if ext.lower() != '.png':
+        ext = '.jpg'
+    return '{}.{}{}'.format(root, variant, ext)
+
+
+def resize_image(image, variant):
+    u"""Return image resized to variant size.
+
+    :param image: PIL.Image instance
+    :param variant: string Variant name, one of VARIANTS keys
+    """
+    width, height, crop = VARIANTS[variant]
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    image = image.copy()
+    image.thumbnail((width, height), Image.LANCZOS)
+    return image
+
+
+def encode_image(image, name):
+    u"""Return image encoded in format matching its variant path.
+
+    :param image: PIL.Image instance
+    :param name: string Variant image path
+    """
+    output = BytesIO()
+    if name.endswith('.png'):
+        image.save(output, 'PNG', optimize=True)
+    else:
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[3])
+            image = background
+        image.save(
+            output,
+            'JPEG',
+            quality=JPEG_QUALITY,
+            optimize=True,
+            progressive=True,
+        )
+    return output.getvalue()
+
+
+def apply_orientation(image):
+    u"""Return image rotated according to its EXIF orientation tag.
+
+    :param image: PIL.Image instance
+    """
+    try:
+        exif = image._getexif() or {}  # pylint: disable=protected-access
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return image
+    for method in ORIENTATIONS.get(exif.get(ORIENTATION_TAG), ()):
+        image = image.transpose(method)
+    return image
+
+
+def create_variant(name, variant, storage=default_storage):
+    u"""Create image variant unless it already exists.
+
+    :param name: string Original image path relative to storage
+    :param variant: string Variant name, one of VARIANTS keys
+    :param storage: Storage instance keeping images
+    :return: string Variant image path
+    """
+    target = variant_name(name, variant)
+    if storage.exists(target):
+        return target
+    with storage.open(name) as original:
+        image = Image.open(original)
+        image.load()
+    storage.save(
+        target,
+        ContentFile(
+            encode_image(resize_image(apply_orientation(image), variant),
+                         target)
+        )
+    )
+    return target
+
+
+def process_image(name, storage=default_storage):
+    u"""Decode image and (re)create all its variants.
+
+    It is run in worker processes, so it must not touch the database.
+
+    :param name: string Original image path relative to storage
+    :param storage: Storage instance keeping images
+    :return: list Names of created variants
+    """
+    if not storage.exists(name):
+        return []
+    delete_variants(name, storage)
+    for variant in VARIANTS:
+        create_variant(name, variant, storage)
+    return sorted(VARIANTS)
+
+
+def delete_variants(name, storage=default_storage):
+    u"""Delete all variants of image.
+
+    :param name: string Original image path relative to storage
+    :param storage: Storage instance keeping images
+    """
+    for variant in VARIANTS:
+        storage.delete(variant_name(name, variant))
+
+
+def get_variant(name, variant, variants=''):
+    u"""Return path of image variant or original if it is not created yet.
+
+    Variants are created by process_image_jobs command, never within request,
+    and recorded in variants field of image, so storage isn't touched here.
+
+    :param name: string Original image path relative to storage
+    :param variant: string Variant name, one of VARIANTS keys
+    :param variants: string Comma separated names of created variants
+    """
+    if variant in variants.split(','):
+        return variant_name(name, variant)
+    return name
+
+
+def record_variants(name, variants):
+    u"""Save names of created variants in all images with given path.
+
+    Cached cards of offers showing image as main one are rendered again.
+
+    :param name: string Original image path relative to storage
+    :param variants: list Names of created variants
+    """
+    for model, field in IMAGE_FIELDS:
+        model.objects.filter(**{field: name}).update(
+            variants=','.join(variants),
+        )
+    offer_ids = list(Offer.objects.filter(
+        main_image__path=name,
+    ).values_list('id', flat=True))
+    if offer_ids:
+        Offer.objects.filter(id__in=offer_ids).update(
+            revision=F('revision') + 1,
+        )
+        bump_versions(OFFERS, *[offer_key(id_) for id_ in offer_ids])
+
+
+def enqueue_all_images():
+    u"""Put all uploaded images into queue, so their variants are rebuilt.
+
+    :return: Integer number of queued images
+    """
+    names = set()
+    for model, field in IMAGE_FIELDS:
+        names.update(
+            model.objects.exclude(**{field: ''}).values_list(field, flat=True)
+        )
+    ImageJob.objects.bulk_create(ImageJob(name=name) for name in names)
+    return len(names)
+
+
+def process_image_jobs(executor, batch_size=BATCH_SIZE):
+    u"""Process pending image jobs on pool of worker processes.
+
+    Job which failed for any reason is marked as processed with error, so it
+    doesn't block the queue. If worker process died, unfinished jobs of the
+    batch are marked so too and BrokenProcessPool is raised, as executor
+    can't be used anymore.
+
+    :param executor: concurrent.futures.Executor running process_image
+    :param batch_size: Integer number of jobs fetched from queue at once
+    :return: tuple Numbers of processed and failed jobs
+    """
+    processed = failed = 0
+    while True:
+        batch = list(ImageJob.objects.get_pending()[:batch_size])
+        if not batch:
+            break
+        futures = []
+        for job in batch:
+            # old variants are deleted by worker, so they aren't used anymore:
+            record_variants(job.name, [])
+            futures.append((job, executor.submit(process_image, job.name)))
+        broken = None
+        for job, future in futures:
+            try:
+                variants = future.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error(u"Cannot process image %s: %s", job.name, ex)
+                job.mark_processed(ex)
+                failed += 1
+                if isinstance(ex, BrokenProcessPool):
+                    broken = ex
+            else:
+                record_variants(job.name, variants)
+                job.mark_processed()
+                processed += 1
+        if broken is not None:
+            raise broken
+    return processed, failed
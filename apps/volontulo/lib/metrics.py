@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: metrics
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.utils import CursorWrapper
+from django.template.backends.django import Template
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.metrics')
+
+# upper bounds of request time histogram buckets, in milliseconds:
+BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+FLUSH_INTERVAL = 10
+METRICS_TIMEOUT = 60 * 60 * 24 * 7
+PROCESSES_KEY = 'volontulo:metrics:processes'
+PROCESS_SLOT_KEY = 'volontulo:metrics:process:{}'
+SUMMED = ('time', 'queries', 'db_time', 'template_time', 'over_budget')
+
+_local = threading.local()
+
+
+def _empty_stats():
+    u"""Return stats of view which wasn't requested yet."""
+    stats = {name: 0 for name in SUMMED}
+    stats.update({
+        'count': 0,
+        'max_time': 0,
+        'max_queries': 0,
+        'histogram': [0] * len(BUCKETS),
+    })
+    return stats
+
+
+def merge_stats(target, source):
+    u"""Add stats of view from source to target.
+
+    :param target: dict Stats updated in place
+    :param source: dict Stats added to target
+    """
+    for name in SUMMED + ('count',):
+        target[name] += source[name]
+    target['max_time'] = max(target['max_time'], source['max_time'])
+    target['max_queries'] = max(target['max_queries'], source['max_queries'])
+    target['histogram'] = [
+        a + b for a, b in zip(target['histogram'], source['histogram'])
+    ]
+
+
+def percentile(stats, fraction):
+    u"""Return upper bound of histogram bucket with given percentile.
+
+    Maximum time is returned for the last, unbounded bucket.
+
+    :param stats: dict Stats of view
+    :param fraction: float Percentile as fraction, e.g. 0.95
+    """
+    threshold = stats['count'] * fraction
+    total = 0
+    for bound, count in zip(BUCKETS, stats['histogram']):
+        total += count
+        if count and total >= threshold:
+            return min(bound, stats['max_time'])
+    return 0
+
+
+def register_process(key, slot=None):
+    u"""Register cache key of process stats, so they are collected.
+
+    Processes get consecutive slots from shared counter, incremented
+    atomically by cache, and keep their keys in their own slots, so no
+    process overwrites keys registered by others.
+
+    :param key: string Cache key of process stats
+    :param slot: Integer slot registered before or None
+    :return: Integer slot of process
+    """
+    if slot is not None:
+        # counter is never expired, but it could be evicted or cleared and
+        # slot of this process given to another one:
+        registered = cache.get_many([
+            PROCESSES_KEY,
+            PROCESS_SLOT_KEY.format(slot),
+        ])
+        if (registered.get(PROCESSES_KEY, 0) < slot or
+                registered.get(PROCESS_SLOT_KEY.format(slot), key) != key):
+            slot = None
+    if slot is None:
+        cache.add(PROCESSES_KEY, 0, None)
+        slot = cache.incr(PROCESSES_KEY)
+    cache.set(PROCESS_SLOT_KEY.format(slot), key, METRICS_TIMEOUT)
+    return slot
+
+
+def registered_processes():
+    u"""Return cache keys of stats of all registered processes."""
+    count = cache.get(PROCESSES_KEY) or 0
+    return list(cache.get_many([
+        PROCESS_SLOT_KEY.format(slot) for slot in range(1, count + 1)
+    ]).values())
+
+
+class ViewMetrics(object):
+    u"""Stats of views requested in this process.
+
+    Stats are kept in memory and from time to time saved to cache under key
+    of this process, so they can be aggregated by any other process.
+    """
+
+    def __init__(self):
+        u"""Initialize empty stats."""
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.flushed_at = time.time()
+        self.slot = None
+
+    @property
+    def key(self):
+        u"""Cache key of this process stats."""
+        return 'volontulo:metrics:{}:{}'.format(
+            socket.gethostname(),
+            os.getpid(),
+        )
+
+    def record(self, name, duration, queries, db_time, template_time):
+        u"""Add measurements of single request.
+
+        :param name: string URL name of view
+        :param duration: float Wall time in milliseconds
+        :param queries: Integer number of database queries
+        :param db_time: float Database time in milliseconds
+        :param template_time: float Template rendering time in milliseconds
+        """
+        bucket = next(
+            i for i, bound in enumerate(BUCKETS) if duration <= bound
+        )
+        with self.lock:
+            stats = self.stats.setdefault(name, _empty_stats())
+            stats['count'] += 1
+            stats['time'] += duration
+            stats['queries'] += queries
+            stats['db_time'] += db_time
+            stats['template_time'] += template_time
+            stats['over_budget'] += int(queries > settings.QUERY_BUDGET)
+            stats['max_time'] = max(stats['max_time'], duration)
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['histogram'][bucket] += 1
+        if time.time() - self.flushed_at > FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        u"""Save stats of this process to cache."""
+        with self.lock:
+            self.flushed_at = time.time()
+            cache.set(self.key, self.stats, METRICS_TIMEOUT)
+            self.slot = register_process(self.key, self.slot)
+
+    def reset(self):
+        u"""Remove stats of all processes."""
+        with self.lock:
+            self.stats = {}
+        cache.delete_many(registered_processes())
+
+
+view_metrics = ViewMetrics()
+
+
+def collect():
+    u"""Return stats of views aggregated from all processes, by URL name."""
+    aggregated = {}
+    for stats in cache.get_many(registered_processes()).values():
+        for name, view_stats in stats.items():
+            aggregated.setdefault(name, _empty_stats())
+            merge_stats(aggregated[name], view_stats)
+    return aggregated
+
+
+def summarize(aggregated):
+    u"""Return list of rows describing views, slowest (in total) first.
+
+    :param aggregated: dict Stats by URL name, as returned by collect
+    """
+    rows = []
+    for name, stats in aggregated.items():
+        count = stats['count'] or 1
+        rows.append({
+            'name': name,
+            'count': stats['count'],
+            'total_time': stats['time'],
+            'avg_time': stats['time'] / count,
+            'p50': percentile(stats, 0.5),
+            'p95': percentile(stats, 0.95),
+            'max_time': stats['max_time'],
+            'avg_queries': stats['queries'] / count,
+            'max_queries': stats['max_queries'],
+            'avg_db_time': stats['db_time'] / count,
+            'avg_template_time': stats['template_time'] / count,
+            'over_budget': stats['over_budget'],
+            'histogram': stats['histogram'],
+        })
+    return sorted(rows, key=lambda row: row['total_time'], reverse=True)
+
+
+def instrument_templates():
+    u"""Measure time of rendering templates, without nested ones.
+
+    Django doesn't signal template rendering outside of tests, so render
+    method of template backend is wrapped, once per process.
+    """
+    if getattr(Template.render, 'instrumented', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, *args, **kwargs):
+        u"""Render template adding its time to current thread counter."""
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        start = time.time()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            _local.depth = depth
+            if not depth:
+                _local.template_time = (
+                    getattr(_local, 'template_time', 0.0) +
+                    time.time() - start
+                )
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+def instrument_cursors():
+    u"""Count queries and their time, in current thread counters.
+
+    Queries are counted by execute methods of cursor wrapper, once per
+    process, so connections don't need debug cursors logging each query.
+    Debug cursor calls wrapper methods too, so queries aren't counted twice.
+    """
+    if getattr(CursorWrapper.execute, 'instrumented', False):
+        return
+
+    def counted(method):
+        u"""Return cursor method adding its call to thread counters."""
+        @wraps(method)
+        def counted_method(self, *args, **kwargs):
+            u"""Execute query counting it with its time."""
+            start = time.time()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                _local.queries = getattr(_local, 'queries', 0) + 1
+                _local.db_time = (
+                    getattr(_local, 'db_time', 0.0) + time.time() - start
+                )
+        counted_method.instrumented = True
+        return counted_method
+
+    CursorWrapper.execute = counted(CursorWrapper.execute)
+    CursorWrapper.executemany = counted(CursorWrapper.executemany)
+
+
+class MetricsMiddleware(object):
+    u"""Record time, queries and template rendering time of each view."""
+
+    def __init__(self):
+        u"""Start measuring queries and templates rendering time."""
+        instrument_cursors()
+        instrument_templates()
+
+    @staticmethod
+    def process_request(request):
+        u"""Start measuring request.
+
+        :param request: WSGIRequest instance
+        """
+        _local.template_time = 0.0
+        _local.queries = 0
+        _local.db_time = 0.0
+        request.metrics = {'start': time.time()}
+
+    @staticmethod
+    def process_response(request, response):
+        u"""Record measurements of request, if it was resolved to a view.
+
+        :param request: WSGIRequest instance
+        :param response: HttpResponse instance
+        """
+        measured = getattr(request, 'metrics', None)
+        if measured is None:
+            return response
+        duration = (time.time() - measured['start']) * 1000
+        queries = _local.queries
+
+        match = getattr(request, 'resolver_match', None)
+        name = match and (match.url_name or match.view_name)
+        if not name:
+            return response
+        view_metrics.record(
+            name,
+            duration,
+            queries,
+            _local.db_time * 1000,
+            _local.template_time * 1000,
+        )
+        if queries > settings.QUERY_BUDGET:
+            logger.warning(
+                u"%s (%s) made %d queries, over budget of %d.",
+                name, request.path, queries, settings.QUERY_BUDGET,
+            )
+        return response
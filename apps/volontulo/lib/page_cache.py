@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: page_cache
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.middleware.csrf import get_token
+
+OFFERS = 'offers'
+ORGANIZATIONS = 'organizations'
+# offers search index (see apps.volontulo.lib.search), changed only by bulk
+# updates, which don't send signals, and by processes changing offers:
+SEARCH_INDEX = 'search_index'
+PAGE_CACHE_TIMEOUT = 60 * 60
+CSRF_TOKEN_PLACEHOLDER = b'__volontulo_csrf_token__'
+# cookie hiding cookie law banner, which is rendered on every page:
+COOKIELAW_COOKIE = 'cookielaw_accepted'
+
+_local = threading.local()
+
+
+def offer_key(offer_id):
+    u"""Return version key of single offer.
+
+    :param offer_id: Integer offer id
+    """
+    return 'offer:{}'.format(offer_id)
+
+
+def organization_key(organization_id):
+    u"""Return version key of single organization.
+
+    :param organization_id: Integer organization id
+    """
+    return 'organization:{}'.format(organization_id)
+
+
+def _version_cache_key(key):
+    u"""Return cache key under which version is stored.
+
+    :param key: string Version key
+    """
+    return 'volontulo:version:{}'.format(key)
+
+
+def _new_version():
+    u"""Return version never used before, even if cached one was evicted."""
+    return int(time.time() * 1000000)
+
+
+def get_versions(keys):
+    u"""Return current versions of keys.
+
+    :param keys: list Version keys
+    """
+    cache_keys = [_version_cache_key(key) for key in keys]
+    versions = cache.get_many(cache_keys)
+    missing = {
+        cache_key: _new_version() for cache_key in cache_keys
+        if cache_key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[cache_key] for cache_key in cache_keys]
+
+
+def incr_version(key):
+    u"""Change version of key and return the new one.
+
+    :param key: string Version key
+    """
+    try:
+        return cache.incr(_version_cache_key(key))
+    except ValueError:
+        version = _new_version()
+        cache.set(_version_cache_key(key), version, None)
+        return version
+
+
+def _bump(keys):
+    u"""Change versions of keys.
+
+    :param keys: iterable Version keys
+    """
+    for key in keys:
+        incr_version(key)
+
+
+def bump_versions(*keys):
+    u"""Change versions of keys, so pages depending on them are not served.
+
+    Inside transaction versions are changed right away and once more when
+    request finishes (Django 1.8 has no on_commit hook), otherwise page
+    rendered from data before commit could be cached with the new version.
+
+    :param keys: string Version keys
+    """
+    _bump(keys)
+    if transaction.get_connection().in_atomic_block:
+        if not hasattr(_local, 'pending'):
+            _local.pending = set()
+        _local.pending.update(keys)
+    else:
+        bump_pending_versions()
+
+
+def bump_pending_versions():
+    u"""Change again versions changed inside transaction, once it ended.
+
+    It is called when request finishes (see apps.volontulo.signals).
+    """
+    pending = getattr(_local, 'pending', None)
+    if pending and not transaction.get_connection().in_atomic_block:
+        _local.pending = set()
+        _bump(pending)
+
+
+def is_cacheable(request):
+    u"""Return whether request can be served from page cache.
+
+    :param request: WSGIRequest instance
+    """
+    return (
+        request.method in ('GET', 'HEAD') and
+        not request.user.is_authenticated() and
+        not len(get_messages(request))
+    )
+
+
+def page_variant(request):
+    u"""Return name of page variant rendered for anonymous user.
+
+    Pages differ only by cookie law banner, hidden after cookies are
+    accepted.
+
+    :param request: WSGIRequest instance
+    """
+    return 'accepted' if request.COOKIES.get(COOKIELAW_COOKIE) else 'banner'
+
+
+def _page_cache_key(request, dependencies):
+    u"""Return cache key of page for its path, variant and data versions.
+
+    :param request: WSGIRequest instance
+    :param dependencies: list Version keys page depends on
+    """
+    versions = ':'.join(str(v) for v in get_versions(dependencies))
+    digest = hashlib.md5(u'{}|{}|{}'.format(
+        request.get_full_path(),
+        page_variant(request),
+        versions,
+    ).encode('utf-8')).hexdigest()
+    return 'volontulo:page:{}'.format(digest)
+
+
+def cache_anonymous_page(dependencies):
+    u"""Decorator caching whole page rendered for anonymous user.
+
+    Page is cached under key made from its URL and versions of data it is
+    rendered from, so it's never served after this data is changed.
+    CSRF token is replaced with placeholder in cached page and filled in
+    with token of each user when page is served.
+
+    :param dependencies: callable returning list of version keys for view
+        arguments
+    """
+    def decorator(view):
+        u"""Wrap view with page cache."""
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            u"""Serve page from cache or render and cache it."""
+            if not is_cacheable(request):
+                return view(request, *args, **kwargs)
+            key = _page_cache_key(request, dependencies(*args, **kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                return _restore_response(request, cached)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key,
+                    _store_response(request, response),
+                    PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def _store_response(request, response):
+    u"""Return response with CSRF token replaced with placeholder.
+
+    :param request: WSGIRequest instance
+    :param response: HttpResponse instance
+    """
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    content = response.content
+    if request.META.get('CSRF_COOKIE_USED'):
+        content = content.replace(
+            get_token(request).encode('ascii'),
+            CSRF_TOKEN_PLACEHOLDER,
+        )
+    return response.__class__(
+        content,
+        content_type=response['Content-Type'],
+    )
+
+
+def _restore_response(request, cached):
+    u"""Return cached response with CSRF token of current user.
+
+    :param request: WSGIRequest instance
+    :param cached: HttpResponse instance stored in cache
+    """
+    if CSRF_TOKEN_PLACEHOLDER in cached.content:
+        cached.content = cached.content.replace(
+            CSRF_TOKEN_PLACEHOLDER,
+            get_token(request).encode('ascii'),
+        )
+    return cached
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: pagination
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+PER_PAGE = 20
+
+
+class KeysetPage(object):
+    u"""Page of objects with cursors of neighbouring pages."""
+
+    def __init__(self, items, ordering, has_next, has_previous):
+        u"""Initialize page.
+
+        :param items: list Objects on page
+        :param ordering: tuple Names of fields objects are ordered by
+        :param has_next: bool Whether there are objects after this page
+        :param has_previous: bool Whether there are objects before this page
+        """
+        self.items = items
+        self.ordering = ordering
+        self.has_next = has_next and bool(items)
+        self.has_previous = has_previous and bool(items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def next_cursor(self):
+        u"""Cursor of page following this one."""
+        return encode_cursor(self.items[-1], self.ordering)
+
+    @property
+    def previous_cursor(self):
+        u"""Cursor of page preceding this one."""
+        return encode_cursor(self.items[0], self.ordering)
+
+
+def encode_cursor(obj, ordering):
+    u"""Return URL-safe cursor pointing at object.
+
+    :param obj: Model instance
+    :param ordering: tuple Names of fields objects are ordered by
+    """
+    values = json.dumps([getattr(obj, field) for field in ordering])
+    return base64.urlsafe_b64encode(values.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, ordering):
+    u"""Return values of ordering fields encoded in cursor.
+
+    :param cursor: string Cursor from request
+    :param ordering: tuple Names of fields objects are ordered by
+    :return: list Values or None for invalid cursor
+    """
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        )
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    # ordering fields are NOT NULL, so only forged cursor has NULLs:
+    if None in values:
+        return None
+    return values
+
+
+def _after(ordering, values, lookup):
+    u"""Return condition selecting objects after (or before) values.
+
+    For ordering (a, b) it's: a > x OR (a = x AND b > y).
+
+    :param ordering: tuple Names of fields objects are ordered by
+    :param values: list Values of ordering fields
+    :param lookup: string 'gt' or 'lt'
+    """
+    return reduce(or_, (
+        Q(**dict(
+            [(field, value) for field, value in zip(ordering[:i], values)] +
+            [('{}__{}'.format(ordering[i], lookup), values[i])]
+        ))
+        for i in range(len(ordering))
+    ))
+
+
+def paginate(request, queryset, ordering, per_page=PER_PAGE):
+    u"""Return page of objects selected by cursor from request.
+
+    Page is selected with WHERE on ordering fields instead of OFFSET, so any
+    page is as fast as the first one if there is index on these fields.
+    Next page is requested with ?after=<cursor>, previous with
+    ?before=<cursor>.
+
+    :param request: WSGIRequest instance
+    :param queryset: QuerySet to paginate
+    :param ordering: tuple Names of unique together, non-null fields
+    :param per_page: Integer number of objects on page
+    :return: KeysetPage
+    """
+    # pylint: disable=protected-access
+    nullable = [
+        field for field in ordering
+        if queryset.model._meta.get_field(field).null
+    ]
+    if nullable:
+        raise ValueError(u"Cannot paginate by nullable fields: {}".format(
+            u", ".join(nullable),
+        ))
+    after = decode_cursor(request.GET.get('after', ''), ordering)
+    before = decode_cursor(request.GET.get('before', ''), ordering)
+    if before is not None:
+        items = list(
+            queryset.filter(_after(ordering, before, 'lt')).order_by(
+                *['-{}'.format(field) for field in ordering]
+            )[:per_page + 1]
+        )
+        has_previous = len(items) > per_page
+        return KeysetPage(items[:per_page][::-1], ordering, True, has_previous)
+
+    if after is not None:
+        queryset = queryset.filter(_after(ordering, after, 'gt'))
+    items = list(queryset.order_by(*ordering)[:per_page + 1])
+    return KeysetPage(
+        items[:per_page],
+        ordering,
+        len(items) > per_page,
+        after is not None,
+    )
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: search
+"""
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction
+
+from apps.volontulo.lib.page_cache import SEARCH_INDEX
+from apps.volontulo.lib.page_cache import get_versions
+from apps.volontulo.lib.page_cache import incr_version
+from apps.volontulo.models import Offer
+
+# pylint: disable=invalid-name
+logger = logging.getLogger('volontulo.search')
+
+# PostgreSQL text search configuration created by migrations, copy of
+# "simple" one; documents are folded like normalize_word does, without
+# stripping suffixes, so queries are built by prefix_tsquery:
+SEARCH_CONFIG = 'volontulo'
+
+# searched fields and their weights, the same as PostgreSQL ts_rank defaults:
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+FIELDS = (
+    ('title', 'A'),
+    ('organization__name', 'A'),
+    ('location', 'B'),
+    ('description', 'C'),
+    ('requirements', 'D'),
+    ('benefits', 'D'),
+)
+
+# most frequent Polish inflection suffixes, longest first:
+SUFFIXES = sorted((
+    'ach', 'ami', 'ego', 'emu', 'iej', 'ich', 'imi', 'owi', 'owa', 'owe',
+    'ow', 'om', 'em', 'ie', 'ia', 'iu', 'ym', 'ej',
+    'a', 'e', 'i', 'o', 'u', 'y',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+# number of best matching offers returned:
+MAX_RESULTS = 500
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fold_word(word):
+    u"""Return lowercase word without diacritics.
+
+    PostgreSQL folds documents the same way (see volontulo_fold function of
+    0016_offer_search_folding migration), but only letters of Latin-1
+    Supplement and Latin Extended-A blocks, which include Polish ones.
+
+    :param word: string Single word
+    """
+    word = word.lower().replace(u'ł', u'l')
+    return u''.join(
+        c for c in unicodedata.normalize('NFKD', word)
+        if not unicodedata.combining(c)
+    )
+
+
+@lru_cache(maxsize=100000)
+def normalize_word(word):
+    u"""Return word folded by fold_word with Polish suffix stripped.
+
+    :param word: string Single word
+    """
+    word = fold_word(word)
+    for suffix in SUFFIXES:
+        if (
+                word.endswith(suffix) and
+                len(word) - len(suffix) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    u"""Return list of normalized words from text.
+
+    :param text: string Text to split into words
+    """
+    return [normalize_word(w) for w in WORD_RE.findall(text or u'')]
+
+
+def prefix_tsquery(query):
+    u"""Return PostgreSQL tsquery matching words starting with query words.
+
+    Words are normalized like in in-memory index, so both backends find the
+    same offers, e.g. "Poznan" finds "Poznaniu".
+
+    :param query: string Searched words
+    """
+    return u' & '.join(u'{}:*'.format(term) for term in tokenize(query))
+
+
+def _best_first(result):
+    u"""Sort key of search result, highest rank and oldest offer first.
+
+    :param result: tuple Offer id and rank
+    """
+    offer_id, rank = result
+    return -rank, offer_id
+
+
+class OfferIndex(object):
+    u"""In-memory inverted index of active offers.
+
+    Index is built from database and then kept up to date by signals (see
+    apps.volontulo.signals), one offer at a time. Changes made by other
+    processes, or by bulk updates which don't send signals, change shared
+    version of index (see apps.volontulo.lib.page_cache), so index is rebuilt
+    when it differs from version it was built at.
+    """
+
+    def __init__(self, versions=(SEARCH_INDEX,)):
+        u"""Initialize empty, not built index.
+
+        :param versions: tuple Version keys index depends on
+        """
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._documents = {}
+        self._sorted_terms = []
+        self.is_built = False
+        self.versions = versions
+        self.built_versions = None
+        self._rebuilding = False
+        self._local = threading.local()
+
+    def clear(self):
+        u"""Drop index, it will be rebuilt on next search."""
+        with self._lock:
+            self._postings = {}
+            self._documents = {}
+            self._sorted_terms = []
+            self.is_built = False
+
+    def add(self, offer_id, document):
+        u"""Add (or replace) offer in index.
+
+        :param offer_id: Integer offer id
+        :param document: dict Values of FIELDS
+        """
+        scores = defaultdict(float)
+        for field, weight in FIELDS:
+            for term in tokenize(document.get(field)):
+                scores[term] += WEIGHTS[weight]
+        with self._lock:
+            self.remove(offer_id)
+            for term, score in scores.items():
+                if term not in self._postings:
+                    self._postings[term] = {}
+                    self._sorted_terms = None
+                self._postings[term][offer_id] = score
+            self._documents[offer_id] = tuple(scores)
+
+    def remove(self, offer_id):
+        u"""Remove offer from index.
+
+        :param offer_id: Integer offer id
+        """
+        with self._lock:
+            for term in self._documents.pop(offer_id, ()):
+                postings = self._postings[term]
+                del postings[offer_id]
+                if not postings:
+                    del self._postings[term]
+                    self._sorted_terms = None
+
+    def current_versions(self):
+        u"""Return shared versions of data index depends on."""
+        return get_versions(self.versions)
+
+    @property
+    def is_stale(self):
+        u"""Whether data changed since index was built."""
+        if not self.versions:
+            return False
+        return self.built_versions != self.current_versions()
+
+    def build(self):
+        u"""Build index from all active offers.
+
+        New index is built aside and swapped in, so searches made meanwhile
+        use the old one. Versions are read first, so changes made during
+        build make index stale again.
+        """
+        versions = self.current_versions()
+        fresh = OfferIndex(versions=())
+        fresh.is_built = True
+        fresh._add_active()  # pylint: disable=protected-access
+        with self._lock:
+            # pylint: disable=protected-access
+            self._postings = fresh._postings
+            self._documents = fresh._documents
+            self._sorted_terms = fresh._sorted_terms
+            self.is_built = True
+            self.built_versions = versions
+
+    def build_in_background(self):
+        u"""Build index in separate thread, unless it's being built already.
+
+        Thread uses its own database connection, closed when it's done.
+        """
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def build():
+            u"""Build index and release database connection."""
+            try:
+                self.build()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(u"Cannot build offers search index")
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        thread = threading.Thread(target=build, name='offer-index-build')
+        thread.daemon = True
+        thread.start()
+
+    def ensure_fresh(self):
+        u"""Build index if it isn't built or data changed.
+
+        With WARM_SEARCH_INDEX setting index is built when process starts
+        (see volontulo_org.wsgi), so stale index is rebuilt in background
+        and searches meanwhile use the old one. Otherwise, e.g. in tests,
+        it is rebuilt right away.
+        """
+        if not self.is_built:
+            self.build()
+        elif self.is_stale:
+            if getattr(settings, 'WARM_SEARCH_INDEX', False):
+                self.build_in_background()
+            else:
+                self.build()
+
+    def refresh(self, offer_ids):
+        u"""Update offers in already built index.
+
+        Offers which are not active anymore are removed from index.
+
+        :param offer_ids: list Ids of changed offers
+        """
+        with self._lock:
+            if not self.is_built:
+                return
+            for offer_id in offer_ids:
+                self.remove(offer_id)
+            self._add_active(offer_ids)
+
+    def notify_changed(self):
+        u"""Change shared version after offers were changed by this process.
+
+        Other processes rebuild their indexes, while this one, updated by
+        signals, takes the new version, unless it was changed by anybody
+        else meanwhile. Inside transaction version is changed when request
+        finishes (see apps.volontulo.signals), so other processes don't
+        rebuild indexes before changes are committed.
+        """
+        if transaction.get_connection().in_atomic_block:
+            self._local.pending = True
+        else:
+            self._local.pending = False
+            self._incr_version()
+
+    def notify_pending(self):
+        u"""Change shared version after transaction which changed offers."""
+        if (getattr(self._local, 'pending', False) and
+                not transaction.get_connection().in_atomic_block):
+            self._local.pending = False
+            self._incr_version()
+
+    def _incr_version(self):
+        u"""Change shared version, taking it if index was up to date."""
+        with self._lock:
+            version = incr_version(SEARCH_INDEX)
+            if self.built_versions == [version - 1]:
+                self.built_versions = [version]
+
+    def _add_active(self, offer_ids=None):
+        u"""Add active offers to index.
+
+        :param offer_ids: list Ids of offers to add, all if omitted
+        """
+        queryset = Offer.objects.get_active()
+        if offer_ids is not None:
+            queryset = queryset.filter(id__in=offer_ids)
+        fields = [field for field, _ in FIELDS]
+        for values in queryset.values('id', *fields):
+            self.add(values['id'], values)
+
+    def _expand(self, term):
+        u"""Return indexed terms starting with term.
+
+        :param term: string Normalized searched word
+        """
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        position = bisect_left(self._sorted_terms, term)
+        while (
+                position < len(self._sorted_terms) and
+                self._sorted_terms[position].startswith(term)
+        ):
+            yield self._sorted_terms[position]
+            position += 1
+
+    def _postings_for(self, term):
+        u"""Return postings of all indexed terms starting with term.
+
+        :param term: string Normalized searched word
+        """
+        return [self._postings[t] for t in self._expand(term)]
+
+    @staticmethod
+    def _merge(term_postings, candidates=None):
+        u"""Return summed scores of offers from postings.
+
+        :param term_postings: list Postings of terms matching searched word
+        :param candidates: iterable Ids of offers to look up, if they are
+            fewer than offers in postings
+        """
+        ranks = defaultdict(float)
+        if candidates is None:
+            for postings in term_postings:
+                for offer_id, score in postings.items():
+                    ranks[offer_id] += score
+        else:
+            for offer_id in candidates:
+                for postings in term_postings:
+                    if offer_id in postings:
+                        ranks[offer_id] += postings[offer_id]
+        return ranks
+
+    def search(self, query, limit=None):
+        u"""Return ids of offers matching all words, best matching first.
+
+        Every searched word matches also longer words starting with it.
+
+        :param query: string Searched words
+        :param limit: Integer maximal number of returned offers
+        :return: list Tuples of offer id and rank
+        """
+        self.ensure_fresh()
+        with self._lock:
+            terms_postings = sorted(
+                (self._postings_for(term) for term in set(tokenize(query))),
+                key=lambda postings: sum(len(p) for p in postings),
+            )
+            if not terms_postings:
+                return []
+            # candidates come from the rarest word, others only narrow them:
+            ranks = self._merge(terms_postings[0])
+            for term_postings in terms_postings[1:]:
+                if len(ranks) * len(term_postings) > sum(
+                        len(p) for p in term_postings):
+                    term_ranks = self._merge(term_postings)
+                else:
+                    term_ranks = self._merge(term_postings, ranks)
+                ranks = {
+                    offer_id: rank + term_ranks[offer_id]
+                    for offer_id, rank in ranks.items()
+                    if offer_id in term_ranks
+                }
+        if limit is None:
+            return sorted(ranks.items(), key=_best_first)
+        return heapq.nsmallest(limit, ranks.items(), key=_best_first)
+
+
+# pylint: disable=invalid-name
+offer_index = OfferIndex()
+
+
+def search_offers(queryset, query):
+    u"""Search offers, best matching first.
+
+    On PostgreSQL stored and indexed search_vector column is used, on other
+    databases in-memory offer_index is.
+
+    :param queryset: Offer QuerySet to search in
+    :param query: string Searched words
+    :return: QuerySet or list of at most MAX_RESULTS offers with rank
+        attribute
+    """
+    if not WORD_RE.search(query or u''):
+        return []
+    if connection.vendor == 'postgresql':
+        tsquery = 'to_tsquery(%s, %s)'
+        params = (SEARCH_CONFIG, prefix_tsquery(query))
+        return queryset.extra(
+            select={'rank': 'ts_rank(volontulo_offer.search_vector, {})'
+                            .format(tsquery)},
+            select_params=params,
+            where=['volontulo_offer.search_vector @@ {}'.format(tsquery)],
+            params=params,
+        ).order_by('-rank', 'id')[:MAX_RESULTS]
+
+    ranks = dict(offer_index.search(query, MAX_RESULTS))
+    offers = list(queryset.filter(id__in=list(ranks)))
+    for offer in offers:
+        offer.rank = ranks[offer.id]
+    return sorted(offers, key=lambda o: (-o.rank, o.id))
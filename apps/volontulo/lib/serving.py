@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: serving
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.http import StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.http import urlquote
+from django.utils.http import parse_etags
+from django.utils.http import parse_http_date_safe
+from django.utils.http import quote_etag
+from django.views.static import was_modified_since
+
+from apps.volontulo.lib.assets import COMPRESSIBLE_EXTENSIONS
+from apps.volontulo.lib.assets import find_precompressed
+
+# files with content hash in name, e.g. "main.0123456789ab.css", never change:
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+HASHED_MAX_AGE = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = 60 * 60
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+X_SENDFILE = 'x-sendfile'
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+
+
+def file_etag(stat):
+    u"""Return unquoted ETag of file made from its modification time and size.
+
+    :param stat: os.stat_result of file
+    """
+    return '{:x}-{:x}'.format(int(stat.st_mtime), stat.st_size)
+
+
+def is_not_modified(request, etag, mtime):
+    u"""Return whether client has the current version of file.
+
+    :param request: WSGIRequest instance
+    :param etag: string Unquoted ETag of file
+    :param mtime: float Modification time of file
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etag in etags or '*' in etags
+    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since:
+        return not was_modified_since(if_modified_since, mtime)
+    return False
+
+
+def parse_range(request, etag, stat):
+    u"""Return (start, end) of requested bytes range or None for whole file.
+
+    Only single ranges are supported, for others whole file is sent. Range
+    is ignored if If-Range doesn't match the current version of file.
+
+    :param request: WSGIRequest instance
+    :param etag: string Unquoted ETag of file
+    :param stat: os.stat_result of file
+    :raises ValueError: when range can't be satisfied
+    """
+    match = RANGE.match(request.META.get('HTTP_RANGE', '').strip())
+    if not match:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != quote_etag(etag):
+        if parse_http_date_safe(if_range) != int(stat.st_mtime):
+            return None
+
+    first, last = match.groups()
+    size = stat.st_size
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _read_range(opened_file, start, length):
+    u"""Yield chunks of file range and close file afterwards.
+
+    :param opened_file: file object opened in binary mode
+    :param start: Integer first byte
+    :param length: Integer number of bytes
+    """
+    try:
+        opened_file.seek(start)
+        while length > 0:
+            chunk = opened_file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        opened_file.close()
+
+
+def guess_type(fullpath):
+    u"""Return content type and encoding of file guessed from its name.
+
+    :param fullpath: string Path of file
+    """
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    return content_type or 'application/octet-stream', encoding
+
+
+def _sendfile_response(fullpath, content_type, encoding):
+    u"""Return response delegating file transfer to front web server.
+
+    Front web server handles conditional and range requests itself. Paths
+    are URL-encoded, as header values must be ASCII. nginx gets path of file
+    in project directory under internal location, so it doesn't depend on
+    URL the file was requested with.
+
+    :param fullpath: string Absolute path of file
+    :param content_type: string Content type of file
+    :param encoding: string Content encoding of file or None
+    :return: HttpResponse or None if nginx can't reach file
+    """
+    response = HttpResponse(content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if settings.SENDFILE_BACKEND == X_ACCEL_REDIRECT:
+        relative = os.path.relpath(fullpath, settings.BASE_DIR)
+        if relative.startswith(os.pardir + os.sep):
+            return None
+        response['X-Accel-Redirect'] = '{}/{}'.format(
+            settings.SENDFILE_INTERNAL_PREFIX.rstrip('/'),
+            urlquote(relative.replace(os.sep, '/')),
+        )
+    else:
+        response['X-Sendfile'] = urlquote(fullpath)
+    return response
+
+
+def serve_file(request, fullpath, content_type=None, encoding=None):
+    u"""Return response streaming file, honoring conditional and range headers.
+
+    :param request: WSGIRequest instance
+    :param fullpath: string Absolute path of file
+    :param content_type: string Content type, guessed from name if not given
+    :param encoding: string Content encoding of file or None
+    :raises IOError: when file can't be opened
+    """
+    if content_type is None:
+        content_type, encoding = guess_type(fullpath)
+    opened_file = open(fullpath, 'rb')
+    stat = os.fstat(opened_file.fileno())
+    etag = file_etag(stat)
+
+    try:
+        byte_range = parse_range(request, etag, stat)
+    except ValueError:
+        opened_file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */{}'.format(stat.st_size)
+        return response
+
+    if is_not_modified(request, etag, stat.st_mtime):
+        opened_file.close()
+        response = HttpResponseNotModified()
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(opened_file, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(
+            start, end, stat.st_size,
+        )
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(opened_file, content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    if encoding and response.status_code != 304:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def serve(request, path, document_root):
+    u"""View serving files from document root, e.g. uploaded media.
+
+    Transfer is handed to front web server if SENDFILE_BACKEND is set,
+    otherwise file is streamed by Django. Precompressed siblings of files
+    are sent to clients accepting their encoding. Files with content hash
+    in name are cached by clients for a year.
+
+    :param request: WSGIRequest instance
+    :param path: string File path relative to document root
+    :param document_root: string Directory files are served from
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(document_root, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    content_type, encoding = guess_type(fullpath)
+    compressible = fullpath.endswith(COMPRESSIBLE_EXTENSIONS)
+    if compressible:
+        fullpath, encoding = find_precompressed(request, fullpath, encoding)
+
+    response = None
+    if settings.SENDFILE_BACKEND:
+        response = _sendfile_response(fullpath, content_type, encoding)
+    if response is None:
+        try:
+            response = serve_file(request, fullpath, content_type, encoding)
+        except (IOError, OSError):
+            raise Http404
+    if compressible:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=HASHED_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=DEFAULT_MAX_AGE)
+    return response
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: static_pages
+"""
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+
+from apps.volontulo.lib.page_cache import COOKIELAW_COOKIE
+from apps.volontulo.lib.page_cache import page_variant
+from apps.volontulo.lib.serving import serve_file
+from apps.volontulo.lib.templates import TEMPLATES_DIR
+
+PAGES_DIR = 'pages'
+
+# cookies of requests rendering each page variant (see page_variant):
+VARIANT_COOKIES = {
+    'banner': {},
+    'accepted': {COOKIELAW_COOKIE: '1'},
+}
+
+
+def list_pages():
+    u"""Return names of all static pages, as used in their URLs."""
+    return sorted(
+        os.path.splitext(filename)[0]
+        for filename in os.listdir(os.path.join(TEMPLATES_DIR, PAGES_DIR))
+        if filename.endswith('.html')
+    )
+
+
+def prebuilt_page_path(name, variant='banner'):
+    u"""Return path of page prebuilt for anonymous users.
+
+    :param name: string Page name
+    :param variant: string Page variant, as returned by page_variant
+    """
+    return os.path.join(
+        settings.STATIC_ROOT,
+        PAGES_DIR,
+        '{}.{}.html'.format(name, variant),
+    )
+
+
+def build_static_pages():
+    u"""Render all static pages for anonymous users into STATIC_ROOT.
+
+    Every page is built in each variant, with and without cookie law banner.
+    Each file is written next to its destination and then moved over it,
+    so page being served is never half written.
+
+    :return: list Names of built pages
+    """
+    directory = os.path.join(settings.STATIC_ROOT, PAGES_DIR)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    pages = list_pages()
+    for name in pages:
+        for variant, cookies in VARIANT_COOKIES.items():
+            request = HttpRequest()
+            request.method = 'GET'
+            request.user = AnonymousUser()
+            request.COOKIES = dict(cookies)
+            content = render_to_string(
+                '{}/{}.html'.format(PAGES_DIR, name),
+                request=request,
+            )
+            path = prebuilt_page_path(name, variant)
+            with open(path + '.tmp', 'wb') as page:
+                page.write(content.encode('utf-8'))
+            os.replace(path + '.tmp', path)
+    return pages
+
+
+def serve_prebuilt_page(request, name):
+    u"""Return response streaming prebuilt page or None if it isn't built.
+
+    Page variant is chosen by request cookies.
+
+    :param request: WSGIRequest instance
+    :param name: string Page name
+    """
+    try:
+        response = serve_file(
+            request,
+            prebuilt_page_path(name, page_variant(request)),
+            content_type='text/html; charset=utf-8',
+        )
+    except (IOError, OSError):
+        return None
+    patch_vary_headers(response, ('Cookie',))
+    return response
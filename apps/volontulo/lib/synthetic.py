@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: synthetic
+
+Generator of production-like data for benchmarks. It requires fake-factory
+from development requirements.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+from faker import Factory
+from PIL import Image
+
+from apps.volontulo.lib.images import encode_image
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import ORGANIZATIONS
+from apps.volontulo.lib.page_cache import SEARCH_INDEX
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.search import offer_index
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
+
+BATCH_SIZE = 500
+PASSWORD = 'volontulo'
+IMAGES_COUNT = 10
+# share of offers having main image:
+IMAGES_RATIO = 0.6
+# how many offers volunteers join, at most:
+MAX_JOINED_OFFERS = 3
+
+# (weight, offer_status, action_status, recruitment_status, status_old):
+OFFER_STATES = (
+    (25, 'published', 'ongoing', 'open', 'ACTIVE'),
+    (10, 'published', 'ongoing', 'supplemental', 'ACTIVE'),
+    (15, 'published', 'future', 'open', 'ACTIVE'),
+    (10, 'published', 'ongoing', 'closed', 'ACTIVE'),
+    (20, 'published', 'finished', 'closed', 'ACTIVE'),
+    (12, 'unpublished', 'future', 'open', 'NEW'),
+    (8, 'rejected', 'ongoing', 'open', 'SUSPENDED'),
+)
+
+
+def _weighted_choice(rand, choices):
+    u"""Return random element of choices, with weight as first item.
+
+    :param rand: random.Random instance
+    :param choices: list Tuples starting with Integer weight
+    """
+    point = rand.uniform(0, sum(choice[0] for choice in choices))
+    for choice in choices:
+        point -= choice[0]
+        if point <= 0:
+            return choice
+    return choices[-1]
+
+
+def _new_ids(model, previous_max_id):
+    u"""Return ids of objects created after the given id, in creation order.
+
+    bulk_create doesn't return ids on every database, so they are selected.
+
+    :param model: Model class
+    :param previous_max_id: Integer highest id before objects were created
+    """
+    return list(model.objects.filter(
+        id__gt=previous_max_id,
+    ).order_by('id').values_list('id', flat=True))
+
+
+def _max_id(model):
+    u"""Return highest id of model objects or 0.
+
+    :param model: Model class
+    """
+    return model.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+class DataGenerator(object):
+    u"""Generate organizations, offers and volunteers with bulk inserts."""
+
+    def __init__(self, seed=0, locale='pl_PL', batch_size=BATCH_SIZE):
+        u"""Initialize generator.
+
+        :param seed: Integer random seed, so data is repeatable
+        :param locale: string fake-factory locale
+        :param batch_size: Integer number of objects inserted at once
+        """
+        self.rand = random.Random(seed)
+        self.fake = Factory.create(locale)
+        self.fake.seed(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+
+    def generate(self, organizations, offers, volunteers):
+        u"""Generate all data in one transaction.
+
+        :param organizations: Integer number of organizations
+        :param offers: Integer number of offers
+        :param volunteers: Integer number of volunteers
+        :return: dict Number of created objects by kind
+        """
+        with transaction.atomic():
+            organization_ids = self.create_organizations(organizations)
+            if not organization_ids:
+                organization_ids = list(
+                    Organization.objects.values_list('id', flat=True)
+                )
+            profile_ids = self.create_users(
+                volunteers,
+                organization_ids,
+            )
+            offer_ids = self.create_offers(offers, organization_ids)
+            images = self.create_images(offer_ids, profile_ids)
+            joined = self.join_offers(profile_ids, offer_ids)
+        bump_versions(OFFERS, ORGANIZATIONS, SEARCH_INDEX)
+        offer_index.clear()
+        return {
+            'organizations': len(organization_ids) if organizations else 0,
+            'offers': len(offer_ids),
+            'volunteers': len(profile_ids),
+            'images': images,
+            'joined': joined,
+        }
+
+    def create_organizations(self, count):
+        u"""Create organizations and return their ids.
+
+        :param count: Integer number of organizations
+        """
+        previous_max_id = _max_id(Organization)
+        Organization.objects.bulk_create((
+            Organization(
+                name=self.fake.company()[:150],
+                address=u'{}, {}'.format(
+                    self.fake.street_address(),
+                    self.fake.city(),
+                )[:150],
+                description=self.fake.text(600),
+            ) for _ in range(count)
+        ), batch_size=self.batch_size)
+        return _new_ids(Organization, previous_max_id)
+
+    def create_users(self, count, organization_ids):
+        u"""Create volunteers and organizations members, return profile ids.
+
+        One user in twenty is member of an organization. All users have the
+        same password, PASSWORD.
+
+        :param count: Integer number of users
+        :param organization_ids: list Ids of organizations
+        """
+        password = make_password(PASSWORD)
+        offset = _max_id(User)
+        previous_max_id = offset
+        users = []
+        for i in range(count):
+            email = u'volunteer{}@example.com'.format(offset + i + 1)
+            users.append(User(
+                username=email,
+                email=email,
+                password=password,
+                first_name=self.fake.first_name()[:30],
+                last_name=self.fake.last_name()[:30],
+                date_joined=self.now - timedelta(
+                    days=self.rand.randint(0, 1000),
+                ),
+            ))
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        user_ids = _new_ids(User, previous_max_id)
+
+        previous_max_id = _max_id(UserProfile)
+        UserProfile.objects.bulk_create((
+            UserProfile(
+                user_id=user_id,
+                phone_no=self.fake.phone_number()[:32],
+            ) for user_id in user_ids
+        ), batch_size=self.batch_size)
+        profile_ids = _new_ids(UserProfile, previous_max_id)
+
+        membership = UserProfile.organizations.through
+        membership.objects.bulk_create((
+            membership(
+                userprofile_id=profile_id,
+                organization_id=self.rand.choice(organization_ids),
+            ) for profile_id in profile_ids
+            if organization_ids and self.rand.random() < 0.05
+        ), batch_size=self.batch_size)
+        return profile_ids
+
+    def _dates(self, action_status, recruitment_status):
+        u"""Return offer dates consistent with its statuses.
+
+        :param action_status: string Offer action status
+        :param recruitment_status: string Offer recruitment status
+        """
+        day = timedelta(days=1)
+        if action_status == 'future':
+            started_at = self.now + self.rand.randint(1, 90) * day
+        else:
+            started_at = self.now - self.rand.randint(1, 365) * day
+        if action_status == 'finished':
+            finished_at = self.now - self.rand.randint(1, 30) * day
+            started_at = min(started_at, finished_at - day)
+        elif self.rand.random() < 0.2:
+            finished_at = None
+        else:
+            finished_at = max(started_at, self.now) + \
+                self.rand.randint(1, 180) * day
+
+        if recruitment_status == 'open':
+            recruitment_end = self.now + self.rand.randint(1, 60) * day
+            reserve_end = recruitment_end + 30 * day
+        elif recruitment_status == 'supplemental':
+            recruitment_end = self.now - self.rand.randint(1, 30) * day
+            reserve_end = self.now + self.rand.randint(1, 30) * day
+        else:
+            recruitment_end = self.now - self.rand.randint(31, 60) * day
+            reserve_end = self.now - self.rand.randint(1, 30) * day
+        # recruitment started before action and before it ended:
+        recruitment_start = min(started_at, recruitment_end, self.now) - \
+            self.rand.randint(7, 60) * day
+        return {
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'action_start_date': started_at,
+            'action_end_date': finished_at,
+            'action_ongoing': finished_at is None,
+            'recruitment_start_date': recruitment_start,
+            'recruitment_end_date': recruitment_end,
+            'reserve_recruitment': True,
+            'reserve_recruitment_start_date': recruitment_end,
+            'reserve_recruitment_end_date': reserve_end,
+        }
+
+    def create_offers(self, count, organization_ids):
+        u"""Create offers with realistic statuses, return their ids.
+
+        :param count: Integer number of offers
+        :param organization_ids: list Ids of organizations
+        """
+        previous_max_id = _max_id(Offer)
+        offers = []
+        for _ in range(count):
+            _, offer_status, action_status, recruitment_status, old = \
+                _weighted_choice(self.rand, OFFER_STATES)
+            offers.append(Offer(
+                organization_id=self.rand.choice(organization_ids),
+                title=self.fake.sentence(nb_words=5)[:150],
+                description=self.fake.text(1000),
+                requirements=self.fake.text(200),
+                time_commitment=self.fake.sentence(),
+                benefits=self.fake.text(200),
+                location=self.fake.city()[:150],
+                time_period=u'',
+                offer_status=offer_status,
+                action_status=action_status,
+                recruitment_status=recruitment_status,
+                status_old=old,
+                volunteers_limit=self.rand.choice((0, 0, 5, 10, 20, 50)),
+                weight=self.rand.randint(0, 100),
+                **self._dates(action_status, recruitment_status)
+            ))
+            if len(offers) == self.batch_size:
+                Offer.objects.bulk_create(offers)
+                offers = []
+        Offer.objects.bulk_create(offers)
+        return _new_ids(Offer, previous_max_id)
+
+    def create_image_files(self):
+        u"""Save few generated images to media storage, return their names."""
+        names = []
+        for i in range(IMAGES_COUNT):
+            image = Image.new('RGB', (800, 600), (
+                self.rand.randint(0, 255),
+                self.rand.randint(0, 255),
+                self.rand.randint(0, 255),
+            ))
+            names.append(default_storage.save(
+                'offers/synthetic-{}.jpg'.format(i),
+                ContentFile(encode_image(image, 'synthetic.jpg')),
+            ))
+        return names
+
+    def create_images(self, offer_ids, profile_ids):
+        u"""Attach main images to part of offers, return number of images.
+
+        Image files are shared by many offers, so generating data is fast.
+
+        :param offer_ids: list Ids of offers
+        :param profile_ids: list Ids of profiles uploading images
+        """
+        if not offer_ids or not profile_ids:
+            return 0
+        names = self.create_image_files()
+        OfferImage.objects.bulk_create((
+            OfferImage(
+                offer_id=offer_id,
+                userprofile_id=self.rand.choice(profile_ids),
+                path=self.rand.choice(names),
+                is_main=True,
+            ) for offer_id in offer_ids
+            if self.rand.random() < IMAGES_RATIO
+        ), batch_size=self.batch_size)
+
+        # pylint: disable=protected-access
+        offer_table = connection.ops.quote_name(Offer._meta.db_table)
+        image_table = connection.ops.quote_name(OfferImage._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE {offer} SET main_image_id = ('
+                'SELECT MAX(id) FROM {image} '
+                'WHERE {image}.offer_id = {offer}.id AND {image}.is_main'
+                ') WHERE id >= %s AND id <= %s'.format(
+                    offer=offer_table,
+                    image=image_table,
+                ),
+                [offer_ids[0], offer_ids[-1]],
+            )
+        return OfferImage.objects.filter(
+            offer_id__range=(offer_ids[0], offer_ids[-1]),
+        ).count()
+
+    def join_offers(self, profile_ids, offer_ids):
+        u"""Make volunteers join random offers, return number of joins.
+
+        :param profile_ids: list Ids of volunteers profiles
+        :param offer_ids: list Ids of offers
+        """
+        if not offer_ids or not profile_ids:
+            return 0
+        user_ids = dict(UserProfile.objects.filter(
+            id__range=(profile_ids[0], profile_ids[-1]),
+        ).values_list('id', 'user_id'))
+        volunteers = Offer.volunteers.through
+        joins = set()
+        for profile_id in profile_ids:
+            for _ in range(self.rand.randint(0, MAX_JOINED_OFFERS)):
+                joins.add((self.rand.choice(offer_ids), user_ids[profile_id]))
+        volunteers.objects.bulk_create((
+            volunteers(offer_id=offer_id, user_id=user_id)
+            for offer_id, user_id in sorted(joins)
+        ), batch_size=self.batch_size)
+        return len(joins)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: templates
+"""
+import os
+
+from django.template import TemplateDoesNotExist
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'templates',
+)
+
+
+def list_templates(templates_dir=TEMPLATES_DIR):
+    u"""Return names of all templates in directory, sorted.
+
+    :param templates_dir: string Path of templates directory
+    """
+    names = []
+    for root, _, files in os.walk(templates_dir):
+        for filename in files:
+            names.append(os.path.relpath(
+                os.path.join(root, filename),
+                templates_dir,
+            ).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates(templates_dir=TEMPLATES_DIR):
+    u"""Load and compile all templates.
+
+    With cached template loader compiled templates are kept in memory, so
+    requests don't have to parse them again.
+
+    :param templates_dir: string Path of templates directory
+    :return: tuple List of loaded templates names and dict of errors
+    """
+    loaded = []
+    errors = {}
+    for name in list_templates(templates_dir):
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as ex:
+            errors[name] = ex
+        else:
+            loaded.append(name)
+    return loaded, errors
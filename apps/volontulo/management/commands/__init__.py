@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: __init__
+"""
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: benchmark_search
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.search import MAX_RESULTS
+from apps.volontulo.lib.search import OfferIndex
+
+WORDS = (
+    u'pomoc', u'wolontariusz', u'schronisko', u'zwierzęta', u'psy', u'koty',
+    u'dzieci', u'szkoła', u'biblioteka', u'książki', u'czytanie', u'seniorzy',
+    u'opieka', u'szpital', u'festiwal', u'koncert', u'sport', u'bieg',
+    u'maraton', u'sprzątanie', u'las', u'park', u'ogród', u'rośliny',
+    u'fundacja', u'stowarzyszenie', u'kraków', u'warszawa', u'wrocław',
+    u'gdańsk', u'łódź', u'poznań', u'angielski', u'matematyka', u'korepetycje',
+    u'kuchnia', u'posiłki', u'zbiórka', u'ubrania', u'jedzenie', u'transport',
+    u'kierowca', u'grafika', u'strona', u'programowanie', u'fotografia',
+    u'tłumaczenie', u'organizacja', u'wydarzenie', u'konferencja',
+)
+
+
+SYLLABLES = (
+    u'ba', u'ce', u'dzi', u'ka', u'lo', u'mi', u'no', u'pra', u'rze', u'sta',
+    u'szy', u'to', u'wie', u'za', u'ło', u'ść', u'gro', u'chy', u'ją', u'nie',
+)
+
+
+def _vocabulary(rand, size):
+    u"""Return common words and random made-up words.
+
+    :param rand: random.Random instance
+    :param size: Integer number of made-up words
+    """
+    return list(WORDS) + [
+        u''.join(rand.choice(SYLLABLES) for _ in range(rand.randint(2, 5)))
+        for _ in range(size)
+    ]
+
+
+def _text(rand, vocabulary, length):
+    u"""Return random text, common words being used more often.
+
+    :param rand: random.Random instance
+    :param vocabulary: list Words to choose from
+    :param length: Integer number of words
+    """
+    return u' '.join(
+        rand.choice(WORDS if rand.random() < 0.3 else vocabulary)
+        for _ in range(length)
+    )
+
+
+def _percentile(values, percent):
+    u"""Return percentile of sorted values.
+
+    :param values: list Sorted values
+    :param percent: Integer percentile
+    """
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+class Command(BaseCommand):
+    u"""Measure offers search index latency on synthetic offers."""
+    help = u"Measure offers search index latency on synthetic offers."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--offers',
+            type=int,
+            default=100000,
+            help=u"Number of indexed offers.",
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=1000,
+            help=u"Number of measured queries.",
+        )
+        parser.add_argument(
+            '--vocabulary',
+            type=int,
+            default=20000,
+            help=u"Number of made-up words, besides common ones.",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help=u"Random seed, so results are repeatable.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Build index and measure queries."""
+        rand = random.Random(options['seed'])
+        vocabulary = _vocabulary(rand, options['vocabulary'])
+        # index of made-up offers, not rebuilt from database:
+        index = OfferIndex(versions=())
+        index.is_built = True
+        started = time.time()
+        for offer_id in range(options['offers']):
+            index.add(offer_id, {
+                'title': _text(rand, vocabulary, 4),
+                'organization__name': _text(rand, vocabulary, 2),
+                'location': rand.choice(vocabulary),
+                'description': _text(rand, vocabulary, 40),
+                'requirements': _text(rand, vocabulary, 10),
+                'benefits': _text(rand, vocabulary, 10),
+            })
+        self.stdout.write(u"Indexed offers: {} in {:.1f}s".format(
+            options['offers'],
+            time.time() - started,
+        ))
+
+        latencies = []
+        results = 0
+        for _ in range(options['queries']):
+            words = rand.sample(vocabulary, rand.randint(1, 3))
+            # every other query uses prefixes only:
+            if rand.random() < 0.5:
+                words = [w[:max(3, len(w) // 2)] for w in words]
+            started = time.time()
+            results += len(index.search(u' '.join(words), MAX_RESULTS))
+            latencies.append((time.time() - started) * 1000)
+        latencies.sort()
+        self.stdout.write(
+            u"Queries: {}, average returned results: {:.0f}, latency ms: "
+            u"p50 {:.2f}, p95 {:.2f}, p99 {:.2f}, max {:.2f}".format(
+                options['queries'],
+                results / options['queries'],
+                _percentile(latencies, 50),
+                _percentile(latencies, 95),
+                _percentile(latencies, 99),
+                latencies[-1],
+            )
+        )
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: build_static_pages
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.static_pages import build_static_pages
+
+
+class Command(BaseCommand):
+    u"""Render static pages for anonymous users into STATIC_ROOT."""
+    help = u"Render static pages for anonymous users into STATIC_ROOT."
+
+    def handle(self, *args, **options):
+        u"""Build all static pages."""
+        pages = build_static_pages()
+        self.stdout.write(u"Built pages: {}".format(u", ".join(pages)))
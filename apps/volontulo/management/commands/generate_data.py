@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: generate_data
+"""
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.volontulo.lib.synthetic import DataGenerator
+from apps.volontulo.lib.synthetic import PASSWORD
+from apps.volontulo.models import Organization
+
+
+class Command(BaseCommand):
+    u"""Generate synthetic organizations, offers and volunteers."""
+    help = u"Generate synthetic organizations, offers and volunteers."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--organizations',
+            type=int,
+            default=100,
+            help=u"Number of organizations.",
+        )
+        parser.add_argument(
+            '--offers',
+            type=int,
+            default=1000,
+            help=u"Number of offers.",
+        )
+        parser.add_argument(
+            '--volunteers',
+            type=int,
+            default=1000,
+            help=u"Number of volunteers.",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help=u"Random seed, so data is repeatable.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Generate data."""
+        if options['offers'] and not options['organizations'] and \
+                not Organization.objects.exists():
+            raise CommandError(u"Offers require at least one organization.")
+        created = DataGenerator(options['seed']).generate(
+            options['organizations'],
+            options['offers'],
+            options['volunteers'],
+        )
+        self.stdout.write(u", ".join(
+            u"{}: {}".format(name, count)
+            for name, count in sorted(created.items())
+        ))
+        self.stdout.write(
+            u"Users can log in with password: {}".format(PASSWORD)
+        )
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: process_image_jobs
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.images import BATCH_SIZE
+from apps.volontulo.lib.images import enqueue_all_images
+from apps.volontulo.lib.images import process_image_jobs
+
+
+class Command(BaseCommand):
+    u"""Create resized variants of uploaded images."""
+    help = u"Create resized variants of uploaded images."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help=u"Number of worker processes, all cores by default.",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=u"Number of jobs fetched from queue at once.",
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            help=u"Queue all uploaded images to rebuild their variants.",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            help=u"Keep polling queue instead of exiting when it is empty.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help=u"Seconds between queue polls in loop mode.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Drain queue once or keep draining it in loop mode."""
+        if options['all']:
+            self.stdout.write(
+                u"Queued images: {}".format(enqueue_all_images())
+            )
+        executor = ProcessPoolExecutor(options['workers'])
+        try:
+            while True:
+                try:
+                    processed, failed = process_image_jobs(
+                        executor,
+                        options['batch_size'],
+                    )
+                except BrokenProcessPool:
+                    # unfinished jobs are marked as failed, pool is replaced:
+                    self.stderr.write(
+                        u"Worker process died, starting new workers."
+                    )
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(options['workers'])
+                    continue
+                if processed or failed or options['verbosity'] > 1:
+                    self.stdout.write(
+                        u"Processed images: {}, failed: {}".format(
+                            processed,
+                            failed,
+                        )
+                    )
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            executor.shutdown()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: run_benchmarks
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.volontulo.lib.benchmarks import compare
+from apps.volontulo.lib.benchmarks import run
+
+
+class Command(BaseCommand):
+    u"""Measure main views and offers queries at growing data scales."""
+    help = (
+        u"Measure main views and offers queries at growing data scales. "
+        u"Synthetic data is added to database, use development one only."
+    )
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--scales',
+            default='100,1000,10000',
+            help=u"Comma separated numbers of offers.",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help=u"Number of measured calls of each view or method.",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help=u"Random seed of generated data.",
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmarks.json',
+            help=u"File results are saved to, as JSON.",
+        )
+        parser.add_argument(
+            '--compare',
+            help=u"File with earlier results to compare with.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Run benchmarks and save results."""
+        if not settings.DEBUG:
+            raise CommandError(
+                u"Benchmarks add synthetic data, run them with development "
+                u"settings only."
+            )
+        try:
+            scales = sorted(
+                int(scale) for scale in options['scales'].split(',')
+            )
+        except ValueError:
+            raise CommandError(u"Scales must be numbers of offers.")
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as previous_file:
+                previous = json.load(previous_file)
+
+        results = run(
+            scales,
+            options['repeat'],
+            options['seed'],
+            log=self.stdout.write,
+        )
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        self.stdout.write(u"Results saved to {}".format(options['output']))
+
+        if previous is not None:
+            self.stdout.write(u"Median time change against {}:".format(
+                previous.get('commit') or options['compare'],
+            ))
+            for scale, name, before, after, ratio in compare(
+                    previous, results):
+                self.stdout.write(
+                    u"{:>7} offers {:<40} {:>9.2f} -> {:>9.2f} ms "
+                    u"({:+.0%})".format(scale, name, before, after, ratio - 1)
+                )
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: send_queued_emails
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.email import BATCH_SIZE
+from apps.volontulo.lib.email import send_queued_emails
+
+
+class Command(BaseCommand):
+    u"""Send emails waiting in outbox."""
+    help = u"Send emails waiting in outbox."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=u"Number of emails fetched from outbox at once.",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            default=False,
+            help=u"Keep polling outbox instead of exiting when it is empty.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help=u"Seconds between outbox polls in loop mode.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Drain outbox once or keep draining it in loop mode."""
+        while True:
+            sent, failed = send_queued_emails(options['batch_size'])
+            if sent or failed or options['verbosity'] > 1:
+                self.stdout.write(
+                    u"Sent emails: {}, failed: {}".format(sent, failed)
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
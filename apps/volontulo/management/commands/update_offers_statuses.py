@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: update_offers_statuses
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.models import Offer
+
+
+class Command(BaseCommand):
+    u"""Move offers to statuses following from their dates."""
+    help = u"Move offers to statuses following from their dates."
+
+    def handle(self, *args, **options):
+        u"""Apply all due status transitions."""
+        changed = Offer.objects.update_statuses()
+        if any(changed.values()) or options['verbosity'] > 1:
+            self.stdout.write(u", ".join(
+                u"{}: {}".format(name, count)
+                for name, count in sorted(changed.items())
+            ))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: view_metrics
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.volontulo.lib.metrics import BUCKETS
+from apps.volontulo.lib.metrics import collect
+from apps.volontulo.lib.metrics import summarize
+from apps.volontulo.lib.metrics import view_metrics
+
+
+class Command(BaseCommand):
+    u"""Show time and queries stats of views aggregated from all processes."""
+    help = u"Show time and queries stats of views (times in milliseconds)."
+
+    def add_arguments(self, parser):
+        u"""Add command arguments."""
+        parser.add_argument(
+            '--histogram',
+            action='store_true',
+            default=False,
+            help=u"Show histogram of requests time.",
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            default=False,
+            help=u"Remove collected stats.",
+        )
+
+    def handle(self, *args, **options):
+        u"""Print stats of views, slowest in total first."""
+        if options['reset']:
+            view_metrics.reset()
+            self.stdout.write(u"Stats removed.")
+            return
+
+        rows = summarize(collect())
+        if not rows:
+            self.stdout.write(u"No stats collected.")
+            return
+        name_width = max(len(row['name']) for row in rows)
+        self.stdout.write(
+            u"{:<{w}} {:>7} {:>8} {:>8} {:>8} {:>8} {:>7} {:>8} {:>8} {:>6}"
+            .format(
+                u"view", u"count", u"avg", u"p50", u"p95", u"max",
+                u"queries", u"db", u"template", u"over",
+                w=name_width,
+            )
+        )
+        for row in rows:
+            self.stdout.write(
+                u"{name:<{w}} {count:>7} {avg_time:>8.1f} {p50:>8.1f} "
+                u"{p95:>8.1f} {max_time:>8.1f} {avg_queries:>7.1f} "
+                u"{avg_db_time:>8.1f} {avg_template_time:>8.1f} "
+                u"{over_budget:>6}".format(w=name_width, **row)
+            )
+        if options['histogram']:
+            self.stdout.write(u"")
+            self.stdout.write(u"{:<{w}} {}".format(
+                u"view",
+                u" ".join(
+                    u"{:>6}".format(u"<={}".format(b)) for b in BUCKETS[:-1]
+                ) + u" {:>6}".format(u"more"),
+                w=name_width,
+            ))
+            for row in rows:
+                self.stdout.write(u"{:<{w}} {}".format(
+                    row['name'],
+                    u" ".join(u"{:>6}".format(c) for c in row['histogram']),
+                    w=name_width,
+                ))
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: warm_templates
+"""
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.volontulo.lib.templates import warm_templates
+
+
+class Command(BaseCommand):
+    u"""Compile all application templates to find errors before deploy."""
+    help = u"Compile all application templates to find errors before deploy."
+
+    def handle(self, *args, **options):
+        u"""Compile templates and report broken ones."""
+        loaded, errors = warm_templates()
+        for name, error in sorted(errors.items()):
+            self.stderr.write(u"{}: {}".format(name, error))
+        if errors:
+            raise CommandError(
+                u"Broken templates: {}".format(len(errors))
+            )
+        self.stdout.write(u"Compiled templates: {}".format(len(loaded)))
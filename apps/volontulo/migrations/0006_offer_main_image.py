@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+def populate_main_image(apps, schema_editor):
+    Offer = apps.get_model('volontulo', 'Offer')
+    OfferImage = apps.get_model('volontulo', 'OfferImage')
+    for offer in Offer.objects.all():
+        images = OfferImage.objects.filter(offer=offer).order_by('-is_main', 'id')
+        main_image = images.first()
+        if main_image is not None:
+            offer.main_image = main_image
+            offer.save(update_fields=['main_image'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0005_removing_badges'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='main_image',
+            field=models.ForeignKey(blank=True, null=True, related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='volontulo.OfferImage'),
+        ),
+        migrations.RunPython(populate_main_image, migrations.RunPython.noop),
+    ]
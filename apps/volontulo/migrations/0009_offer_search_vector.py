@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# search_vector column is maintained by triggers and used only in raw SQL
+# (see apps.volontulo.lib.search), so it is not part of Offer model.
+CREATE_SQL = [
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'volontulo') THEN
+            IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'polish') THEN
+                CREATE TEXT SEARCH CONFIGURATION volontulo (COPY = polish);
+            ELSE
+                CREATE TEXT SEARCH CONFIGURATION volontulo (COPY = simple);
+            END IF;
+        END IF;
+    END $$;
+    """,
+    "ALTER TABLE volontulo_offer ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION volontulo_offer_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('volontulo', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('volontulo', coalesce((
+                SELECT name FROM volontulo_organization
+                WHERE id = NEW.organization_id
+            ), '')), 'A') ||
+            setweight(to_tsvector('volontulo', coalesce(NEW.location, '')), 'B') ||
+            setweight(to_tsvector('volontulo', coalesce(NEW.description, '')), 'C') ||
+            setweight(to_tsvector('volontulo', coalesce(NEW.requirements, '')), 'D') ||
+            setweight(to_tsvector('volontulo', coalesce(NEW.benefits, '')), 'D');
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER volontulo_offer_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF
+        title, location, description, requirements, benefits, organization_id
+    ON volontulo_offer
+    FOR EACH ROW EXECUTE PROCEDURE volontulo_offer_search_vector_update()
+    """,
+    """
+    CREATE FUNCTION volontulo_organization_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE volontulo_offer SET title = title
+        WHERE organization_id = NEW.id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER volontulo_organization_search_vector_trigger
+    AFTER UPDATE OF name ON volontulo_organization
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE volontulo_organization_search_vector_update()
+    """,
+    "UPDATE volontulo_offer SET title = title",
+    """
+    CREATE INDEX volontulo_offer_search_vector_idx
+    ON volontulo_offer USING gin(search_vector)
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER volontulo_organization_search_vector_trigger ON volontulo_organization",
+    "DROP FUNCTION volontulo_organization_search_vector_update()",
+    "DROP TRIGGER volontulo_offer_search_vector_trigger ON volontulo_offer",
+    "DROP FUNCTION volontulo_offer_search_vector_update()",
+    "ALTER TABLE volontulo_offer DROP COLUMN search_vector",
+    "DROP TEXT SEARCH CONFIGURATION volontulo",
+]
+
+
+def _execute_on_postgresql(statements):
+    def execute(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return execute
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0008_imagejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _execute_on_postgresql(CREATE_SQL),
+            _execute_on_postgresql(DROP_SQL),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0009_offer_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='organization',
+            index_together=set([('name', 'id')]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def remove_null_weights(apps, schema_editor):
+    Offer = apps.get_model('volontulo', 'Offer')
+    Offer.objects.filter(weight__isnull=True).update(weight=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0010_organization_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_null_weights, migrations.RunPython.noop),
+    ]
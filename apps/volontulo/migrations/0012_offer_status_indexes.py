@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# partial indexes matching exactly OffersManager.get_active and get_archived
+# predicates, ordered like offers lists (see OffersList and OffersArchived).
+# They are created only on PostgreSQL - SQLite can't match them with bound
+# parameters and would drop them whenever table is rebuilt.
+PARTIAL_INDEXES = {
+    'volontulo_offer_active_idx': (
+        "offer_status = 'published' AND "
+        "action_status IN ('ongoing', 'future') AND "
+        "recruitment_status IN ('open', 'supplemental')"
+    ),
+    'volontulo_offer_archived_idx': (
+        "offer_status = 'published' AND "
+        "action_status IN ('ongoing', 'finished') AND "
+        "recruitment_status = 'closed'"
+    ),
+}
+
+
+def create_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, predicate in sorted(PARTIAL_INDEXES.items()):
+        schema_editor.execute(
+            "CREATE INDEX {} ON volontulo_offer (weight, id) WHERE {}".format(
+                name,
+                predicate,
+            )
+        )
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in sorted(PARTIAL_INDEXES):
+        schema_editor.execute("DROP INDEX {}".format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0011_offer_remove_null_weights'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='offer',
+            name='weight',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterIndexTogether(
+            name='offer',
+            index_together=set([('offer_status', 'weight', 'id')]),
+        ),
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
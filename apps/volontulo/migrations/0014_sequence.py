@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Min
+
+
+def create_offer_weights(apps, schema_editor):
+    # sequence continues below weights of already published offers:
+    Offer = apps.get_model('volontulo', 'Offer')
+    Sequence = apps.get_model('volontulo', 'Sequence')
+    lowest_weight = Offer.objects.filter(
+        offer_status='published',
+    ).aggregate(Min('weight'))['weight__min']
+    Sequence.objects.create(
+        name='offer_weights',
+        value=min(lowest_weight or 0, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0013_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            create_offer_weights,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0014_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offerimage',
+            name='variants',
+            field=models.CharField(max_length=255, blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='organizationgallery',
+            name='variants',
+            field=models.CharField(max_length=255, blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='usergallery',
+            name='variants',
+            field=models.CharField(max_length=255, blank=True, default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unicodedata
+from importlib import import_module
+
+from django.db import migrations
+
+SEARCH_VECTOR = import_module(
+    'apps.volontulo.migrations.0009_offer_search_vector'
+)
+
+
+def _fold(char):
+    # the same as apps.volontulo.lib.search.fold_word, frozen here:
+    char = char.lower().replace('ł', 'l')
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', char)
+        if not unicodedata.combining(c)
+    )
+
+
+# letters with diacritics of Latin-1 Supplement and Latin Extended-A blocks
+# (including Polish ones) and their folded ASCII letters; uppercase letters
+# are mapped too, as lower() of PostgreSQL depends on database locale:
+FOLDED = [
+    (char, _fold(char))
+    for char in (chr(code) for code in range(0xc0, 0x180))
+    if len(_fold(char)) == 1 and ord(_fold(char)) < 128
+]
+FOLD_FROM = ''.join(char for char, _ in FOLDED)
+FOLD_TO = ''.join(folded for _, folded in FOLDED)
+
+# Offers are indexed lowercase and without diacritics, with "simple"
+# configuration, and queries are normalized and stemmed the same way in
+# Python (see apps.volontulo.lib.search), so PostgreSQL search matches the
+# in-memory fallback, whether "polish" configuration is installed or not.
+UPDATE_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION volontulo_offer_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('volontulo', volontulo_fold(NEW.title)), 'A') ||
+            setweight(to_tsvector('volontulo', volontulo_fold((
+                SELECT name FROM volontulo_organization
+                WHERE id = NEW.organization_id
+            ))), 'A') ||
+            setweight(to_tsvector('volontulo', volontulo_fold(NEW.location)), 'B') ||
+            setweight(to_tsvector('volontulo', volontulo_fold(NEW.description)), 'C') ||
+            setweight(to_tsvector('volontulo', volontulo_fold(NEW.requirements)), 'D') ||
+            setweight(to_tsvector('volontulo', volontulo_fold(NEW.benefits)), 'D');
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql
+"""
+
+CREATE_SQL = [
+    """
+    CREATE FUNCTION volontulo_fold(text) RETURNS text AS $$
+        SELECT translate(lower(coalesce($1, '')), '{}', '{}')
+    $$ LANGUAGE sql IMMUTABLE
+    """.format(FOLD_FROM, FOLD_TO),
+    "DROP TEXT SEARCH CONFIGURATION volontulo",
+    "CREATE TEXT SEARCH CONFIGURATION volontulo (COPY = simple)",
+    UPDATE_FUNCTION_SQL,
+    "UPDATE volontulo_offer SET title = title",
+]
+
+DROP_SQL = [
+    [
+        statement for statement in SEARCH_VECTOR.CREATE_SQL
+        if 'CREATE FUNCTION volontulo_offer_search_vector_update' in statement
+    ][0].replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION'),
+    "DROP FUNCTION volontulo_fold(text)",
+    # configuration of 0009, copy of "polish" one if it is installed:
+    "DROP TEXT SEARCH CONFIGURATION volontulo",
+    SEARCH_VECTOR.CREATE_SQL[0],
+    "UPDATE volontulo_offer SET title = title",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volontulo', '0015_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            SEARCH_VECTOR._execute_on_postgresql(CREATE_SQL),
+            SEARCH_VECTOR._execute_on_postgresql(DROP_SQL),
+        ),
+    ]
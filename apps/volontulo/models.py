@@ -7,31 +7,106 @@ u"""
 import logging
 import os
 import uuid
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
+from django.db import transaction
+from django.db.models import Case
 from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import SEARCH_INDEX
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.page_cache import offer_key
 
 # pylint: disable=invalid-name
 logger = logging.getLogger('volontulo.models')
 
 
+def save_with_new_revision(instance, save, *args, **kwargs):
+    u"""Save instance incrementing its revision.
+
+    Revision is part of cache keys of fragments rendered from instance (see
+    offer_card template tag), so they are rendered again after each save.
+    Saved row is incremented in database, so concurrent saves never end up
+    with the same revision, and the new value is read back into instance.
+
+    :param instance: Model instance with revision field
+    :param save: function Save method of model superclass
+    """
+    if instance._state.adding:  # pylint: disable=protected-access
+        instance.revision += 1
+        return save(*args, **kwargs)
+
+    revision = instance.revision
+    instance.revision = F('revision') + 1
+    if kwargs.get('update_fields') is not None:
+        kwargs['update_fields'] = set(kwargs['update_fields']) | {'revision'}
+    try:
+        result = save(*args, **kwargs)
+    except Exception:
+        instance.revision = revision
+        raise
+    instance.refresh_from_db(fields=['revision'])
+    return result
+
+
 class Organization(models.Model):
     u"""Model that handles ogranizations/institutions."""
     name = models.CharField(max_length=150)
     address = models.CharField(max_length=150)
     description = models.TextField()
+    revision = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        u"""Organizations are listed by name, see organizations_list view."""
+        index_together = [('name', 'id')]
 
     def __str__(self):
         u"""Organization model string reprezentation."""
         return self.name
 
+    def save(self, *args, **kwargs):
+        u"""Save organization with new revision."""
+        return save_with_new_revision(
+            self,
+            super(Organization, self).save,
+            *args,
+            **kwargs
+        )
+
+
+class OffersQuerySet(models.QuerySet):
+    u"""Offers QuerySet."""
+
+    def as_cards(self):
+        u"""Return offers with relations required to render offer cards."""
+        return self.select_related('organization', 'main_image')
+
 
 class OffersManager(models.Manager):
     u"""Offers Manager."""
 
+    def get_queryset(self):
+        u"""Return offers QuerySet."""
+        return OffersQuerySet(self.model, using=self._db)
+
+    def get_cards(self):
+        u"""Return all offers ready to be rendered as offer cards.
+
+        Organization and main image are joined, so listing any number of
+        offers costs a constant number of queries.
+        """
+        return self.get_queryset().as_cards()
+
     def get_active(self):
         u"""Return active offers."""
         return self.filter(
@@ -61,6 +136,103 @@ class OffersManager(models.Manager):
             recruitment_status='closed',
         ).all()
 
+    def update_weights(self, weights):
+        u"""Update weights of many offers in one statement.
+
+        Offers that don't exist or already have given weight are skipped.
+        Weights sequence is lowered below the lowest given weight, so offers
+        published later are still shown first.
+
+        :param weights: dict Offer id to its new weight mapping
+        :return: Integer number of changed offers
+        """
+        with transaction.atomic():
+            changed = [
+                id_ for id_, weight in self.select_for_update().filter(
+                    id__in=weights.keys()
+                ).values_list('id', 'weight')
+                if weight != weights[id_]
+            ]
+            if not changed:
+                return 0
+            count = self.filter(id__in=changed).update(weight=Case(
+                *[When(id=id_, then=Value(weights[id_])) for id_ in changed],
+                output_field=IntegerField()
+            ))
+            Sequence.objects.lower(
+                Sequence.OFFER_WEIGHTS,
+                min(weights[id_] for id_ in changed),
+            )
+        bump_versions(OFFERS, SEARCH_INDEX)
+        return count
+
+    def update_statuses(self, now=None):
+        u"""Move offers which dates passed to their next statuses.
+
+        Every transition is a single UPDATE of all due offers, so it is cheap
+        to run it often, e.g. every minute. Ids of due offers are selected
+        beforehand only to invalidate cached pages showing them.
+
+        :param now: datetime Moment to compare dates with, now by default
+        :return: dict Number of offers changed by each transition
+        """
+        now = now or timezone.now()
+        not_finished = Q(finished_at__isnull=True) | Q(finished_at__gt=now)
+        recruitment_pending = Q(recruitment_start_date__gt=now)
+        recruitment_ended = Q(recruitment_end_date__lte=now)
+        # reserve recruitment is flagged by default, so it counts only with
+        # end date set, otherwise offer would never close its recruitment:
+        reserve_ongoing = Q(
+            reserve_recruitment=True,
+            reserve_recruitment_end_date__gt=now,
+        ) & (
+            Q(reserve_recruitment_start_date__isnull=True) |
+            Q(reserve_recruitment_start_date__lte=now)
+        )
+        transitions = (
+            ('finished', Q(
+                action_status__in=('future', 'ongoing'),
+                finished_at__lte=now,
+            ), {'action_status': 'finished'}),
+            ('ongoing', Q(
+                action_status='future',
+                started_at__lte=now,
+            ) & not_finished, {'action_status': 'ongoing'}),
+            ('open', Q(
+                recruitment_status='closed',
+                action_status__in=('future', 'ongoing'),
+                recruitment_start_date__lte=now,
+            ) & ~recruitment_ended, {'recruitment_status': 'open'}),
+            ('supplemental', Q(
+                recruitment_status__in=('open', 'closed'),
+                action_status__in=('future', 'ongoing'),
+            ) & recruitment_ended & reserve_ongoing, {
+                'recruitment_status': 'supplemental',
+            }),
+            ('closed', Q(
+                recruitment_status__in=('open', 'supplemental'),
+            ) & (
+                Q(action_status='finished') |
+                recruitment_pending |
+                recruitment_ended & ~reserve_ongoing
+            ), {'recruitment_status': 'closed'}),
+        )
+        changed = {}
+        changed_ids = set()
+        with transaction.atomic():
+            for name, condition, values in transitions:
+                changed_ids.update(self.select_for_update().filter(
+                    condition
+                ).values_list('id', flat=True))
+                changed[name] = self.filter(condition).update(**values)
+        if changed_ids:
+            bump_versions(
+                OFFERS,
+                SEARCH_INDEX,
+                *[offer_key(id_) for id_ in changed_ids]
+            )
+        return changed
+
 
 class Offer(models.Model):
     u"""Offer model."""
@@ -131,12 +303,37 @@ class Offer(models.Model):
     action_start_date = models.DateTimeField(blank=True, null=True)
     action_end_date = models.DateTimeField(blank=True, null=True)
     volunteers_limit = models.IntegerField(default=0, null=True, blank=True)
-    weight = models.IntegerField(default=0, null=True, blank=True)
+    weight = models.IntegerField(default=0)
+    revision = models.IntegerField(default=0, editable=False)
+    main_image = models.ForeignKey(
+        'OfferImage',
+        related_name='+',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+
+    class Meta:
+        u"""Offers are filtered by status and listed by weight.
+
+        Partial indexes of active and archived offers are created by
+        0012_offer_status_indexes migration.
+        """
+        index_together = [('offer_status', 'weight', 'id')]
 
     def __str__(self):
         u"""Offer string representation."""
         return self.title
 
+    def save(self, *args, **kwargs):
+        u"""Save offer with new revision."""
+        return save_with_new_revision(
+            self,
+            super(Offer, self).save,
+            *args,
+            **kwargs
+        )
+
     def set_main_image(self, is_main):
         u"""Set main image flag unsetting other offers images.
 
@@ -158,6 +355,10 @@ class Offer(models.Model):
         gallery.userprofile = userprofile
         gallery.is_main = self.set_main_image(is_main)
         gallery.save()
+        # main image pointer falls back to the first uploaded image:
+        if gallery.is_main or self.main_image_id is None:
+            self.main_image = gallery
+            self.save(update_fields=['main_image'])
         return self
 
     def create_new(self):
@@ -203,11 +404,19 @@ class Offer(models.Model):
         return self
 
     def publish(self):
-        u"""Publish offer."""
-        self.offer_status = 'published'
-        Offer.objects.all().update(weight=F('weight') + 1)
-        self.weight = 0
-        self.save()
+        u"""Publish offer.
+
+        Newly published offer takes next, lower value of OFFER_WEIGHTS
+        sequence, so it is shown first without rewriting weights of remaining
+        offers. Concurrent publications get distinct weights.
+        """
+        with transaction.atomic():
+            self.offer_status = 'published'
+            self.weight = Sequence.objects.next_value(
+                Sequence.OFFER_WEIGHTS,
+                step=-1,
+            )
+            self.save()
         return self
 
     def reject(self):
@@ -254,8 +463,28 @@ class UserProfile(models.Model):
         u"""Checks if the user can edit an offer based on its ID"""
         if offer is None:
             offer = Offer.objects.get(id=offer_id)
-        return self.is_administrator or self.organizations.filter(
-            id=offer.organization_id).exists()
+        return self.can_edit_organization(offer.organization_id)
+
+    @cached_property
+    def organization_ids(self):
+        u"""Ids of organizations user is member of.
+
+        They are selected once per profile instance, and logged user profile
+        is loaded once per request (see UserProfileBackend), so permissions
+        are checked without queries for each offer on page. Set is reset by
+        signal when organizations of profile are changed.
+        """
+        return frozenset(self.organizations.values_list('id', flat=True))
+
+    def can_edit_organization(self, organization_id):
+        u"""Checks if the user can edit organization and its offers.
+
+        :param organization_id: Integer organization id
+        """
+        return (
+            self.is_administrator or
+            organization_id in self.organization_ids
+        )
 
     def get_avatar(self):
         u"""Return avatar for current user."""
@@ -284,6 +513,13 @@ class UserGallery(models.Model):
     userprofile = models.ForeignKey(UserProfile, related_name='images')
     image = models.ImageField(upload_to='profile/')
     is_avatar = models.BooleanField(default=False)
+    # comma separated variants created by process_image_jobs:
+    variants = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+    )
 
     def __str__(self):
         u"""String representation of an image."""
@@ -297,6 +533,13 @@ class OfferImage(models.Model):
     path = models.ImageField(upload_to='offers/')
     is_main = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # comma separated variants created by process_image_jobs:
+    variants = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+    )
 
     def __str__(self):
         u"""String representation of an image."""
@@ -309,6 +552,13 @@ class OrganizationGallery(models.Model):
     published_by = models.ForeignKey(UserProfile, related_name='gallery')
     path = models.ImageField(upload_to='gallery/')
     is_main = models.BooleanField(default=False, blank=True)
+    # comma separated variants created by process_image_jobs:
+    variants = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+    )
 
     def __str__(self):
         u"""String representation of an image."""
@@ -340,3 +590,154 @@ class OrganizationGallery(models.Model):
             userprofiles=userprofile
         ).all()
         return {o.name: o.images.all() for o in organizations}
+
+
+class OutgoingEmailManager(models.Manager):
+    u"""Outgoing emails Manager."""
+
+    def get_pending(self, max_attempts):
+        u"""Return emails waiting to be sent, oldest first.
+
+        :param max_attempts: Integer number of attempts after which email is
+            not retried anymore
+        """
+        return self.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            send_after__lte=timezone.now(),
+        ).order_by('id')
+
+
+class OutgoingEmail(models.Model):
+    u"""Email queued for sending by send_queued_emails command."""
+    objects = OutgoingEmailManager()
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    recipients = models.TextField()
+    bcc = models.TextField(blank=True, default='')
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        u"""String representation of an email."""
+        return self.subject
+
+    def claim(self, timeout):
+        u"""Reserve email for this sender, return False if other one did.
+
+        Email is postponed in single conditional UPDATE, so concurrent
+        senders can't both claim it, and email claimed by sender which
+        crashed is retried after timeout.
+
+        :param timeout: Integer number of seconds email is reserved for
+        """
+        return bool(OutgoingEmail.objects.filter(
+            id=self.id,
+            sent_at__isnull=True,
+            send_after=self.send_after,
+        ).update(send_after=timezone.now() + timedelta(seconds=timeout)))
+
+    def mark_sent(self):
+        u"""Mark email as sent."""
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save()
+        return self
+
+    def mark_failed(self, error, retry_delay):
+        u"""Record failed attempt and postpone next one.
+
+        :param error: Exception raised while sending email
+        :param retry_delay: Integer base delay (seconds) between attempts,
+            doubled with every failed attempt
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+        self.send_after = timezone.now() + timedelta(
+            seconds=retry_delay * 2 ** (self.attempts - 1)
+        )
+        self.save()
+        return self
+
+
+class ImageJobManager(models.Manager):
+    u"""Image jobs Manager."""
+
+    def get_pending(self):
+        u"""Return jobs waiting to be processed, oldest first."""
+        return self.filter(processed_at__isnull=True).order_by('id')
+
+
+class ImageJob(models.Model):
+    u"""Uploaded image queued for process_image_jobs command."""
+    objects = ImageJobManager()
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        u"""String representation of an image job."""
+        return self.name
+
+    def mark_processed(self, error=None):
+        u"""Mark job as processed.
+
+        Failed jobs are not retried, as broken image stays broken.
+
+        :param error: Exception raised while processing image, if any
+        """
+        self.processed_at = timezone.now()
+        self.last_error = str(error) if error else ''
+        self.save()
+        return self
+
+
+class SequenceManager(models.Manager):
+    u"""Sequences Manager."""
+
+    def next_value(self, name, step=1):
+        u"""Change value of sequence by step and return it.
+
+        Row of sequence stays locked by UPDATE until end of transaction, so
+        concurrent callers get distinct values on every database.
+
+        :param name: string Name of sequence, created with value 0 if missing
+        :param step: Integer change of value
+        """
+        with transaction.atomic():
+            if not self.filter(name=name).update(value=F('value') + step):
+                self.get_or_create(name=name)
+                self.filter(name=name).update(value=F('value') + step)
+            return self.filter(name=name).values_list(
+                'value', flat=True
+            ).get()
+
+    def lower(self, name, value):
+        u"""Set value of sequence to given one, if it is higher.
+
+        :param name: string Name of sequence, created with value if missing
+        :param value: Integer new value
+        """
+        with transaction.atomic():
+            self.get_or_create(name=name, defaults={'value': value})
+            self.filter(name=name, value__gt=value).update(value=value)
+
+
+class Sequence(models.Model):
+    u"""Named counter shared by all processes, like database sequence."""
+    OFFER_WEIGHTS = 'offer_weights'
+
+    objects = SequenceManager()
+    name = models.CharField(max_length=32, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        u"""String representation of a sequence."""
+        return self.name
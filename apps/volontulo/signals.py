@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: signals
+"""
+
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models import F
+from django.dispatch import receiver
+
+from apps.volontulo.lib.images import delete_variants
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import ORGANIZATIONS
+from apps.volontulo.lib.page_cache import bump_pending_versions
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.page_cache import offer_key
+from apps.volontulo.lib.page_cache import organization_key
+from apps.volontulo.lib.search import offer_index
+from apps.volontulo.models import ImageJob
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserGallery
+from apps.volontulo.models import UserProfile
+from apps.volontulo.utils import invalidate_administrators_emails
+
+
+# pylint: disable=unused-argument
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    u"""Invalidate administrators emails if superuser changed."""
+    invalidate_administrators_emails(instance.id, instance.is_superuser)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def userprofile_changed(sender, instance, **kwargs):
+    u"""Invalidate administrators emails if administrator changed."""
+    invalidate_administrators_emails(
+        instance.user_id,
+        instance.is_administrator,
+    )
+
+
+@receiver(m2m_changed, sender=UserProfile.organizations.through)
+def userprofile_organizations_changed(sender, instance, **kwargs):
+    u"""Reset memoized organizations of changed profile."""
+    if isinstance(instance, UserProfile):
+        instance.__dict__.pop('organization_ids', None)
+
+
+@receiver(post_save, sender=OfferImage)
+@receiver(post_save, sender=OrganizationGallery)
+def gallery_image_saved(sender, instance, created, **kwargs):
+    u"""Queue creating resized variants of uploaded gallery image."""
+    if created and instance.path:
+        ImageJob.objects.create(name=instance.path.name)
+
+
+@receiver(post_delete, sender=OfferImage)
+@receiver(post_delete, sender=OrganizationGallery)
+def gallery_image_deleted(sender, instance, **kwargs):
+    u"""Delete resized variants of removed gallery image."""
+    if instance.path:
+        delete_variants(instance.path.name)
+
+
+@receiver(post_delete, sender=OfferImage)
+def offer_image_deleted(sender, instance, **kwargs):
+    u"""Create new revision of offer, whose main image may be removed.
+
+    Main image pointer is set to NULL by database cascade, without saving
+    offer, so its cached card would still show removed image. Pointer falls
+    back to the next image, chosen like by 0006_offer_main_image migration.
+    """
+    offers = Offer.objects.filter(id=instance.offer_id)
+    offers.update(revision=F('revision') + 1)
+    next_image = OfferImage.objects.filter(
+        offer_id=instance.offer_id,
+    ).order_by('-is_main', 'id').first()
+    if next_image is not None:
+        offers.filter(main_image__isnull=True).update(main_image=next_image)
+
+
+@receiver(post_save, sender=UserGallery)
+def user_image_saved(sender, instance, created, **kwargs):
+    u"""Queue creating resized variants of uploaded user image."""
+    if created and instance.image:
+        ImageJob.objects.create(name=instance.image.name)
+
+
+@receiver(post_delete, sender=UserGallery)
+def user_image_deleted(sender, instance, **kwargs):
+    u"""Delete resized variants of removed user image."""
+    if instance.image:
+        delete_variants(instance.image.name)
+
+
+@receiver(post_save, sender=Offer)
+def offer_saved(sender, instance, **kwargs):
+    u"""Update offer in search index."""
+    offer_index.refresh([instance.id])
+    offer_index.notify_changed()
+
+
+@receiver(post_delete, sender=Offer)
+def offer_deleted(sender, instance, **kwargs):
+    u"""Remove offer from search index."""
+    offer_index.remove(instance.id)
+    offer_index.notify_changed()
+
+
+@receiver(post_save, sender=Organization)
+def organization_saved(sender, instance, created, **kwargs):
+    u"""Update offers of renamed organization in search index."""
+    if created:
+        return
+    if offer_index.is_built:
+        offer_index.refresh(
+            list(instance.offer_set.values_list('id', flat=True))
+        )
+    offer_index.notify_changed()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def offer_changed(sender, instance, **kwargs):
+    u"""Invalidate cached pages showing offer."""
+    bump_versions(offer_key(instance.id), OFFERS)
+
+
+@receiver(post_save, sender=OfferImage)
+@receiver(post_delete, sender=OfferImage)
+def offer_image_changed(sender, instance, **kwargs):
+    u"""Invalidate cached pages showing offer image."""
+    bump_versions(offer_key(instance.offer_id), OFFERS)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def organization_changed(sender, instance, **kwargs):
+    u"""Invalidate cached pages showing organization."""
+    bump_versions(organization_key(instance.id), ORGANIZATIONS)
+
+
+@receiver(post_save, sender=OrganizationGallery)
+@receiver(post_delete, sender=OrganizationGallery)
+def organization_image_changed(sender, instance, **kwargs):
+    u"""Invalidate cached pages showing organization image."""
+    bump_versions(organization_key(instance.organization_id))
+
+
+@receiver(request_finished)
+def request_done(sender, **kwargs):
+    u"""Invalidate caches and search index changed inside transactions."""
+    bump_pending_versions()
+    offer_index.notify_pending()
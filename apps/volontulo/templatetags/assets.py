@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: assets
+"""
+
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html_join
+
+from apps.volontulo.lib.assets import BUNDLES
+
+
+register = template.Library()  # pylint: disable=invalid-name
+
+
+@register.simple_tag
+def javascript_bundle(name):
+    u"""Render script tags loading JavaScript bundle.
+
+    Bundles are built by collectstatic with AssetsStorage, until then (e.g.
+    in development) bundled files are loaded one by one.
+
+    :param name: string Bundle name, one of BUNDLES keys
+    """
+    if name in getattr(staticfiles_storage, 'hashed_files', {}):
+        names = (name,)
+    else:
+        names = BUNDLES[name]
+    return format_html_join(
+        u'\n',
+        u'<script src="{}"></script>',
+        ((staticfiles_storage.url(source),) for source in names),
+    )
@@ -5,9 +5,16 @@ u"""
 """
 
 from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 
 register = template.Library()  # pylint: disable=invalid-name
 
+# cards are keyed by revisions, which change also when thumbnails are created
+# by process_image_jobs, so timeout only frees cache of outdated cards:
+OFFER_CARD_CACHE_TIMEOUT = 60 * 60
+
 
 @register.filter(name='can_edit_offer')
 def can_edit_offer(userprofile, offer):
@@ -15,3 +22,29 @@ def can_edit_offer(userprofile, offer):
     if userprofile is None:
         return False
     return userprofile.can_edit_offer(offer=offer)
+
+
+@register.simple_tag(name='offer_card')
+def offer_card(offer, layout):
+    u"""Render offer card, cached until offer or its organization changes.
+
+    Card is rendered from offers/cards/<layout>.html template, which has to
+    depend only on offer and its organization, not on current user.
+
+    :param offer: Offer model instance with organization and main image
+    :param layout: string Card template name
+    """
+    key = 'volontulo:offer_card:{}:{}:{}:{}'.format(
+        layout,
+        offer.id,
+        offer.revision,
+        offer.organization.revision,
+    )
+    card = cache.get(key)
+    if card is None:
+        card = render_to_string(
+            'offers/cards/{}.html'.format(layout),
+            {'offer': offer},
+        )
+        cache.set(key, card, OFFER_CARD_CACHE_TIMEOUT)
+    return mark_safe(card)
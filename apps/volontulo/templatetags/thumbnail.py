@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: thumbnail
+"""
+
+from django import template
+from django.core.files.storage import default_storage
+
+from apps.volontulo.lib.images import get_variant
+
+
+register = template.Library()  # pylint: disable=invalid-name
+
+
+@register.filter(name='thumbnail')
+def thumbnail(image, variant):
+    u"""Get URL of resized image variant.
+
+    :param image: image model, ImageFieldFile or string Original image path
+    :param variant: string Variant name, one of VARIANTS keys
+    """
+    if not image:
+        return ''
+    # image model, directly or as instance of its file field:
+    row = getattr(image, 'instance', image)
+    return default_storage.url(get_variant(
+        str(image),
+        variant,
+        getattr(row, 'variants', ''),
+    ))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_contact_form
+"""
+import sys
+from importlib import import_module
+
+from django.core.cache import cache
+from django.test import TestCase
+
+import apps.volontulo
+from apps.volontulo import forms
+from apps.volontulo.tests import common
+
+
+class TestAdministratorContactForm(TestCase):
+    u"""Tests for contact with administrator form."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+
+    def test__import_does_not_query_database(self):
+        u"""Importing forms module doesn't run any query."""
+        del sys.modules['apps.volontulo.forms']
+        try:
+            with self.assertNumQueries(0):
+                import_module('apps.volontulo.forms')
+        finally:
+            sys.modules['apps.volontulo.forms'] = forms
+            apps.volontulo.forms = forms
+
+    def test__administrators_choices(self):
+        u"""Administrators choices are computed for every form instance."""
+        self.assertEqual(
+            list(forms.AdministratorContactForm().administrator.choices),
+            [],
+        )
+        admin = common.initialize_administrator()
+        self.assertEqual(
+            list(forms.AdministratorContactForm().administrator.choices),
+            [(str(admin.id), u'admin_user@example.com')],
+        )
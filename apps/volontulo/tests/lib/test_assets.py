@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_assets
+"""
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context
+from django.template import Template
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+from django.utils.six import StringIO
+
+from apps.volontulo.lib import assets
+from apps.volontulo.lib.serving import serve
+
+SOURCES = {
+    'volontulo/javascripts/cookielaw/js/cookielaw.js': b'var Cookielaw = {}',
+    'volontulo/javascripts/bootstrap.js': b'+function ($) {}(jQuery);\n' * 50,
+    'volontulo/css/main.css': b'body { background: url("../img/bg.png"); }',
+    'volontulo/img/bg.png': b'\x89PNG',
+}
+BUNDLE = 'volontulo/javascripts/bundle.js'
+
+
+class TestAssetsStorage(TestCase):
+    u"""Tests for bundling, fingerprinting and compressing static files."""
+
+    def setUp(self):
+        u"""Collect static files from temporary directory."""
+        source_dir = tempfile.mkdtemp()
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_dir)
+        self.addCleanup(shutil.rmtree, self.static_root)
+        for name, content in SOURCES.items():
+            path = os.path.join(source_dir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as source:
+                source.write(content)
+
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_DIRS=[source_dir],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+            STATICFILES_STORAGE='apps.volontulo.lib.assets.AssetsStorage',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # warnings about missing optional packages are tested separately:
+        logging.getLogger('volontulo.assets').disabled = True
+        self.addCleanup(setattr, logging.getLogger('volontulo.assets'),
+                        'disabled', False)
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    def read(self, name):
+        u"""Return content of collected file."""
+        with open(os.path.join(self.static_root, name), 'rb') as collected:
+            return collected.read()
+
+    def test_bundle(self):
+        u"""Test that JavaScript files are bundled in order."""
+        hashed_bundle = staticfiles_storage.stored_name(BUNDLE)
+        content = self.read(hashed_bundle)
+
+        self.assertRegex(hashed_bundle, r'bundle\.[0-9a-f]{12}\.js$')
+        self.assertLess(
+            content.index(b'Cookielaw'),
+            content.index(b'jQuery'),
+        )
+
+    def test_fingerprinted_references(self):
+        u"""Test that references in CSS point to fingerprinted files."""
+        content = self.read(
+            staticfiles_storage.stored_name('volontulo/css/main.css')
+        )
+        self.assertIn(
+            os.path.basename(
+                staticfiles_storage.stored_name('volontulo/img/bg.png')
+            ).encode('utf-8'),
+            content,
+        )
+
+    def test_precompressed(self):
+        u"""Test that compressible files get smaller gzip siblings only."""
+        hashed_bundle = staticfiles_storage.stored_name(BUNDLE)
+        self.assertEqual(
+            gzip.decompress(self.read(hashed_bundle + '.gz')),
+            self.read(hashed_bundle),
+        )
+        hashed_image = staticfiles_storage.stored_name('volontulo/img/bg.png')
+        self.assertFalse(os.path.exists(
+            os.path.join(self.static_root, hashed_image + '.gz')
+        ))
+
+    def test_missing_optional_packages(self):
+        u"""Test warnings about skipped minification and brotli."""
+        for module in ('rjsmin', 'brotli'):
+            self.addCleanup(setattr, assets, module, getattr(assets, module))
+            setattr(assets, module, None)
+        logging.getLogger('volontulo.assets').disabled = False
+        with self.assertLogs('volontulo.assets', 'WARNING') as logs:
+            call_command(
+                'collectstatic',
+                interactive=False,
+                stdout=StringIO(),
+            )
+
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn('rjsmin', logs.output[0])
+        self.assertIn('brotli', logs.output[1])
+
+    def test_javascript_bundle_tag(self):
+        u"""Test that collected bundle is loaded with single script tag."""
+        rendered = Template(
+            '{% load assets %}'
+            '{% javascript_bundle "volontulo/javascripts/bundle.js" %}'
+        ).render(Context())
+
+        self.assertEqual(rendered, '<script src="{}"></script>'.format(
+            staticfiles_storage.url(BUNDLE)
+        ))
+
+    def test_serve_precompressed(self):
+        u"""Test serving gzip sibling to clients accepting it."""
+        hashed_bundle = staticfiles_storage.stored_name(BUNDLE)
+        request = RequestFactory().get(
+            '/static/' + hashed_bundle,
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        response = serve(request, hashed_bundle, self.static_root)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('javascript', response['Content-Type'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            self.read(hashed_bundle + '.gz'),
+        )
+
+        request = RequestFactory().get(
+            '/static/' + hashed_bundle,
+            HTTP_ACCEPT_ENCODING='gzip;q=0',
+        )
+        response = serve(request, hashed_bundle, self.static_root)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            self.read(hashed_bundle),
+        )
+
+
+class TestJavascriptBundleTag(TestCase):
+    u"""Tests for loading bundles before they are built."""
+
+    def test_sources_loaded_separately(self):
+        u"""Test that bundled files are loaded one by one without bundle."""
+        rendered = Template(
+            '{% load assets %}'
+            '{% javascript_bundle "volontulo/javascripts/bundle.js" %}'
+        ).render(Context())
+
+        self.assertEqual(rendered, (
+            '<script src="/static/volontulo/javascripts/cookielaw/js/'
+            'cookielaw.js"></script>\n'
+            '<script src="/static/volontulo/javascripts/bootstrap.js">'
+            '</script>'
+        ))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_benchmarks
+"""
+import shutil
+import tempfile
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test import override_settings
+from django.utils.six import StringIO
+
+from apps.volontulo.lib import benchmarks
+from apps.volontulo.lib.synthetic import PASSWORD
+from apps.volontulo.lib.synthetic import DataGenerator
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
+
+
+class MediaRootTestCase(TestCase):
+    u"""Test case saving media files to temporary directory."""
+
+    def setUp(self):
+        u"""Set up temporary MEDIA_ROOT."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class TestDataGenerator(MediaRootTestCase):
+    u"""Tests for synthetic data generator."""
+
+    def test_generate(self):
+        u"""Test generating related objects with bulk inserts."""
+        created = DataGenerator(seed=1, batch_size=7).generate(3, 40, 20)
+
+        self.assertEqual(created['organizations'], 3)
+        self.assertEqual(created['offers'], 40)
+        self.assertEqual(created['volunteers'], 20)
+        self.assertEqual(Organization.objects.count(), 3)
+        self.assertEqual(Offer.objects.count(), 40)
+        self.assertEqual(UserProfile.objects.count(), 20)
+        self.assertEqual(OfferImage.objects.count(), created['images'])
+        self.assertEqual(
+            Offer.objects.filter(main_image__isnull=False).count(),
+            created['images'],
+        )
+        self.assertEqual(
+            Offer.volunteers.through.objects.count(),
+            created['joined'],
+        )
+        user = User.objects.order_by('id').first()
+        self.assertEqual(
+            authenticate(username=user.email, password=PASSWORD),
+            user,
+        )
+
+    def test_statuses_consistent_with_dates(self):
+        u"""Test that generated statuses don't need any transition."""
+        DataGenerator().generate(2, 100, 0)
+
+        self.assertEqual(
+            set(Offer.objects.values_list('offer_status', flat=True)),
+            {'published', 'unpublished', 'rejected'},
+        )
+        self.assertFalse(any(Offer.objects.update_statuses().values()))
+
+    def test_generate_more(self):
+        u"""Test adding data to already generated data."""
+        DataGenerator().generate(1, 5, 5)
+        created = DataGenerator().generate(0, 5, 5)
+
+        self.assertEqual(created['offers'], 5)
+        self.assertEqual(Organization.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 10)
+
+    def test_command(self):
+        u"""Test command generating data."""
+        stdout = StringIO()
+        call_command(
+            'generate_data',
+            organizations=2,
+            offers=10,
+            volunteers=5,
+            stdout=stdout,
+        )
+        self.assertIn('offers: 10', stdout.getvalue())
+
+        with self.assertRaises(CommandError):
+            Organization.objects.all().delete()
+            call_command('generate_data', organizations=0, offers=10)
+
+
+class TestBenchmarks(MediaRootTestCase):
+    u"""Tests for benchmarks runner."""
+
+    def test_run_and_compare(self):
+        u"""Test measuring all targets at growing scales."""
+        results = benchmarks.run([10, 20], repeat=2)
+
+        self.assertEqual(
+            [scale['offers'] for scale in results['scales']],
+            [10, 20],
+        )
+        stats = results['scales'][1]['results']['view:offers_list']
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertGreater(stats['queries'], 0)
+        self.assertIn(
+            'OffersManager.get_active',
+            results['scales'][0]['results'],
+        )
+
+        rows = benchmarks.compare(results, results)
+        self.assertEqual(len(rows), sum(
+            len(scale['results']) for scale in results['scales']
+        ))
+        self.assertTrue(all(row[4] == 1 for row in rows))
+
+    def test_command_requires_debug(self):
+        u"""Test that benchmarks don't add data with production settings."""
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', scales='10')
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_email
+"""
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.volontulo.lib.email import MAX_ATTEMPTS
+from apps.volontulo.lib.email import send_mail
+from apps.volontulo.lib.email import send_queued_emails
+from apps.volontulo.models import OutgoingEmail
+from apps.volontulo.tests import common
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    u"""Email backend unable to send any message."""
+
+    def send_messages(self, email_messages):
+        u"""Fail to send messages."""
+        raise smtplib.SMTPServerDisconnected(u'Connection unexpectedly closed')
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    u"""Email backend unable to connect to mail server."""
+
+    def open(self):
+        u"""Fail to connect."""
+        raise ConnectionRefusedError(u'Connection refused')
+
+    def send_messages(self, email_messages):
+        u"""Never reached, as connection can't be opened."""
+        raise AssertionError(u'Connection was not opened')
+
+
+class TestEmailOutbox(TestCase):
+    u"""Class responsible for testing emails outbox."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        common.initialize_administrator()
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        send_mail(
+            RequestFactory().get('/'),
+            'registration',
+            ['volunteer@example.com'],
+            {'uuid': 'abc'},
+        )
+
+    def test__send_mail_queues_email(self):
+        u"""Email is put into outbox instead of being sent."""
+        self.assertEqual(len(mail.outbox), 0)
+        outgoing_email = OutgoingEmail.objects.get()
+        self.assertEqual(outgoing_email.subject, u'Rejestracja na Volontulo')
+        self.assertEqual(outgoing_email.recipients, u'volunteer@example.com')
+        self.assertEqual(outgoing_email.bcc, u'admin_user@example.com')
+        self.assertIn(u'abc', outgoing_email.body)
+        self.assertIsNone(outgoing_email.sent_at)
+
+    def test__send_queued_emails(self):
+        u"""Queued emails are sent only once."""
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, u'Rejestracja na Volontulo')
+        self.assertEqual(mail.outbox[0].to, [u'volunteer@example.com'])
+        self.assertEqual(mail.outbox[0].bcc, [u'admin_user@example.com'])
+        self.assertEqual(len(mail.outbox[0].alternatives), 1)
+        self.assertIsNotNone(OutgoingEmail.objects.get().sent_at)
+
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test__send_queued_emails_in_batches(self):
+        u"""All pending emails are sent, regardless of batch size."""
+        for i in range(4):
+            send_mail(
+                RequestFactory().get('/'),
+                'registration',
+                ['volunteer{}@example.com'.format(i)],
+                {'uuid': i},
+            )
+        self.assertEqual(send_queued_emails(batch_size=2), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(
+        EMAIL_BACKEND='apps.volontulo.tests.lib.test_email.'
+                      'FailingEmailBackend'
+    )
+    def test__send_queued_emails_failure(self):
+        u"""Failed emails are retried later with growing delay."""
+        self.assertEqual(send_queued_emails(), (0, 1))
+        outgoing_email = OutgoingEmail.objects.get()
+        self.assertEqual(outgoing_email.attempts, 1)
+        self.assertIn(u'Connection unexpectedly closed',
+                      outgoing_email.last_error)
+        self.assertGreater(outgoing_email.send_after, timezone.now())
+
+        # email is not retried before its delay passes:
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        send_queued_emails()
+        outgoing_email = OutgoingEmail.objects.get()
+        self.assertEqual(outgoing_email.attempts, 2)
+        self.assertGreater(
+            outgoing_email.send_after,
+            timezone.now() + timedelta(seconds=90)
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='apps.volontulo.tests.lib.test_email.'
+                      'FailingEmailBackend'
+    )
+    def test__send_queued_emails_gives_up(self):
+        u"""Email is not retried after too many attempts."""
+        OutgoingEmail.objects.update(attempts=MAX_ATTEMPTS)
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test__send_queued_emails_broken_email(self):
+        u"""Email which can't be built doesn't block other emails."""
+        OutgoingEmail.objects.update(subject=u'Zły\nnagłówek')
+        send_mail(
+            RequestFactory().get('/'),
+            'registration',
+            ['volunteer2@example.com'],
+            {'uuid': 'def'},
+        )
+        with self.assertLogs('volontulo.email', 'ERROR'):
+            self.assertEqual(send_queued_emails(), (1, 1))
+        self.assertEqual(mail.outbox[0].to, [u'volunteer2@example.com'])
+        broken = OutgoingEmail.objects.get(sent_at__isnull=True)
+        self.assertEqual(broken.attempts, 1)
+        self.assertIn(u'newlines', broken.last_error)
+
+    def test__send_queued_emails_skips_claimed(self):
+        u"""Email claimed by other sender is not sent again."""
+        stale = OutgoingEmail.objects.get()
+        self.assertTrue(OutgoingEmail.objects.get().claim(60))
+        self.assertFalse(stale.claim(60))
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(
+        EMAIL_BACKEND='apps.volontulo.tests.lib.test_email.'
+                      'UnreachableEmailBackend'
+    )
+    def test__send_queued_emails_unreachable_server(self):
+        u"""Emails wait in outbox while mail server is unreachable."""
+        with self.assertLogs('volontulo.email', 'ERROR'):
+            self.assertEqual(send_queued_emails(), (0, 0))
+        outgoing_email = OutgoingEmail.objects.get()
+        self.assertEqual(outgoing_email.attempts, 0)
+        self.assertLessEqual(outgoing_email.send_after, timezone.now())
+
+    def test__send_queued_emails_command(self):
+        u"""Management command drains outbox."""
+        stdout = StringIO()
+        call_command('send_queued_emails', stdout=stdout)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(u'Sent emails: 1, failed: 0', stdout.getvalue())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_export
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.volontulo.lib.export import VOLUNTEERS_HEADER
+from apps.volontulo.lib.export import escape_formula
+from apps.volontulo.lib.export import iterate_volunteers
+from apps.volontulo.lib.export import stream_csv
+from apps.volontulo.tests import common
+
+
+class TestExport(TestCase):
+    u"""Class responsible for testing CSV export of volunteers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.volunteer, cls.organization = \
+            common.initialize_filled_volunteer_and_organization()
+        cls.offers = list(cls.organization.offer_set.filter(
+            offer_status='published',
+        ).order_by('id'))
+
+    def test_iterate_volunteers_of_offer(self):
+        u"""Test rows of volunteers of single offer."""
+        offer = self.offers[0]
+        rows = list(iterate_volunteers(offer_id=offer.id))
+
+        self.assertEqual(rows, [(
+            offer.id,
+            offer.title,
+            self.volunteer.id,
+            u'',
+            u'',
+            u'volunteer2@example.com',
+            u'',
+        )])
+
+    def test_iterate_volunteers_in_batches(self):
+        u"""Test that all rows are selected in batches of given size."""
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(iterate_volunteers(
+                batch_size=3,
+                offer__organization_id=self.organization.id,
+            ))
+
+        self.assertEqual(
+            [row[0] for row in rows],
+            [offer.id for offer in self.offers],
+        )
+        self.assertEqual(len(queries), 2)
+
+    def test_stream_csv(self):
+        u"""Test that CSV starts with byte order mark and header."""
+        response = stream_csv(
+            'wolontariusze.csv',
+            VOLUNTEERS_HEADER,
+            [(1, u'Oferta, pierwsza', 2, u'Zażółć', u'', u'a@b.pl', u'')],
+        )
+        content = b''.join(response.streaming_content).decode('utf-8')
+
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="wolontariusze.csv"',
+        )
+        self.assertEqual(content.splitlines(), [
+            u'\ufeff' + u','.join(VOLUNTEERS_HEADER),
+            u'1,"Oferta, pierwsza",2,Zażółć,,a@b.pl,',
+        ])
+
+    def test_stream_csv_escapes_formulas(self):
+        u"""Test that values can't inject formulas into spreadsheets."""
+        response = stream_csv(
+            'wolontariusze.csv',
+            VOLUNTEERS_HEADER,
+            [(1, u'=HYPERLINK("http://example.com")', 2, u'+1', u'-1',
+              u'@SUM(A1)', u'\t=1')],
+        )
+        content = b''.join(response.streaming_content).decode('utf-8')
+
+        self.assertEqual(content.splitlines()[1], (
+            u'1,"\'=HYPERLINK(""http://example.com"")",2,'
+            u"'+1,'-1,'@SUM(A1),'\t=1"
+        ))
+
+    def test_escape_formula(self):
+        u"""Test that only text starting with formula is escaped."""
+        self.assertEqual(escape_formula(u'=1+2'), u"'=1+2")
+        self.assertEqual(escape_formula(u'Oferta = pomoc'), u'Oferta = pomoc')
+        self.assertEqual(escape_formula(u''), u'')
+        self.assertEqual(escape_formula(-1), -1)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_images
+"""
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from django.test import override_settings
+from PIL import Image
+
+from apps.volontulo.lib.images import apply_orientation
+from apps.volontulo.lib.images import create_variant
+from apps.volontulo.lib.images import get_variant
+from apps.volontulo.lib.images import process_image_jobs
+from apps.volontulo.lib.images import variant_name
+from apps.volontulo.models import ImageJob
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import UserProfile
+from apps.volontulo.templatetags.thumbnail import thumbnail
+from apps.volontulo.tests import common
+
+
+def create_image_file(width, height, image_format='JPEG'):
+    u"""Return content of generated image.
+
+    :param width: int Image width
+    :param height: int Image height
+    :param image_format: string PIL format name
+    """
+    output = BytesIO()
+    Image.new('RGB', (width, height), (255, 0, 0)).save(output, image_format)
+    return ContentFile(output.getvalue())
+
+
+class FailingExecutor(object):
+    u"""Executor which jobs fail with given error."""
+
+    def __init__(self, error):
+        u"""Initialize executor.
+
+        :param error: Exception raised by every job
+        """
+        self.error = error
+
+    def submit(self, func, *args):
+        u"""Return future failed with error."""
+        # pylint: disable=unused-argument
+        future = Future()
+        future.set_exception(self.error)
+        return future
+
+
+class TestImages(TestCase):
+    u"""Class responsible for testing image variants."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+
+    def tearDown(self):
+        u"""Tear down each test."""
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def test__variant_name(self):
+        u"""Variants are stored next to original as JPEG or PNG."""
+        self.assertEqual(
+            variant_name('offers/image.jpeg', 'card'),
+            'offers/image.card.jpg',
+        )
+        self.assertEqual(
+            variant_name('offers/image.gif', 'avatar'),
+            'offers/image.avatar.jpg',
+        )
+        self.assertEqual(
+            variant_name('offers/image.png', 'hero'),
+            'offers/image.hero.png',
+        )
+
+    def test__create_variant(self):
+        u"""Cropped and scaled variants have expected sizes."""
+        name = default_storage.save('offers/image.png',
+                                    create_image_file(2000, 1000, 'PNG'))
+
+        with default_storage.open(create_variant(name, 'card')) as variant:
+            self.assertEqual(Image.open(variant).size, (480, 360))
+        with default_storage.open(create_variant(name, 'hero')) as variant:
+            self.assertEqual(Image.open(variant).size, (1200, 600))
+
+    def test__apply_orientation(self):
+        u"""Images taken with rotated camera are turned upright."""
+        image = Image.new('RGB', (300, 200))
+        image._getexif = lambda: {274: 6}  # pylint: disable=protected-access
+        self.assertEqual(apply_orientation(image).size, (200, 300))
+        self.assertEqual(apply_orientation(Image.new('RGB', (3, 2))).size,
+                         (3, 2))
+
+    def test__get_variant_not_created(self):
+        u"""Original path is returned until variant is created."""
+        self.assertEqual(get_variant('offers/missing.jpg', 'card'),
+                         'offers/missing.jpg')
+        self.assertEqual(get_variant('offers/image.jpg', 'card', 'avatar'),
+                         'offers/image.jpg')
+        self.assertEqual(get_variant('offers/image.jpg', 'card', 'card,hero'),
+                         'offers/image.card.jpg')
+        self.assertEqual(thumbnail('', 'card'), '')
+
+    def test__variants_created_and_deleted_with_offer_image(self):
+        u"""Uploaded offer image is queued and processed by workers."""
+        common.initialize_filled_volunteer_and_organization()
+        image = OfferImage(
+            offer=Offer.objects.all()[0],
+            userprofile=UserProfile.objects.all()[0],
+        )
+        image.path.save('image.jpg', create_image_file(800, 600), save=False)
+        image.save()
+        card = variant_name(image.path.name, 'card')
+        self.assertEqual(ImageJob.objects.get_pending().get().name,
+                         image.path.name)
+        self.assertEqual(thumbnail(image, 'card'),
+                         default_storage.url(image.path.name))
+
+        ImageJob.objects.create(name='offers/broken.jpg')
+        default_storage.save('offers/broken.jpg', ContentFile(b'broken'))
+        offer = image.offer
+        offer.main_image = image
+        offer.save()
+        revision = Offer.objects.get(id=offer.id).revision
+        with ProcessPoolExecutor(1) as executor:
+            self.assertEqual(process_image_jobs(executor), (1, 1))
+        self.assertFalse(ImageJob.objects.get_pending().exists())
+        image = OfferImage.objects.get(id=image.id)
+        self.assertEqual(image.variants, 'avatar,card,hero,profile')
+        self.assertEqual(thumbnail(image, 'card'), default_storage.url(card))
+        self.assertEqual(thumbnail(image.path, 'card'),
+                         default_storage.url(card))
+        self.assertGreater(Offer.objects.get(id=offer.id).revision, revision)
+
+        image.delete()
+        self.assertFalse(default_storage.exists(card))
+
+    def test__process_image_jobs_unexpected_error(self):
+        u"""Job failed with any error doesn't stay in queue."""
+        ImageJob.objects.create(name='offers/bomb.jpg')
+        self.assertEqual(
+            process_image_jobs(FailingExecutor(RuntimeError(u'bomb'))),
+            (0, 1),
+        )
+        self.assertEqual(ImageJob.objects.get().last_error, u'bomb')
+
+    def test__process_image_jobs_broken_pool(self):
+        u"""Jobs of batch are marked as failed when worker died."""
+        ImageJob.objects.create(name='offers/first.jpg')
+        ImageJob.objects.create(name='offers/second.jpg')
+        with self.assertRaises(BrokenProcessPool):
+            process_image_jobs(FailingExecutor(BrokenProcessPool()))
+        self.assertFalse(ImageJob.objects.get_pending().exists())
+
+    def test__process_image_jobs_command(self):
+        u"""Management command rebuilds variants of all images."""
+        common.initialize_filled_volunteer_and_organization()
+        image = OfferImage(
+            offer=Offer.objects.all()[0],
+            userprofile=UserProfile.objects.all()[0],
+        )
+        image.path.save('image.jpg', create_image_file(800, 600))
+        ImageJob.objects.all().delete()
+
+        stdout = StringIO()
+        call_command('process_image_jobs', '--all', '--workers=1',
+                     stdout=stdout)
+        self.assertIn(u'Queued images: 1', stdout.getvalue())
+        self.assertIn(u'Processed images: 1, failed: 0', stdout.getvalue())
+        self.assertTrue(
+            default_storage.exists(variant_name(image.path.name, 'avatar'))
+        )
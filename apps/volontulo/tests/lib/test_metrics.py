@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_metrics
+"""
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.utils.six import StringIO
+
+from apps.volontulo.lib import metrics
+from apps.volontulo.tests import common
+
+
+class TestMetrics(TestCase):
+    u"""Tests for recording time and queries of views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        common.initialize_filled_volunteer_and_organization()
+        common.initialize_administrator()
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        metrics.view_metrics.reset()
+        self.client = Client()
+
+    def tearDown(self):
+        u"""Remove stats recorded by test."""
+        metrics.view_metrics.reset()
+
+    def test_request_recorded(self):
+        u"""Test recording request by URL name."""
+        self.client.get('/')
+        self.client.get('/')
+        metrics.view_metrics.flush()
+        stats = metrics.collect()['homepage']
+
+        self.assertEqual(stats['count'], 2)
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['max_queries'], 0)
+        self.assertGreater(stats['time'], 0)
+        self.assertGreater(stats['template_time'], 0)
+        self.assertGreaterEqual(stats['time'], stats['template_time'])
+        self.assertEqual(sum(stats['histogram']), 2)
+
+    def test_unresolved_request_not_recorded(self):
+        u"""Test that requests not resolved to views are skipped."""
+        self.client.get('/no-such-page')
+        metrics.view_metrics.flush()
+
+        self.assertEqual(metrics.collect(), {})
+
+    @override_settings(QUERY_BUDGET=0)
+    def test_query_budget(self):
+        u"""Test warning about request over query budget."""
+        with self.assertLogs('volontulo.metrics', 'WARNING') as logs:
+            self.client.get('/')
+        metrics.view_metrics.flush()
+
+        self.assertIn('homepage', logs.output[0])
+        self.assertEqual(metrics.collect()['homepage']['over_budget'], 1)
+
+    def test_aggregating_processes(self):
+        u"""Test merging stats saved by many processes."""
+        other = metrics.ViewMetrics()
+        other.record('homepage', 30, 5, 10, 5)
+        cache.set('volontulo:metrics:other:1', other.stats)
+        metrics.register_process('volontulo:metrics:other:1')
+        metrics.view_metrics.record('homepage', 700, 50, 300, 100)
+        metrics.view_metrics.flush()
+
+        row = metrics.summarize(metrics.collect())[0]
+        self.assertEqual(row['count'], 2)
+        self.assertEqual(row['avg_queries'], 27.5)
+        self.assertEqual(row['max_time'], 700)
+        self.assertEqual(row['p50'], 50)
+        self.assertEqual(row['p95'], 700)
+
+    def test_registering_processes(self):
+        u"""Test that processes don't overwrite registrations of others."""
+        slot = metrics.register_process('volontulo:metrics:other:1')
+        self.assertEqual(
+            metrics.register_process('volontulo:metrics:other:1', slot),
+            slot,
+        )
+        metrics.view_metrics.flush()
+        metrics.register_process('volontulo:metrics:other:2')
+
+        self.assertEqual(sorted(metrics.registered_processes()), sorted([
+            'volontulo:metrics:other:1',
+            metrics.view_metrics.key,
+            'volontulo:metrics:other:2',
+        ]))
+
+        cache.clear()
+        metrics.view_metrics.flush()
+        self.assertEqual(
+            metrics.registered_processes(),
+            [metrics.view_metrics.key],
+        )
+
+    def test_queries_counted_without_debug_cursor(self):
+        u"""Test that queries are counted without logging them."""
+        with self.settings(DEBUG=False):
+            self.client.get('/')
+        metrics.view_metrics.flush()
+        stats = metrics.collect()['homepage']
+
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['db_time'], 0)
+
+    def test_panel_for_anonymous(self):
+        u"""Test that stats are hidden from anonymous users."""
+        response = self.client.get('/panel/metrics')
+        self.assertEqual(response.status_code, 403)
+
+    def test_panel_for_administrator(self):
+        u"""Test stats shown to administrator."""
+        self.client.post('/login', {
+            'email': u'admin_user@example.com',
+            'password': 'admin_password',
+        })
+        self.client.get('/offers')
+        response = self.client.get('/panel/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/metrics.html')
+        self.assertIn(
+            'offers_list',
+            [row['name'] for row in response.context['rows']],
+        )
+
+    def test_command(self):
+        u"""Test printing and removing stats."""
+        self.client.get('/')
+        metrics.view_metrics.flush()
+
+        stdout = StringIO()
+        call_command('view_metrics', histogram=True, stdout=stdout)
+        self.assertIn('homepage', stdout.getvalue())
+        self.assertIn('<=1000', stdout.getvalue())
+
+        call_command('view_metrics', reset=True, stdout=StringIO())
+        stdout = StringIO()
+        call_command('view_metrics', stdout=stdout)
+        self.assertIn('No stats collected.', stdout.getvalue())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_page_cache
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from apps.volontulo.lib.page_cache import bump_pending_versions
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.page_cache import get_versions
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.tests import common
+
+
+class TestPageCache(TestCase):
+    u"""Class responsible for testing anonymous pages cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.organization = common.initialize_empty_organization()
+        cls.offer = Offer.objects.create(
+            organization=cls.organization,
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'',
+            title=u'Offer',
+            offer_status='published',
+        )
+        cls.offer_url = '/offers/offer/{}'.format(cls.offer.id)
+        cls.organization_url = '/organizations/organization-1/{}'.format(
+            cls.organization.id
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+
+    def test__versions(self):
+        u"""Bumped version differs from previous one."""
+        version = get_versions(['offers'])
+        self.assertEqual(get_versions(['offers']), version)
+        bump_versions('offers')
+        self.assertNotEqual(get_versions(['offers']), version)
+
+    def test__anonymous_page_cached(self):
+        u"""Second request of anonymous user is served from cache."""
+        response = self.client.get(self.offer_url)
+        self.assertContains(response, u'Offer')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.offer_url)
+        self.assertContains(response, u'Offer')
+
+    def test__page_invalidated_by_save(self):
+        u"""Page is rendered again after offer is changed."""
+        self.client.get(self.offer_url)
+        offer = Offer.objects.get(id=self.offer.id)
+        offer.title = u'Offer'
+        offer.location = u'Gdańsk'
+        offer.save()
+        self.assertContains(self.client.get(self.offer_url), u'Gdańsk')
+
+        offer.reject()
+        response = self.client.get('/offers')
+        self.assertNotContains(response, self.offer_url)
+
+    def test__page_invalidated_by_statuses_update(self):
+        u"""Page is rendered again after offer status is changed by dates."""
+        self.client.get(self.offer_url)
+        Offer.objects.filter(id=self.offer.id).update(
+            finished_at=timezone.now() - timedelta(hours=1),
+        )
+        Offer.objects.update_statuses()
+        response = self.client.get(self.offer_url)
+        self.assertEqual(response.context['offer'].action_status, 'finished')
+
+    def test__page_invalidated_by_organization_save(self):
+        u"""Organization page is rendered again after it is changed."""
+        self.client.get(self.organization_url)
+        organization = Organization.objects.get(id=self.organization.id)
+        organization.address = u'Nowa 1, Kraków'
+        organization.save()
+        self.assertContains(self.client.get(self.organization_url),
+                            u'Nowa 1, Kraków')
+
+    def test__logged_user_page_not_cached(self):
+        u"""Pages of logged in users are always rendered."""
+        self.client.post('/login', {
+            'email': u'organization1@example.com',
+            'password': 'organization1',
+        })
+        self.client.get(self.offer_url)
+        response = self.client.get(self.offer_url)
+        self.assertTemplateUsed(response, 'offers/show_offer.html')
+
+    def test__csrf_token_per_user(self):
+        u"""Cached page contains CSRF token of user it is served to."""
+        clients = [Client(), Client()]
+        for client in clients:
+            response = client.get(self.organization_url)
+            token = response.cookies['csrftoken'].value
+            self.assertContains(response, token)
+        # the second page was served from cache:
+        self.assertEqual(response.templates, [])
+        self.assertNotEqual(clients[0].cookies['csrftoken'].value,
+                            clients[1].cookies['csrftoken'].value)
+
+    def test__cookie_law_banner_variants(self):
+        u"""Banner is shown only to users who didn't accept cookies."""
+        accepted = Client()
+        accepted.cookies['cookielaw_accepted'] = '1'
+        for _ in range(2):
+            self.assertNotContains(accepted.get(self.offer_url),
+                                   u'CookielawBanner')
+            self.assertContains(self.client.get(self.offer_url),
+                                u'CookielawBanner')
+        # both variants were served from cache the second time:
+        with self.assertNumQueries(0):
+            self.assertNotContains(accepted.get(self.offer_url),
+                                   u'CookielawBanner')
+            self.assertContains(Client().get(self.offer_url),
+                                u'CookielawBanner')
+
+
+class TestPendingVersions(TransactionTestCase):
+    u"""Class responsible for testing versions changed in transactions."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+
+    def test__bumped_again_after_transaction(self):
+        u"""Version changed inside transaction changes again after it."""
+        version = get_versions(['offers'])
+        with transaction.atomic():
+            bump_versions('offers')
+            in_transaction = get_versions(['offers'])
+            self.assertNotEqual(in_transaction, version)
+            # page rendered now, from data before commit:
+            bump_pending_versions()
+            self.assertEqual(get_versions(['offers']), in_transaction)
+        bump_pending_versions()
+        self.assertNotEqual(get_versions(['offers']), in_transaction)
+
+    def test__bumped_when_request_finished(self):
+        u"""Pending versions are changed when request finishes."""
+        with transaction.atomic():
+            bump_versions('offers')
+        version = get_versions(['offers'])
+        self.client.get('/o-nas')
+        self.assertNotEqual(get_versions(['offers']), version)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_pagination
+"""
+
+from django.test import RequestFactory
+from django.test import TestCase
+
+from apps.volontulo.lib.pagination import decode_cursor
+from apps.volontulo.lib.pagination import paginate
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestPagination(TestCase):
+    u"""Class responsible for testing keyset pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        # two organizations share each name, so id breaks ties:
+        for i in range(5):
+            for _ in range(2):
+                Organization.objects.create(name=u'Organizacja {}'.format(i))
+        cls.ordered = list(Organization.objects.order_by('name', 'id'))
+        cls.factory = RequestFactory()
+
+    def _paginate(self, **params):
+        u"""Return page of organizations for given request parameters."""
+        return paginate(
+            self.factory.get('/organizations', params),
+            Organization.objects.all(),
+            ('name', 'id'),
+            per_page=4,
+        )
+
+    def test__pages_forward_and_backward(self):
+        u"""Walking pages forward and backward visits every object once."""
+        page = self._paginate()
+        self.assertEqual(page.items, self.ordered[:4])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+        page = self._paginate(after=page.next_cursor)
+        self.assertEqual(page.items, self.ordered[4:8])
+        self.assertTrue(page.has_previous)
+
+        page = self._paginate(after=page.next_cursor)
+        self.assertEqual(page.items, self.ordered[8:])
+        self.assertFalse(page.has_next)
+
+        page = self._paginate(before=page.previous_cursor)
+        self.assertEqual(page.items, self.ordered[4:8])
+        self.assertTrue(page.has_previous)
+        self.assertTrue(page.has_next)
+
+        page = self._paginate(before=page.previous_cursor)
+        self.assertEqual(page.items, self.ordered[:4])
+        self.assertFalse(page.has_previous)
+
+    def test__page_costs_one_query(self):
+        u"""Any page is fetched with single query, without OFFSET."""
+        cursor = self._paginate().next_cursor
+        with self.assertNumQueries(1):
+            self._paginate(after=cursor)
+
+    def test__invalid_cursor(self):
+        u"""Invalid cursor leads to the first page."""
+        self.assertIsNone(decode_cursor(u'invalid!', ('name', 'id')))
+        self.assertIsNone(decode_cursor(u'WzFd', ('name', 'id')))
+        # [null, 1]:
+        self.assertIsNone(decode_cursor(u'W251bGwsIDFd', ('name', 'id')))
+        self.assertEqual(self._paginate(after=u'invalid!').items,
+                         self.ordered[:4])
+
+    def test__nullable_ordering(self):
+        u"""Objects can't be ordered by nullable fields."""
+        with self.assertRaises(ValueError):
+            paginate(
+                self.factory.get('/offers'),
+                Offer.objects.all(),
+                ('volunteers_limit', 'id'),
+            )
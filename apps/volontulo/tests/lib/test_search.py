@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_search
+"""
+import threading
+from importlib import import_module
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.db import transaction
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.volontulo.lib.page_cache import SEARCH_INDEX
+from apps.volontulo.lib.page_cache import bump_versions
+from apps.volontulo.lib.page_cache import get_versions
+from apps.volontulo.lib.search import OfferIndex
+from apps.volontulo.lib.search import fold_word
+from apps.volontulo.lib.search import normalize_word
+from apps.volontulo.lib.search import offer_index
+from apps.volontulo.lib.search import prefix_tsquery
+from apps.volontulo.lib.search import search_offers
+from apps.volontulo.lib.search import tokenize
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+
+
+class TestSearch(TestCase):
+    u"""Class responsible for testing Python search fallback."""
+
+    def test__normalize_word(self):
+        u"""Inflected forms of word are normalized to the same stem."""
+        self.assertEqual(normalize_word(u'Schronisko'),
+                         normalize_word(u'schroniskach'))
+        self.assertEqual(normalize_word(u'Łódź'), u'lodz')
+        # short words are not stripped:
+        self.assertEqual(normalize_word(u'psy'), u'psy')
+
+    def test__fold_word_like_postgresql(self):
+        u"""Words are folded like volontulo_fold PostgreSQL function."""
+        migration = import_module(
+            'apps.volontulo.migrations.0016_offer_search_folding'
+        )
+        self.assertLessEqual(
+            set(u'ąćęłńóśźżĄĆĘŁŃÓŚŹŻ'),
+            set(migration.FOLD_FROM),
+        )
+        self.assertEqual(
+            fold_word(migration.FOLD_FROM),
+            migration.FOLD_TO,
+        )
+
+    def test__tokenize(self):
+        u"""Text is split into normalized words."""
+        self.assertEqual(tokenize(u'Pomoc, w schronisku!'),
+                         [u'pomoc', u'w', u'schronisk'])
+        self.assertEqual(tokenize(None), [])
+
+    def test__prefix_tsquery(self):
+        u"""PostgreSQL query is built from normalized words."""
+        self.assertEqual(prefix_tsquery(u'Poznań, schroniska!'),
+                         u'poznan:* & schronisk:*')
+
+
+class TestOfferIndex(TestCase):
+    u"""Class responsible for testing in-memory offers index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.organization = Organization.objects.create(
+            name=u'Fundacja Zwierzęta',
+            address='',
+            description='',
+        )
+        cls.offer = Offer.objects.create(
+            organization=cls.organization,
+            title=u'Pomoc w schronisku',
+            description=u'Spacery z psami',
+            location=u'Łódź',
+            requirements='',
+            time_commitment='',
+            benefits='',
+            time_period='',
+            offer_status='published',
+            recruitment_status='open',
+            action_status='ongoing',
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        offer_index.clear()
+
+    def tearDown(self):
+        u"""Tear down each test."""
+        offer_index.clear()
+
+    def test__prefix_and_diacritics(self):
+        u"""Words are matched by prefixes, regardless of diacritics."""
+        self.assertEqual(offer_index.search(u'schr'), [(self.offer.id, 1.0)])
+        self.assertEqual(len(offer_index.search(u'lodz spacer')), 1)
+        self.assertEqual(offer_index.search(u'schronisko warszawa'), [])
+
+    def test__incremental_updates(self):
+        u"""Index is updated by signals, without being rebuilt."""
+        offer_index.search(u'pomoc')
+        organization = Organization.objects.get(id=self.organization.id)
+        offer = Offer.objects.get(id=self.offer.id)
+        # organization update, reading its revision and reindexing offers:
+        with self.assertNumQueries(4):
+            organization.name = u'Stowarzyszenie'
+            organization.save()
+        self.assertEqual(len(offer_index.search(u'stowarzyszenie')), 1)
+        self.assertEqual(offer_index.search(u'fundacja'), [])
+
+        offer.unpublish()
+        self.assertEqual(offer_index.search(u'pomoc'), [])
+        offer.publish()
+        self.assertEqual(len(offer_index.search(u'pomoc')), 1)
+
+        offer.delete()
+        self.assertEqual(offer_index.search(u'pomoc'), [])
+
+    def test__rebuilt_after_changes_without_signals(self):
+        u"""Index is rebuilt when offers were changed by bulk update."""
+        self.assertEqual(len(offer_index.search(u'pomoc')), 1)
+        Offer.objects.filter(id=self.offer.id).update(
+            finished_at=timezone.now(),
+        )
+        Offer.objects.update_statuses()
+        self.assertEqual(offer_index.search(u'pomoc'), [])
+
+    def test__rebuilt_after_changes_in_other_process(self):
+        u"""Index is rebuilt when shared version of offers changed."""
+        index = OfferIndex()
+        self.assertEqual(len(index.search(u'pomoc')), 1)
+        with self.assertNumQueries(0):
+            index.search(u'pomoc')
+        # offer changed and version bumped by another process:
+        Offer.objects.filter(id=self.offer.id).update(title=u'Spacery')
+        bump_versions(SEARCH_INDEX)
+        self.assertEqual(index.search(u'pomoc'), [])
+
+    @override_settings(WARM_SEARCH_INDEX=True)
+    def test__rebuilt_in_background(self):
+        u"""Stale index is used while it is rebuilt in background."""
+        index = OfferIndex()
+        index.build()
+        built = threading.Event()
+        index.build = built.set
+        bump_versions(SEARCH_INDEX)
+
+        self.assertEqual(len(index.search(u'pomoc')), 1)
+        self.assertTrue(built.wait(5))
+
+
+class TestOfferIndexVersions(TransactionTestCase):
+    u"""Class responsible for testing versions of committed changes."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        self.offer = Offer.objects.create(
+            organization=Organization.objects.create(name=u'Fundacja'),
+            title=u'Pomoc w schronisku',
+            description=u'Spacery z psami',
+            location=u'Łódź',
+            time_commitment='',
+            benefits='',
+            offer_status='published',
+            recruitment_status='open',
+            action_status='ongoing',
+        )
+        offer_index.build()
+        self.addCleanup(offer_index.clear)
+
+        def build():
+            u"""Fail test if index is rebuilt."""
+            raise AssertionError(u'Index rebuilt')
+        offer_index.build = build
+        self.addCleanup(delattr, offer_index, 'build')
+
+    def test__not_rebuilt_after_save(self):
+        u"""Index updated by signals isn't rebuilt after single save."""
+        version = get_versions([SEARCH_INDEX])
+        self.offer.title = u'Spacery z psami'
+        self.offer.save()
+        self.assertNotEqual(get_versions([SEARCH_INDEX]), version)
+        self.assertEqual(offer_index.search(u'pomoc'), [])
+        self.assertEqual(len(offer_index.search(u'spacery')), 1)
+
+        with transaction.atomic():
+            self.offer.organization.name = u'Stowarzyszenie'
+            self.offer.organization.save()
+        offer_index.notify_pending()
+        self.assertEqual(len(offer_index.search(u'stowarzyszenie')), 1)
+
+    def test__not_rebuilt_after_request(self):
+        u"""Version changed when request finishes is taken by index."""
+        with transaction.atomic():
+            self.offer.delete()
+        self.client.get('/o-nas')
+        self.assertEqual(offer_index.search(u'pomoc'), [])
+
+    def test__rebuilt_after_changes_in_other_process(self):
+        u"""Version changed also by another process makes index stale."""
+        bump_versions(SEARCH_INDEX)
+        self.offer.save()
+        self.assertTrue(offer_index.is_stale)
+
+
+@skipUnless(connection.vendor == 'postgresql', u'PostgreSQL search')
+class TestPostgreSQLSearch(TestCase):
+    u"""Class responsible for testing search_vector column search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.offer = Offer.objects.create(
+            organization=Organization.objects.create(name=u'Fundacja'),
+            title=u'Pomoc w schronisku',
+            description=u'Spacery z psami',
+            location=u'Łódź',
+            time_commitment='',
+            benefits='',
+            offer_status='published',
+            recruitment_status='open',
+            action_status='ongoing',
+        )
+
+    def test__diacritics_and_inflection(self):
+        u"""Search matches the in-memory fallback."""
+        for query in (u'Lodz', u'łódź schroniska', u'schr', u'spacerami'):
+            self.assertEqual(
+                [o.id for o in search_offers(Offer.objects.all(), query)],
+                [self.offer.id],
+                query,
+            )
+        self.assertEqual(
+            list(search_offers(Offer.objects.all(), u'warszawa')),
+            [],
+        )
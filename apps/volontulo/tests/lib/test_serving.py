@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_serving
+"""
+import os
+import shutil
+import sys
+import tempfile
+from unittest import skipUnless
+
+from django.http import Http404
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+
+from apps.volontulo.lib.serving import serve
+
+CONTENT = b'0123456789' * 1000
+POLISH_NAME = u'zażółć gęślą.jpg'
+QUOTED_POLISH_NAME = 'za%C5%BC%C3%B3%C5%82%C4%87%20g%C4%99%C5%9Bl%C4%85.jpg'
+# file names with diacritics are supported only with UTF-8 locale:
+UTF8_FILESYSTEM = sys.getfilesystemencoding().lower() in ('utf-8', 'utf8')
+
+
+class TestServe(TestCase):
+    u"""Tests for view serving media files."""
+
+    def setUp(self):
+        u"""Set up temporary document root with files."""
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.media_root = os.path.join(self.base_dir, 'media')
+        os.makedirs(os.path.join(self.media_root, 'offers'))
+        for name in ('offers/image.jpg', 'main.0123456789ab.css'):
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(CONTENT)
+
+    def create_polish_file(self):
+        u"""Create file with Polish characters in name."""
+        with open(os.path.join(self.media_root, 'offers', POLISH_NAME),
+                  'wb') as f:
+            f.write(CONTENT)
+
+    def get(self, path, **headers):
+        u"""Request file through view serving media files."""
+        request = RequestFactory().get('/media/' + path, **headers)
+        return serve(request, path, self.media_root)
+
+    def test_whole_file(self):
+        u"""Test streaming whole file with validators and cache headers."""
+        response = self.get('offers/image.jpg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_hashed_file_cached_long(self):
+        u"""Test that file with content hash in name is cached for a year."""
+        response = self.get('main.0123456789ab.css')
+        response.close()
+
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_conditional_requests(self):
+        u"""Test answering conditional requests with 304."""
+        response = self.get('offers/image.jpg')
+        response.close()
+
+        self.assertEqual(self.get(
+            'offers/image.jpg',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        ).status_code, 304)
+        self.assertEqual(self.get(
+            'offers/image.jpg',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code, 304)
+        response = self.get('offers/image.jpg', HTTP_IF_NONE_MATCH='"x"')
+        response.close()
+        self.assertEqual(response.status_code, 200)
+
+    def test_ranges(self):
+        u"""Test serving byte ranges."""
+        response = self.get('offers/image.jpg', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/10000')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+        response = self.get('offers/image.jpg', HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+
+        response = self.get('offers/image.jpg', HTTP_RANGE='bytes=9990-')
+        self.assertEqual(response['Content-Range'], 'bytes 9990-9999/10000')
+
+        response = self.get('offers/image.jpg', HTTP_RANGE='bytes=10000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10000')
+
+    def test_range_with_outdated_if_range(self):
+        u"""Test sending whole file when If-Range doesn't match."""
+        response = self.get(
+            'offers/image.jpg',
+            HTTP_RANGE='bytes=10-19',
+            HTTP_IF_RANGE='"outdated"',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_missing_and_outside_files(self):
+        u"""Test that only files inside document root are served."""
+        for path in ('missing.jpg', 'offers', '../etc/passwd'):
+            with self.assertRaises(Http404):
+                self.get(path)
+
+    @override_settings(SENDFILE_BACKEND='x-sendfile')
+    def test_x_sendfile(self):
+        u"""Test handing file transfer to Apache."""
+        response = self.get('offers/image.jpg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'offers', 'image.jpg'),
+        )
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    @skipUnless(UTF8_FILESYSTEM, u'UTF-8 file names')
+    @override_settings(SENDFILE_BACKEND='x-sendfile')
+    def test_x_sendfile_non_ascii_name(self):
+        u"""Test that path of file with Polish name is URL-encoded."""
+        self.create_polish_file()
+        response = self.get(u'offers/' + POLISH_NAME)
+
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'offers', QUOTED_POLISH_NAME),
+        )
+
+    @override_settings(
+        SENDFILE_BACKEND='x-accel-redirect',
+        SENDFILE_INTERNAL_PREFIX='/internal/',
+    )
+    def test_x_accel_redirect(self):
+        u"""Test handing file transfer to nginx."""
+        with self.settings(BASE_DIR=self.base_dir):
+            response = self.get('offers/image.jpg')
+
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/internal/media/offers/image.jpg',
+        )
+
+    @skipUnless(UTF8_FILESYSTEM, u'UTF-8 file names')
+    @override_settings(SENDFILE_BACKEND='x-accel-redirect')
+    def test_x_accel_redirect_non_ascii_name(self):
+        u"""Test path of file with Polish name, requested under prefix."""
+        self.create_polish_file()
+        request = RequestFactory().get(
+            u'/media/offers/' + POLISH_NAME,
+            SCRIPT_NAME='/volontulo',
+        )
+        with self.settings(BASE_DIR=self.base_dir):
+            response = serve(
+                request,
+                u'offers/' + POLISH_NAME,
+                self.media_root,
+            )
+
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/internal/media/offers/' + QUOTED_POLISH_NAME,
+        )
+
+    @override_settings(SENDFILE_BACKEND='x-accel-redirect')
+    def test_x_accel_redirect_outside_project(self):
+        u"""Test streaming files which nginx can't reach by Django."""
+        with self.settings(BASE_DIR=os.path.join(self.base_dir, 'other')):
+            response = self.get('offers/image.jpg')
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_templates
+"""
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from apps.volontulo.lib import templates
+
+
+class TestWarmTemplates(TestCase):
+    u"""Tests for compiling all templates at once."""
+
+    def test_all_templates_compile(self):
+        u"""Test that every application template compiles."""
+        loaded, errors = templates.warm_templates()
+
+        self.assertEqual(errors, {})
+        self.assertIn('homepage.html', loaded)
+        self.assertIn('emails/password_reset.txt', loaded)
+        self.assertEqual(loaded, templates.list_templates())
+
+    def test_broken_template_reported(self):
+        u"""Test that broken template is reported, not raised."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.mkdir(os.path.join(directory, 'emails'))
+        with open(os.path.join(directory, 'emails', 'broken.txt'), 'w') as f:
+            f.write('{% block content %}')
+
+        with self.settings(TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [directory],
+        }]):
+            loaded, errors = templates.warm_templates(directory)
+
+        self.assertEqual(loaded, [])
+        self.assertEqual(list(errors), ['emails/broken.txt'])
+
+    def test_command(self):
+        u"""Test command reporting compiled templates."""
+        stdout = StringIO()
+        call_command('warm_templates', stdout=stdout)
+        self.assertIn(
+            u"Compiled templates: {}".format(
+                len(templates.list_templates())
+            ),
+            stdout.getvalue(),
+        )
+
+    def test_command_fails_on_broken_templates(self):
+        u"""Test command failing when any template is broken."""
+        with self.settings(TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [],
+        }]):
+            with self.assertRaises(CommandError):
+                call_command('warm_templates', stderr=StringIO())
@@ -3,11 +3,21 @@
 u"""
 .. module:: test_offer
 """
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
 from apps.volontulo.models import Organization
+from apps.volontulo.models import Sequence
+from apps.volontulo.models import UserProfile
 
 
 class TestOfferModel(TestCase):
@@ -157,3 +167,411 @@ class OfferTestCase(TestCase):
             self.offer.status_old,
             'ACTIVE'
         )
+
+
+class TestOffersManager(TestCase):
+    u"""Tests for Offer model manager."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Fixtures for OffersManager unittests."""
+        userprofile = UserProfile.objects.create(
+            user=User.objects.create(username=u'organization@example.com')
+        )
+        for i in range(5):
+            offer = Offer.objects.create(
+                organization=Organization.objects.create(
+                    name=u'Organization {}'.format(i)
+                ),
+                description=u'',
+                time_commitment=u'',
+                benefits=u'',
+                location=u'',
+                title=u'Offer {}'.format(i),
+                offer_status='published',
+                weight=i,
+            )
+            for j in range(3):
+                offer.save_offer_image(
+                    OfferImage(path=u'offers/{}_{}.png'.format(i, j)),
+                    userprofile,
+                    is_main=j == 1,
+                )
+
+    def test__get_cards_constant_number_of_queries(self):
+        u"""Offer cards fetch organizations and main images in bulk."""
+        with self.assertNumQueries(1):
+            cards = [
+                (o.organization.name, str(o.main_image))
+                for o in Offer.objects.get_cards()
+            ]
+        self.assertEqual(len(cards), 5)
+        self.assertEqual(cards[0], (u'Organization 0', u'offers/0_1.png'))
+
+    def test__as_cards_keeps_filters(self):
+        u"""Offer cards can be built from filtered offers."""
+        offers = Offer.objects.get_weightened(count=2).as_cards()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [o.organization.name for o in offers],
+                [u'Organization 0', u'Organization 1'],
+            )
+
+    def test__main_image_falls_back_to_first_image(self):
+        u"""First uploaded image is main until other one is chosen."""
+        offer = Offer.objects.get(title=u'Offer 0')
+        self.assertEqual(str(offer.main_image), u'offers/0_1.png')
+
+        offer = Offer.objects.create(
+            organization=offer.organization,
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'',
+            title=u'Offer without main image',
+        )
+        userprofile = UserProfile.objects.get()
+        offer.save_offer_image(OfferImage(path=u'offers/a.png'), userprofile)
+        offer.save_offer_image(OfferImage(path=u'offers/b.png'), userprofile)
+        self.assertEqual(
+            str(Offer.objects.get(id=offer.id).main_image),
+            u'offers/a.png'
+        )
+
+        offer.save_offer_image(
+            OfferImage(path=u'offers/c.png'),
+            userprofile,
+            is_main=True
+        )
+        self.assertEqual(
+            str(Offer.objects.get(id=offer.id).main_image),
+            u'offers/c.png'
+        )
+
+    def test__main_image_removal(self):
+        u"""Removing main image promotes the next one, if there's any."""
+        offer = Offer.objects.get(title=u'Offer 0')
+        others = list(offer.images.exclude(
+            id=offer.main_image_id,
+        ).order_by('id'))
+        self.assertTrue(others)
+        offer.main_image.delete()
+        offer = Offer.objects.get(id=offer.id)
+        self.assertEqual(offer.main_image, others[0])
+
+        for image in others:
+            image.delete()
+        self.assertIsNone(Offer.objects.get(id=offer.id).main_image)
+
+    def test__other_image_removal(self):
+        u"""Removing other image keeps main one."""
+        offer = Offer.objects.get(title=u'Offer 0')
+        offer.images.exclude(id=offer.main_image_id).first().delete()
+        self.assertEqual(
+            Offer.objects.get(id=offer.id).main_image_id,
+            offer.main_image_id,
+        )
+
+
+class TestOfferPublish(TestCase):
+    u"""Tests for publishing offers."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.organization = Organization.objects.create(name=u'Organization')
+        self.offers = [
+            Offer.objects.create(
+                organization=self.organization,
+                description=u'',
+                time_commitment=u'',
+                benefits=u'',
+                location=u'',
+                title=u'Offer {}'.format(i),
+                weight=i,
+            ) for i in range(3)
+        ]
+
+    def test__publish_puts_offer_first(self):
+        u"""Published offer is first one in weightened offers."""
+        self.offers[2].publish()
+        self.offers[1].publish()
+        self.assertEqual(
+            [o.title for o in Offer.objects.get_weightened()],
+            [u'Offer 1', u'Offer 2'],
+        )
+
+    def test__publish_does_not_rewrite_other_offers(self):
+        u"""Publishing offer leaves weights of other offers untouched."""
+        self.offers[2].publish()
+        weights = Offer.objects.order_by('id').values_list('weight', flat=True)
+        self.assertEqual(list(weights), [0, 1, -1])
+
+    def test__publish_takes_distinct_weights(self):
+        u"""Every publication takes next weight of sequence."""
+        for offer in self.offers:
+            offer.publish()
+        self.assertEqual(
+            list(Offer.objects.order_by('id').values_list(
+                'weight', flat=True
+            )),
+            [-1, -2, -3],
+        )
+
+    def test__publish_after_reorder(self):
+        u"""Weights higher than sequence don't change it."""
+        self.offers[0].publish()
+        self.offers[1].publish()
+        Offer.objects.update_weights({self.offers[0].id: 5})
+        self.offers[2].publish()
+        self.assertEqual(Offer.objects.get(id=self.offers[2].id).weight, -3)
+
+    def test__publish_after_reorder_from_zero(self):
+        u"""Offer published after reorder is still shown first."""
+        for offer in self.offers[1:]:
+            offer.publish()
+        Offer.objects.update_weights({
+            self.offers[2].id: 0,
+            self.offers[1].id: 1,
+        })
+        self.offers[0].publish()
+        self.assertEqual(
+            [o.title for o in Offer.objects.get_weightened()],
+            [u'Offer 0', u'Offer 2', u'Offer 1'],
+        )
+
+
+class TestSequence(TestCase):
+    u"""Tests for sequences."""
+
+    def test__next_value(self):
+        u"""Missing sequence is created and changed by step."""
+        self.assertEqual(Sequence.objects.next_value('test'), 1)
+        self.assertEqual(Sequence.objects.next_value('test', step=-3), -2)
+        self.assertEqual(Sequence.objects.get(name='test').value, -2)
+
+    def test__lower(self):
+        u"""Sequence is lowered, but never raised."""
+        Sequence.objects.lower('test', 3)
+        self.assertEqual(Sequence.objects.get(name='test').value, 3)
+        Sequence.objects.lower('test', -1)
+        Sequence.objects.lower('test', 2)
+        self.assertEqual(Sequence.objects.next_value('test', step=-1), -2)
+
+    def test__offer_weights_created_by_migration(self):
+        u"""Offer weights sequence exists before first publication."""
+        self.assertEqual(
+            Sequence.objects.get(name=Sequence.OFFER_WEIGHTS).value,
+            0,
+        )
+
+
+class TestOffersIndexes(TestCase):
+    u"""Tests that offers lists are read from indexes."""
+
+    def _explain(self, queryset):
+        u"""Return query plan of queryset as one string.
+
+        :param queryset: QuerySet to explain
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # tiny test tables are cheaper to scan than to look up:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return '\n'.join(str(row) for row in cursor.fetchall())
+
+    def _assert_index_used(self, queryset, postgresql_index):
+        u"""Assert that queryset is filtered and ordered with index.
+
+        PostgreSQL picks partial index matching predicate. SQLite can't match
+        partial index with bound parameters, so it has only composite one.
+
+        :param queryset: QuerySet to explain
+        :param postgresql_index: string Name of expected PostgreSQL index
+        """
+        plan = self._explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertIn(postgresql_index, plan)
+        elif connection.vendor == 'sqlite':
+            self.assertIn('USING INDEX', plan)
+            self.assertIn('offer_status=?', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        else:
+            self.skipTest(u'EXPLAIN format is unknown')
+
+    def test__get_active(self):
+        u"""Active offers are read from index in list order."""
+        self._assert_index_used(
+            Offer.objects.get_active().order_by('weight', 'id'),
+            'volontulo_offer_active_idx',
+        )
+
+    def test__get_archived(self):
+        u"""Archived offers are read from index in list order."""
+        self._assert_index_used(
+            Offer.objects.get_archived().order_by('weight', 'id'),
+            'volontulo_offer_archived_idx',
+        )
+
+    def test__get_weightened(self):
+        u"""Weightened offers are read from composite index."""
+        self._assert_index_used(
+            Offer.objects.get_weightened(),
+            'volontulo_offer_offer_status',
+        )
+
+    def test__get_for_administrator(self):
+        u"""Unpublished offers are read from composite index."""
+        self._assert_index_used(
+            Offer.objects.get_for_administrator(),
+            'volontulo_offer_offer_status',
+        )
+
+
+class TestOffersStatuses(TestCase):
+    u"""Tests for date driven offers status transitions."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.organization = Organization.objects.create(name=u'Organization')
+        self.now = timezone.now()
+
+    def _create_offer(self, title, **kwargs):
+        u"""Create published offer.
+
+        :param title: string Offer title
+        """
+        return Offer.objects.create(
+            organization=self.organization,
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'',
+            title=title,
+            offer_status='published',
+            **kwargs
+        )
+
+    def _statuses(self, offer):
+        u"""Return current action and recruitment statuses of offer."""
+        offer = Offer.objects.get(id=offer.id)
+        return offer.action_status, offer.recruitment_status
+
+    def test__action_status(self):
+        u"""Actions start and finish according to their dates."""
+        hour = timedelta(hours=1)
+        starting = self._create_offer(
+            u'Starting',
+            action_status='future',
+            started_at=self.now - hour,
+            finished_at=self.now + hour,
+        )
+        waiting = self._create_offer(
+            u'Waiting',
+            action_status='future',
+            started_at=self.now + hour,
+        )
+        finishing = self._create_offer(
+            u'Finishing',
+            action_status='ongoing',
+            started_at=self.now - 2 * hour,
+            finished_at=self.now - hour,
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            changed = Offer.objects.update_statuses(self.now)
+        self.assertEqual(
+            len([q for q in context.captured_queries
+                 if 'UPDATE "volontulo_offer"' in q['sql']]),
+            5,
+        )
+        self.assertEqual(changed, {
+            'finished': 1,
+            'ongoing': 1,
+            'open': 0,
+            'supplemental': 0,
+            'closed': 1,
+        })
+        self.assertEqual(self._statuses(starting), ('ongoing', 'open'))
+        self.assertEqual(self._statuses(waiting), ('future', 'open'))
+        self.assertEqual(self._statuses(finishing), ('finished', 'closed'))
+        self.assertIn(finishing, Offer.objects.get_archived())
+
+    def test__recruitment_status(self):
+        u"""Recruitment moves to reserve recruitment and closes."""
+        hour = timedelta(hours=1)
+        reserve = self._create_offer(
+            u'Reserve',
+            recruitment_end_date=self.now - hour,
+            reserve_recruitment=True,
+            reserve_recruitment_end_date=self.now + hour,
+        )
+        no_reserve = self._create_offer(
+            u'No reserve',
+            recruitment_end_date=self.now - hour,
+            reserve_recruitment=False,
+        )
+        recruiting = self._create_offer(
+            u'Recruiting',
+            recruitment_end_date=self.now + hour,
+        )
+
+        Offer.objects.update_statuses(self.now)
+        self.assertEqual(self._statuses(reserve), ('ongoing', 'supplemental'))
+        self.assertEqual(self._statuses(no_reserve), ('ongoing', 'closed'))
+        self.assertEqual(self._statuses(recruiting), ('ongoing', 'open'))
+
+        Offer.objects.update_statuses(self.now + 2 * hour)
+        self.assertEqual(self._statuses(reserve), ('ongoing', 'closed'))
+        # reserve recruitment without end date is not held:
+        self.assertEqual(self._statuses(recruiting), ('ongoing', 'closed'))
+
+    def test__reserve_recruitment_starting_later(self):
+        u"""Recruitment is closed until reserve recruitment starts."""
+        hour = timedelta(hours=1)
+        offer = self._create_offer(
+            u'Reserve later',
+            recruitment_end_date=self.now - hour,
+            reserve_recruitment_start_date=self.now + hour,
+            reserve_recruitment_end_date=self.now + 3 * hour,
+        )
+
+        Offer.objects.update_statuses(self.now)
+        self.assertEqual(self._statuses(offer), ('ongoing', 'closed'))
+        Offer.objects.update_statuses(self.now + 2 * hour)
+        self.assertEqual(self._statuses(offer), ('ongoing', 'supplemental'))
+        Offer.objects.update_statuses(self.now + 4 * hour)
+        self.assertEqual(self._statuses(offer), ('ongoing', 'closed'))
+
+    def test__recruitment_starting_later(self):
+        u"""Recruitment opens when its start date passes."""
+        hour = timedelta(hours=1)
+        offer = self._create_offer(
+            u'Recruitment later',
+            recruitment_start_date=self.now + hour,
+            recruitment_end_date=self.now + 3 * hour,
+        )
+
+        Offer.objects.update_statuses(self.now)
+        self.assertEqual(self._statuses(offer), ('ongoing', 'closed'))
+        self.assertNotIn(offer, Offer.objects.get_active())
+        Offer.objects.update_statuses(self.now + 2 * hour)
+        self.assertEqual(self._statuses(offer), ('ongoing', 'open'))
+        self.assertIn(offer, Offer.objects.get_active())
+
+    def test__update_offers_statuses_command(self):
+        u"""Management command applies due transitions."""
+        self._create_offer(
+            u'Finishing',
+            finished_at=self.now - timedelta(hours=1),
+        )
+        stdout = StringIO()
+        call_command('update_offers_statuses', stdout=stdout)
+        self.assertIn(u'finished: 1', stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('update_offers_statuses', stdout=stdout)
+        self.assertEqual(stdout.getvalue(), u'')
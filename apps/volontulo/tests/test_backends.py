@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_backends
+"""
+from django.db import connection
+from django.test import Client
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.volontulo.backends import UserProfileBackend
+from apps.volontulo.models import Offer
+from apps.volontulo.models import Organization
+from apps.volontulo.tests import common
+
+
+class TestUserProfileBackend(TestCase):
+    u"""Class responsible for testing authentication backend."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        cls.admin = common.initialize_administrator()
+        _, cls.organization = \
+            common.initialize_filled_volunteer_and_organization()
+        Offer.objects.create(
+            organization=Organization.objects.create(name=u'Organizacja'),
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'',
+            title=u'Oferta innej organizacji',
+        )
+        cls.organization_user = cls.organization.userprofiles.get().user
+
+    def test__get_user_with_profile(self):
+        u"""User is fetched together with its profile."""
+        with self.assertNumQueries(1):
+            user = UserProfileBackend().get_user(self.admin.id)
+            self.assertTrue(user.userprofile.is_administrator)
+
+    def test__get_nonexisting_user(self):
+        u"""None is returned for nonexisting user."""
+        self.assertIsNone(UserProfileBackend().get_user(0))
+
+    def test__profile_loaded_once_per_request(self):
+        u"""Logged user profile is not fetched separately in request."""
+        client = Client()
+        client.post('/login', {
+            'email': u'admin_user@example.com',
+            'password': 'admin_password',
+        })
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/offers')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'FROM "volontulo_userprofile"' in query['sql']
+        ])
+
+    def test__organizations_selected_once(self):
+        u"""Permissions for many offers are checked with single query."""
+        profile = UserProfileBackend().get_user(
+            self.organization_user.id,
+        ).userprofile
+        offers = list(Offer.objects.all())
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [profile.can_edit_offer(offer=offer) for offer in offers],
+                [offer.organization_id == self.organization.id
+                 for offer in offers],
+            )
+
+    def test__organizations_reset_when_changed(self):
+        u"""Memoized organizations are reset when profile joins one."""
+        profile = UserProfileBackend().get_user(
+            self.organization_user.id,
+        ).userprofile
+        other = Organization.objects.create(name=u'Inna organizacja')
+        self.assertFalse(profile.can_edit_organization(other.id))
+        profile.organizations.add(other)
+        self.assertTrue(profile.can_edit_organization(other.id))
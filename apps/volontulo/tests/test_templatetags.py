@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_templatetags
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import UserProfile
+from apps.volontulo.templatetags.offer_utilities import offer_card
+
+
+class TestOfferCard(TestCase):
+    u"""Class responsible for testing cached offer cards."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        organization = Organization.objects.create(name=u'Organization')
+        Offer.objects.create(
+            organization=organization,
+            description=u'',
+            time_commitment=u'',
+            benefits=u'',
+            location=u'Kraków',
+            title=u'Offer',
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        self.offer = Offer.objects.get_cards().get()
+
+    def test__revisions(self):
+        u"""Every save creates new revision."""
+        revision = self.offer.revision
+        self.offer.save()
+        self.offer.save(update_fields=['title'])
+        self.assertEqual(Offer.objects.get().revision, revision + 2)
+        self.assertEqual(self.offer.revision, revision + 2)
+
+    def test__concurrent_revisions(self):
+        u"""Saves of stale instances create different revisions."""
+        revision = self.offer.revision
+        other = Offer.objects.get()
+        self.offer.save()
+        other.save()
+        self.assertEqual(self.offer.revision, revision + 1)
+        self.assertEqual(other.revision, revision + 2)
+
+    def test__main_image_deleted(self):
+        u"""Removing main image creates new revision of offer."""
+        user = User.objects.create_user(u'volunteer@example.com')
+        image = OfferImage.objects.create(
+            userprofile=UserProfile.objects.create(user=user),
+            offer=self.offer,
+            path=u'offers/image.jpg',
+            is_main=True,
+        )
+        self.offer.main_image = image
+        self.offer.save(update_fields=['main_image'])
+        revision = self.offer.revision
+
+        image.delete()
+        offer = Offer.objects.get()
+        self.assertIsNone(offer.main_image_id)
+        self.assertGreater(offer.revision, revision)
+
+    def test__card_cached(self):
+        u"""Card is rendered once and served from cache later."""
+        card = offer_card(self.offer, 'homepage')
+        self.assertIn(u'Kraków', card)
+        with self.assertTemplateNotUsed('offers/cards/homepage.html'):
+            self.assertEqual(offer_card(self.offer, 'homepage'), card)
+
+    def test__card_rendered_after_change(self):
+        u"""Card is rendered again when offer or organization changes."""
+        offer_card(self.offer, 'list_row')
+        self.offer.location = u'Gdańsk'
+        self.offer.save()
+        self.assertIn(u'Gdańsk', offer_card(self.offer, 'list_row'))
+
+        self.offer.organization.name = u'Fundacja'
+        self.offer.organization.save()
+        self.assertIn(u'Fundacja', offer_card(self.offer, 'list_row'))
+        self.assertNotIn(u'Fundacja',
+                         offer_card(self.offer, 'organization_row'))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_utils
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.volontulo.models import UserProfile
+from apps.volontulo.tests import common
+from apps.volontulo.utils import get_administrators_emails
+
+
+class TestAdministratorsEmails(TestCase):
+    u"""Class responsible for testing cached administrators emails."""
+
+    def setUp(self):
+        u"""Set up each test."""
+        cache.clear()
+        self.admin = common.initialize_administrator()
+
+    def test__administrators_emails_cached(self):
+        u"""Administrators emails are fetched once with single query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_administrators_emails(),
+                {str(self.admin.id): u'admin_user@example.com'},
+            )
+        with self.assertNumQueries(0):
+            get_administrators_emails()
+
+    def test__superusers_emails(self):
+        u"""Superusers are used, when there are no administrators."""
+        UserProfile.objects.filter(user=self.admin).delete()
+        superuser = User.objects.create_superuser(
+            'superuser@example.com',
+            'superuser@example.com',
+            'superuser',
+        )
+        self.assertEqual(
+            get_administrators_emails(),
+            {str(superuser.id): u'superuser@example.com'},
+        )
+
+    def test__new_administrator_invalidates_cache(self):
+        u"""Cache is invalidated when new administrator appears."""
+        get_administrators_emails()
+        common.initialize_administrator(
+            'admin2@example.com',
+            'admin2@example.com',
+        )
+        self.assertEqual(
+            sorted(get_administrators_emails().values()),
+            [u'admin2@example.com', u'admin_user@example.com'],
+        )
+
+    def test__administrator_change_invalidates_cache(self):
+        u"""Cache is invalidated when administrator email or role changes."""
+        get_administrators_emails()
+        self.admin.email = u'new_admin@example.com'
+        self.admin.save()
+        self.assertEqual(
+            list(get_administrators_emails().values()),
+            [u'new_admin@example.com'],
+        )
+
+        profile = UserProfile.objects.get(user=self.admin)
+        profile.is_administrator = False
+        profile.save()
+        self.assertEqual(get_administrators_emails(), {})
+
+    def test__volunteer_change_keeps_cache(self):
+        u"""Cache is kept, when not related user changes."""
+        get_administrators_emails()
+        common.initialize_empty_volunteer()
+        with self.assertNumQueries(0):
+            get_administrators_emails()
@@ -7,6 +7,7 @@ from django.core import mail
 from django.test import Client
 from django.test import TestCase
 
+from apps.volontulo.lib.email import send_queued_emails
 from apps.volontulo.tests import common
 
 
@@ -158,6 +159,7 @@ class TestPages(TestCase):
         self.assertContains(response, u'Formularz kontaktowy')
         # pylint: disable=no-member
         self.assertIn('contact_form', response.context)
+        send_queued_emails()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt z administratorem')
         self.assertContains(response, u'Email został wysłany.')
@@ -228,6 +230,7 @@ class TestPages(TestCase):
         self.assertContains(response, u'Formularz kontaktowy')
         # pylint: disable=no-member
         self.assertIn('contact_form', response.context)
+        send_queued_emails()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt z administratorem')
         self.assertContains(response, u'Email został wysłany.')
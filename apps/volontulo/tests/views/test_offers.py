@@ -5,12 +5,19 @@ u"""
 """
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
 
+from apps.volontulo.lib.search import offer_index
 from apps.volontulo.models import (
     Offer, Organization, UserProfile
 )
+from apps.volontulo.tests import common
+from apps.volontulo.views.offers import VOLUNTEERS_SHOWN
 
 
 class TestOffersList(TestCase):
@@ -89,6 +96,7 @@ class TestOffersList(TestCase):
 
     def setUp(self):
         u"""Set up each test."""
+        cache.clear()
         self.client = Client()
 
     # pylint: disable=invalid-name
@@ -956,6 +964,82 @@ class TestOffersJoin(TestCase):
         )
 
 
+class TestOffersReorder(TestCase):
+    u"""Class responsible for testing offers' reorder page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        organization = Organization.objects.create(
+            name='Organization',
+            address='',
+            description='',
+        )
+        cls.offers = [Offer.objects.create(
+            organization=organization,
+            description='',
+            requirements='',
+            time_commitment='',
+            benefits='',
+            location='',
+            title='volontulo offer {}'.format(i),
+            time_period='',
+            offer_status='published',
+            weight=i,
+        ) for i in range(3)]
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.client = Client()
+
+    def test_offers_reorder_single_update(self):
+        u"""Test that all weights are changed with one update query."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/offers/reorder/', {
+                'submit': 'reorder',
+                'weight_{}'.format(self.offers[0].id): 5,
+                'weight_{}'.format(self.offers[1].id): 1,
+                'weight_{}'.format(self.offers[2].id): -3,
+                'weight_0': 7,
+            })
+        updates = [
+            query for query in context.captured_queries
+            if 'UPDATE "volontulo_offer"' in query['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(
+            response,
+            '/offers',
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(
+            [o.weight for o in Offer.objects.order_by('id')],
+            [5, 1, -3],
+        )
+        response = self.client.get('/offers')
+        self.assertContains(
+            response,
+            u'Uporządkowano oferty. Liczba zmienionych ofert: 2.'
+        )
+
+    def test_offers_reorder_invalid_weight(self):
+        u"""Test that invalid weights leave offers untouched."""
+        response = self.client.post('/offers/reorder/', {
+            'submit': 'reorder',
+            'weight_{}'.format(self.offers[0].id): 5,
+            'weight_{}'.format(self.offers[1].id): 'first',
+        }, follow=True)
+        self.assertRedirects(response, '/offers/reorder/', 302, 200)
+        self.assertContains(
+            response,
+            u'Wagi ofert muszą być liczbami całkowitymi.'
+        )
+        self.assertEqual(
+            [o.weight for o in Offer.objects.order_by('id')],
+            [0, 1, 2],
+        )
+
+
 class TestOffersArchived(TestCase):
     u"""Class responsible for testing archived offers page."""
 
@@ -1017,3 +1101,183 @@ class TestOffersArchived(TestCase):
             response,
             'Brak ofert spełniających podane kryteria',
         )
+
+
+class TestOffersSearch(TestCase):
+    u"""Class responsible for testing offers' search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        organization = Organization.objects.create(
+            name=u'Fundacja Zwierzęta',
+            address='',
+            description='',
+        )
+        common_offer_data = {
+            'organization': organization,
+            'requirements': '',
+            'time_commitment': '',
+            'benefits': '',
+            'time_period': '',
+            'offer_status': 'published',
+            'recruitment_status': 'open',
+            'action_status': 'ongoing',
+        }
+        cls.shelter_offer = Offer.objects.create(
+            title=u'Pomoc w schronisku',
+            description=u'Spacery z psami',
+            location=u'Kraków',
+            **common_offer_data
+        )
+        cls.library_offer = Offer.objects.create(
+            title=u'Pomoc w bibliotece',
+            description=u'Czytanie książek dzieciom w schronisku',
+            location=u'Wrocław',
+            **common_offer_data
+        )
+        common_offer_data['offer_status'] = 'unpublished'
+        Offer.objects.create(
+            title=u'Schronisko szuka wolontariuszy',
+            description='',
+            location='',
+            **common_offer_data
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        offer_index.clear()
+
+    def tearDown(self):
+        u"""Tear down each test."""
+        offer_index.clear()
+
+    def test_offers_search(self):
+        u"""Only active offers are found, best matching first."""
+        response = self.client.get('/offers/search', {'q': u'schroniska'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'offers/offers_list.html')
+        self.assertEqual(response.context['query'], u'schroniska')
+        self.assertEqual(
+            list(response.context['offers']),
+            [self.shelter_offer, self.library_offer],
+        )
+
+        response = self.client.get('/offers/search',
+                                   {'q': u'spacery schronisko'})
+        self.assertEqual(list(response.context['offers']),
+                         [self.shelter_offer])
+
+    def test_offers_search_organization_name(self):
+        u"""Offers are found by name of their organization."""
+        response = self.client.get('/offers/search', {'q': u'zwierzeta'})
+        self.assertEqual(len(response.context['offers']), 2)
+
+    def test_offers_search_empty_query(self):
+        u"""Nothing is found for empty query."""
+        response = self.client.get('/offers/search', {'q': u' '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['offers']), 0)
+        self.assertContains(response, u'Brak ofert')
+
+
+class TestOfferVolunteersCsv(TestCase):
+    u"""Class responsible for testing CSV export of offer volunteers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        common.initialize_administrator()
+        cls.volunteer, cls.organization = \
+            common.initialize_filled_volunteer_and_organization()
+        cls.offer = cls.organization.offer_set.filter(
+            offer_status='published',
+        ).first()
+        cls.url = '/offers/{}/{}/volunteers.csv'.format(
+            slugify(cls.offer.title),
+            cls.offer.id,
+        )
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.client = Client()
+
+    def login(self, email, password):
+        u"""Log user in.
+
+        :param email: string User email
+        :param password: string User password
+        """
+        self.client.post('/login', {'email': email, 'password': password})
+
+    def test_anonymous(self):
+        u"""Test that anonymous user is asked to log in."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response['Location'])
+
+    def test_volunteer(self):
+        u"""Test that volunteer can't export volunteers."""
+        self.login('volunteer2@example.com', 'volunteer2')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_organization_member(self):
+        u"""Test CSV export for member of offer's organization."""
+        self.login('organization2@example.com', 'organization2')
+        response = self.client.get(self.url)
+        lines = b''.join(response.streaming_content).decode(
+            'utf-8'
+        ).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="wolontariusze-oferta-{}.csv"'.format(
+                self.offer.id,
+            ),
+        )
+        self.assertEqual(len(lines), 2)
+        self.assertIn(u'volunteer2@example.com', lines[1])
+
+    def test_administrator(self):
+        u"""Test CSV export for administrator."""
+        self.login('admin_user@example.com', 'admin_password')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_offer_page_limits_volunteers(self):
+        u"""Test that offer page lists limited number of volunteers."""
+        for i in range(VOLUNTEERS_SHOWN):
+            self.offer.volunteers.add(User.objects.create_user(
+                'csv{}@example.com'.format(i),
+                'csv{}@example.com'.format(i),
+                'csv',
+            ))
+        self.login('organization2@example.com', 'organization2')
+        response = self.client.get('/offers/{}/{}'.format(
+            slugify(self.offer.title),
+            self.offer.id,
+        ))
+
+        self.assertEqual(len(response.context['volunteers']), VOLUNTEERS_SHOWN)
+        self.assertTrue(response.context['more_volunteers'])
+        self.assertContains(response, self.url)
+
+    def test_offer_page_for_member_with_other_profile_id(self):
+        u"""Test volunteers shown to member whose profile id isn't user id."""
+        user = User.objects.create_user(
+            'member@example.com',
+            'member@example.com',
+            'member',
+        )
+        profile = UserProfile.objects.create(id=user.id + 100, user=user)
+        profile.organizations.add(self.organization)
+        self.login('member@example.com', 'member')
+        response = self.client.get('/offers/{}/{}'.format(
+            slugify(self.offer.title),
+            self.offer.id,
+        ))
+
+        self.assertEqual(len(response.context['volunteers']), 1)
+        self.assertContains(response, self.url)
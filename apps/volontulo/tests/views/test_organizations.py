@@ -6,6 +6,7 @@ u"""
 from django.test import Client
 from django.test import TestCase
 
+from apps.volontulo.lib.pagination import PER_PAGE
 from apps.volontulo.models import Organization
 from apps.volontulo.tests import common
 
@@ -38,3 +39,65 @@ class TestOrganizations(TestCase):
         # pylint: disable=no-member
         self.assertIn('organizations', response.context)
         self.assertEqual(Organization.objects.all().count(), 2)
+
+    def test__organization_list_pagination(self):
+        u"""Test that organization list is split into pages."""
+        for i in range(PER_PAGE):
+            Organization.objects.create(name=u'Organizacja {:02}'.format(i))
+
+        response = self.client.get('/organizations')
+        self.assertEqual(len(response.context['organizations']), PER_PAGE)
+        self.assertContains(response, u'Następna strona')
+        self.assertNotContains(response, u'Poprzednia strona')
+
+        response = self.client.get('/organizations', {
+            'after': response.context['page'].next_cursor,
+        })
+        self.assertEqual(len(response.context['organizations']), 2)
+        self.assertContains(response, u'Poprzednia strona')
+        self.assertNotContains(response, u'Następna strona')
+
+    def test__organization_volunteers_csv_anonymous(self):
+        u"""Test that anonymous user is asked to log in for CSV export."""
+        response = self.client.get(
+            '/organizations/organization-2/{}/volunteers.csv'.format(
+                self.organization2.id,
+            )
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login', response['Location'])
+
+    def test__organization_volunteers_csv_forbidden(self):
+        u"""Test that volunteer can't export organization volunteers."""
+        self.client.post('/login', {
+            'email': 'volunteer2@example.com',
+            'password': 'volunteer2',
+        })
+        response = self.client.get(
+            '/organizations/organization-2/{}/volunteers.csv'.format(
+                self.organization2.id,
+            )
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test__organization_volunteers_csv(self):
+        u"""Test CSV export of volunteers of all organization offers."""
+        self.client.post('/login', {
+            'email': 'organization2@example.com',
+            'password': 'organization2',
+        })
+        response = self.client.get(
+            '/organizations/organization-2/{}/volunteers.csv'.format(
+                self.organization2.id,
+            )
+        )
+        lines = b''.join(response.streaming_content).decode(
+            'utf-8'
+        ).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertTrue(lines[0].startswith(u'\ufeffID oferty,'))
+        self.assertEqual(len(lines), 5)
+        for line in lines[1:]:
+            self.assertIn(u'volunteer2@example.com', line)
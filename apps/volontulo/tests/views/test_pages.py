@@ -3,9 +3,18 @@
 u"""
 .. module:: test_pages
 """
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import Client
 from django.test import TestCase
+from django.utils.six import StringIO
 
+from apps.volontulo.lib.static_pages import list_pages
+from apps.volontulo.lib.static_pages import prebuilt_page_path
 from apps.volontulo.tests import common
 
 
@@ -20,6 +29,7 @@ class TestPages(TestCase):
 
     def setUp(self):
         u"""Set up each test."""
+        cache.clear()
         self.client = Client()
 
     def test__homepage_for_anonymous(self):
@@ -108,3 +118,96 @@ class TestPages(TestCase):
         self.assertTemplateUsed(response, 'pages/office.html')
         self.assertContains(response,
                             u'Dyżury dla wolontariuszy oraz organizacji')
+
+
+class TestPrebuiltPages(TestCase):
+    u"""Tests for serving static pages prebuilt for anonymous users."""
+
+    def setUp(self):
+        u"""Build pages into temporary STATIC_ROOT."""
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        settings_override = self.settings(STATIC_ROOT=static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('build_static_pages', stdout=StringIO())
+        self.client = Client()
+
+    def test_built_pages(self):
+        u"""Test that all pages are built."""
+        for name in list_pages():
+            for variant in ('banner', 'accepted'):
+                self.assertTrue(os.path.isfile(
+                    prebuilt_page_path(name, variant)
+                ))
+
+    def test_anonymous_gets_prebuilt_page(self):
+        u"""Test that prebuilt page is streamed without rendering."""
+        with self.assertNumQueries(0):
+            response = self.client.get('/office')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIsNone(response.context)
+        self.assertIn(u'Przyjdź na dyżur', b''.join(
+            response.streaming_content
+        ).decode('utf-8'))
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_cookie_law_banner(self):
+        u"""Test that banner isn't shown to users who accepted cookies."""
+        response = self.client.get('/office')
+        self.assertIn(u'CookielawBanner', b''.join(
+            response.streaming_content
+        ).decode('utf-8'))
+        self.assertEqual(response['Vary'], 'Cookie')
+
+        self.client.cookies['cookielaw_accepted'] = '1'
+        with self.assertNumQueries(0):
+            response = self.client.get('/office')
+        self.assertTrue(response.streaming)
+        self.assertNotIn(u'CookielawBanner', b''.join(
+            response.streaming_content
+        ).decode('utf-8'))
+
+    def test_not_modified(self):
+        u"""Test conditional requests for prebuilt page."""
+        response = self.client.get('/pages/regulations')
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        response.close()
+
+        response = self.client.get(
+            '/pages/regulations',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            '/pages/regulations',
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            '/pages/regulations',
+            HTTP_IF_NONE_MATCH='"other"',
+        )
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_logged_user_gets_rendered_page(self):
+        u"""Test that logged user gets freshly rendered page."""
+        common.initialize_administrator()
+        self.client.post('/login', {
+            'email': u'admin_user@example.com',
+            'password': 'admin_password',
+        })
+        response = self.client.get('/o-nas')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'pages/about-us.html')
+
+    def test_missing_page(self):
+        u"""Test that page without template is still not found."""
+        response = self.client.get('/pages/missing')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+u"""
+.. module:: test_query_budget
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+
+from apps.volontulo.lib.pagination import PER_PAGE
+from apps.volontulo.models import Offer
+from apps.volontulo.models import OfferImage
+from apps.volontulo.models import Organization
+from apps.volontulo.models import OrganizationGallery
+from apps.volontulo.models import UserProfile
+from apps.volontulo.tests import common
+
+# offer status, action status, recruitment status of created offers:
+OFFER_STATES = (
+    ('published', 'ongoing', 'open'),
+    ('published', 'finished', 'closed'),
+    ('unpublished', 'future', 'open'),
+)
+IMAGES_PER_OFFER = 3
+
+# maximal numbers of queries of views, whatever number of offers:
+BUDGETS = {
+    'homepage': 1,
+    'offers_list': 1,
+    'offers_list_administrator': 3,
+    'offers_archived': 1,
+    'offers_view': 4,
+    'offers_view_administrator': 7,
+    'organization_view': 3,
+    'organizations_list': 1,
+    'logged_user_profile': 8,
+}
+
+
+class TestQueryBudget(TestCase):
+    u"""Tests guarding number of queries of listing and detail views.
+
+    Each view is requested, then more offers, images and volunteers are
+    added and view is requested again - number of its queries must be
+    within budget and must not change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        u"""Set up data for all tests."""
+        common.initialize_administrator()
+        cls.organization = Organization.objects.create(
+            name=u'Organizacja z ofertami',
+            address=u'Poznań',
+            description=u'Opis organizacji',
+        )
+        cls.member = User.objects.create_user(
+            'member@example.com',
+            'member@example.com',
+            'member',
+        )
+        member_profile = UserProfile.objects.create(user=cls.member)
+        member_profile.organizations.add(cls.organization)
+        cls.volunteer = User.objects.create_user(
+            'volunteer@example.com',
+            'volunteer@example.com',
+            'volunteer',
+        )
+        cls.volunteer_profile = UserProfile.objects.create(
+            user=cls.volunteer,
+        )
+        cls.add_offers(PER_PAGE // 2)
+
+    @classmethod
+    def viewed_offer(cls):
+        u"""Return offer requested by offer details tests."""
+        return cls.organization.offer_set.filter(
+            offer_status='published',
+        ).order_by('id').first()
+
+    @classmethod
+    def add_user(cls):
+        u"""Create user with profile and return its profile."""
+        email = 'user{}@example.com'.format(User.objects.count())
+        return UserProfile.objects.create(
+            user=User.objects.create_user(email, email, 'user'),
+        )
+
+    @classmethod
+    def add_offers(cls, count):
+        u"""Add offers in every state, with images and volunteers.
+
+        Viewed offer gets more volunteers and organization more members,
+        so queries growing with data of details pages are caught too.
+
+        :param count: Integer number of offers in each state
+        """
+        organization = Organization.objects.create(
+            name=u'Organizacja {}'.format(Organization.objects.count()),
+        )
+        for i in range(count):
+            for offer_status, action_status, recruitment_status in \
+                    OFFER_STATES:
+                for owner in (cls.organization, organization):
+                    offer = Offer.objects.create(
+                        organization=owner,
+                        title=u'Oferta {}'.format(i),
+                        description=u'Opis',
+                        time_commitment=u'Czas',
+                        benefits=u'Korzyści',
+                        location=u'Poznań',
+                        offer_status=offer_status,
+                        action_status=action_status,
+                        recruitment_status=recruitment_status,
+                    )
+                    for j in range(IMAGES_PER_OFFER):
+                        image = OfferImage.objects.create(
+                            userprofile=cls.volunteer_profile,
+                            offer=offer,
+                            path='offers/{}-{}.jpg'.format(offer.id, j),
+                            is_main=not j,
+                        )
+                        if not j:
+                            offer.main_image = image
+                            offer.save()
+                    offer.volunteers.add(cls.volunteer)
+            OrganizationGallery.objects.create(
+                organization=cls.organization,
+                published_by=cls.volunteer_profile,
+                path='gallery/{}-{}.jpg'.format(organization.id, i),
+            )
+            cls.viewed_offer().volunteers.add(cls.add_user().user)
+            cls.add_user().organizations.add(cls.organization)
+
+    def setUp(self):
+        u"""Set up each test."""
+        self.client = Client()
+
+    def count_queries(self, url):
+        u"""Return number of queries of rendering page, cached data cleared.
+
+        :param url: string Requested URL
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertWithinBudget(self, name, url):  # pylint: disable=invalid-name
+        u"""Assert that queries of page are within budget and don't grow.
+
+        :param name: string Budget name, one of BUDGETS keys
+        :param url: string Requested URL
+        """
+        before = self.count_queries(url)
+        self.add_offers(PER_PAGE)
+        after = self.count_queries(url)
+
+        self.assertLessEqual(before, BUDGETS[name], u"{}: {} queries".format(
+            name, before,
+        ))
+        self.assertEqual(before, after, u"{}: {} queries grew to {}".format(
+            name, before, after,
+        ))
+
+    def login(self, email, password):
+        u"""Log user in.
+
+        :param email: string User email
+        :param password: string User password
+        """
+        self.client.post('/login', {'email': email, 'password': password})
+
+    def test_homepage(self):
+        u"""Test homepage queries."""
+        self.assertWithinBudget('homepage', '/')
+
+    def test_offers_list(self):
+        u"""Test offers list queries for anonymous user."""
+        self.assertWithinBudget('offers_list', '/offers')
+
+    def test_offers_list_for_administrator(self):
+        u"""Test offers list queries for administrator."""
+        self.login('admin_user@example.com', 'admin_password')
+        self.assertWithinBudget('offers_list_administrator', '/offers')
+
+    def test_offers_archived(self):
+        u"""Test archived offers queries."""
+        self.assertWithinBudget('offers_archived', '/offers/archived')
+
+    def test_offers_view(self):
+        u"""Test offer details queries for anonymous user."""
+        offer = self.viewed_offer()
+        self.assertWithinBudget('offers_view', '/offers/{}/{}'.format(
+            slugify(offer.title), offer.id,
+        ))
+
+    def test_offers_view_for_administrator(self):
+        u"""Test offer details queries for administrator, with volunteers."""
+        offer = self.viewed_offer()
+        self.login('admin_user@example.com', 'admin_password')
+        self.assertWithinBudget(
+            'offers_view_administrator',
+            '/offers/{}/{}'.format(slugify(offer.title), offer.id),
+        )
+
+    def test_organization_view(self):
+        u"""Test organization details queries."""
+        self.assertWithinBudget(
+            'organization_view',
+            '/organizations/{}/{}'.format(
+                slugify(self.organization.name),
+                self.organization.id,
+            ),
+        )
+
+    def test_organizations_list(self):
+        u"""Test organizations list queries."""
+        self.assertWithinBudget('organizations_list', '/organizations')
+
+    def test_logged_user_profile(self):
+        u"""Test profile queries of organization member."""
+        self.login('member@example.com', 'member')
+        self.assertWithinBudget('logged_user_profile', '/me')
+
+    def test_logged_user_profile_for_volunteer(self):
+        u"""Test profile queries of volunteer who joined many offers."""
+        self.login('volunteer@example.com', 'volunteer')
+        self.assertWithinBudget('logged_user_profile', '/me')
@@ -5,6 +5,7 @@ u"""
 """
 from django.core import mail
 
+from apps.volontulo.lib.email import send_queued_emails
 from apps.volontulo.tests.views.test_organizations import TestOrganizations
 
 
@@ -210,6 +211,7 @@ class TestCreateOrganization(TestOrganizations):
             '/organizations/organization-2/{}'.format(self.organization2.id),
             form_params
         )
+        send_queued_emails()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt od wolontariusza')
         self.assertContains(
@@ -238,6 +240,7 @@ class TestCreateOrganization(TestOrganizations):
         )
 
         self.assertEqual(response.status_code, 200)
+        send_queued_emails()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, u'Kontakt od wolontariusza')
         self.assertContains(
@@ -42,6 +42,11 @@ urlpatterns = [  # pylint: disable=invalid-name
 
     # offers' namesapce:
     url(r'^offers$', offers_views.OffersList.as_view(), name='offers_list'),
+    url(
+        r'^offers/search$',
+        offers_views.OffersSearch.as_view(),
+        name='offers_search'
+    ),
     url(
         r'^offers/delete/(?P<pk>[0-9]+)$',
         offers_views.OffersDelete.as_view(),
@@ -72,6 +77,11 @@ urlpatterns = [  # pylint: disable=invalid-name
         offers_views.OffersView.as_view(),
         name='offers_view'
     ),
+    url(
+        r'^offers/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/volunteers\.csv$',
+        offers_views.offer_volunteers_csv,
+        name='offers_volunteers_csv'
+    ),
     url(
         r'^offers/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/edit$',
         offers_views.OffersEdit.as_view(),
@@ -82,7 +92,6 @@ urlpatterns = [  # pylint: disable=invalid-name
         offers_views.OffersJoin.as_view(),
         name='offers_join'
     ),
-    # offers/filter
 
     # users' namesapce:
     # users
@@ -111,6 +120,11 @@ urlpatterns = [  # pylint: disable=invalid-name
         orgs_views.organization_form,
         name='organization_form'
     ),
+    url(
+        r'^organizations/(?P<slug>[\w-]+)/(?P<id_>[0-9]+)/volunteers\.csv$',
+        orgs_views.organization_volunteers_csv,
+        name='organization_volunteers_csv'
+    ),
     # organizations/filter
     # organizations/<slug>/<id>/contact
 
@@ -142,6 +156,11 @@ urlpatterns = [  # pylint: disable=invalid-name
         admin_views.main_panel,
         name='admin_panel'
     ),
+    url(
+        r'^panel/metrics$',
+        admin_views.metrics_panel,
+        name='admin_metrics'
+    ),
     url(
         r'^newsletter$',
         views.newsletter_signup,
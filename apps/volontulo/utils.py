@@ -6,12 +6,11 @@ u"""
 from django.contrib.admin.models import LogEntry
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.utils.text import slugify
 
-from apps.volontulo.models import UserProfile
-
 
 # Offers statuses dictionary with meaningful names.
 # todo: remove dependency
@@ -23,6 +22,11 @@ OFFERS_STATUSES = {
     'CLOSED': u"Zamknięta",
 }
 
+ADMINISTRATORS_EMAILS_CACHE_KEY = 'volontulo:administrators_emails'
+# cache is invalidated by signals, timeout only limits staleness in case of
+# multiple processes using separate local memory caches:
+ADMINISTRATORS_EMAILS_CACHE_TIMEOUT = 60 * 10
+
 
 def get_administrators_emails():
     u"""Get all administrators emails or superuser email
@@ -33,19 +37,44 @@ def get_administrators_emails():
         2: 'admin2@example.com',
     }
     """
-    administrators = UserProfile.objects.filter(is_administrator=True)
-    emails = {}
-    for admin in administrators:
-        emails[str(admin.user.id)] = admin.user.email
+    emails = cache.get(ADMINISTRATORS_EMAILS_CACHE_KEY)
+    if emails is None:
+        emails = _fetch_administrators_emails()
+        cache.set(
+            ADMINISTRATORS_EMAILS_CACHE_KEY,
+            emails,
+            ADMINISTRATORS_EMAILS_CACHE_TIMEOUT,
+        )
+    return dict(emails)
+
+
+def _fetch_administrators_emails():
+    u"""Fetch administrators emails or superuser emails from database."""
+    administrators = User.objects.filter(
+        userprofile__is_administrator=True
+    ).values_list('id', 'email')
+    emails = {str(id_): email for id_, email in administrators}
 
     if not emails:
-        administrators = User.objects.filter(is_superuser=True)
-        for admin in administrators:
-            emails[str(admin.id)] = admin.email
+        administrators = User.objects.filter(
+            is_superuser=True
+        ).values_list('id', 'email')
+        emails = {str(id_): email for id_, email in administrators}
 
     return emails
 
 
+def invalidate_administrators_emails(user_id, is_administrator):
+    u"""Drop cached administrators emails if given user could change them.
+
+    :param user_id: int User database unique identifier (primary key)
+    :param is_administrator: Boolean flag if user is administrator now
+    """
+    emails = cache.get(ADMINISTRATORS_EMAILS_CACHE_KEY)
+    if emails is not None and (is_administrator or str(user_id) in emails):
+        cache.delete(ADMINISTRATORS_EMAILS_CACHE_KEY)
+
+
 def save_history(req, obj, action):
     u"""Save model changes history."""
     LogEntry.objects.log_action(
@@ -17,24 +17,30 @@ from apps.volontulo.forms import EditProfileForm
 from apps.volontulo.forms import OrganizationGalleryForm
 from apps.volontulo.forms import UserGalleryForm
 from apps.volontulo.lib.email import send_mail
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import ORGANIZATIONS
+from apps.volontulo.lib.page_cache import cache_anonymous_page
+from apps.volontulo.lib.page_cache import is_cacheable
+from apps.volontulo.lib.static_pages import serve_prebuilt_page
 from apps.volontulo.models import Offer
 from apps.volontulo.models import OrganizationGallery
-from apps.volontulo.models import UserProfile
 
 
 def logged_as_admin(request):
     u""""Helper function that provide information is user has admin privilege.
 
-    It is used in separate modules.
+    It is used in separate modules. User profile is loaded together with
+    request.user, so this check doesn't query database.
 
     :param request: WSGIRequest instance
     """
     return (
         request.user.is_authenticated() and
-        UserProfile.objects.get(user=request.user).is_administrator
+        request.user.userprofile.is_administrator
     )
 
 
+@cache_anonymous_page(lambda: [OFFERS, ORGANIZATIONS])
 def homepage(request):  # pylint: disable=unused-argument
     u"""Main view of app.
 
@@ -43,9 +49,9 @@ def homepage(request):  # pylint: disable=unused-argument
     :param request: WSGIRequest instance
     """
     if logged_as_admin(request):
-        offers = Offer.objects.get_for_administrator()
+        offers = Offer.objects.get_for_administrator().as_cards()
     else:
-        offers = Offer.objects.get_weightened()
+        offers = Offer.objects.get_weightened().as_cards()
 
     return render(
         request,
@@ -60,9 +66,16 @@ def homepage(request):  # pylint: disable=unused-argument
 def static_pages(request, template_name):
     u"""Generic view used for rendering static pages.
 
+    Anonymous users get page prebuilt by build_static_pages command, if it
+    exists.
+
     :param request: WSGIRequest instance
     :param template_name: string Template name to display
     """
+    if is_cacheable(request):
+        response = serve_prebuilt_page(request, template_name)
+        if response is not None:
+            return response
     try:
         return render(
             request,
@@ -91,13 +104,13 @@ def logged_user_profile(request):
 
     def _populate_participated_offers(request):
         u"""Populate offers that current user participate."""
-        return Offer.objects.filter(volunteers=request.user)
+        return Offer.objects.filter(volunteers=request.user).as_cards()
 
     def _populate_created_offers(request):
         u"""Populate offers that current user create."""
         return Offer.objects.filter(
             organization__userprofiles__user=request.user
-        )
+        ).as_cards()
 
     def _is_saving_user_avatar():
         u"""."""
@@ -186,7 +199,7 @@ def logged_user_profile(request):
             )
 
     profile_form = _init_edit_profile_form()
-    userprofile = UserProfile.objects.get(user=request.user)
+    userprofile = request.user.userprofile
     galleries = OrganizationGallery.get_organizations_galleries(
         userprofile
     )
@@ -1,8 +1,16 @@
 """
 .. module:: admin_panel
 """
+from django.conf import settings
+from django.http import HttpResponseForbidden
 from django.shortcuts import render
 
+from apps.volontulo.lib.metrics import BUCKETS
+from apps.volontulo.lib.metrics import collect
+from apps.volontulo.lib.metrics import summarize
+from apps.volontulo.lib.metrics import view_metrics
+from apps.volontulo.views import logged_as_admin
+
 
 def main_panel(request):
     """Main admin panel view."""
@@ -11,3 +19,16 @@ def main_panel(request):
         request,
         'admin/list_offers.html'
     )
+
+
+def metrics_panel(request):
+    """Admin panel view with time and queries stats of views."""
+    if not logged_as_admin(request):
+        return HttpResponseForbidden()
+
+    view_metrics.flush()
+    return render(request, 'admin/metrics.html', {
+        'rows': summarize(collect()),
+        'buckets': BUCKETS[:-1],
+        'query_budget': settings.QUERY_BUDGET,
+    })
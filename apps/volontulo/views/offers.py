@@ -7,6 +7,7 @@ u"""
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.models import ADDITION, CHANGE
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponseForbidden
@@ -18,15 +19,28 @@ from apps.volontulo.forms import (
     CreateOfferForm, OfferApplyForm, OfferImageForm
 )
 from apps.volontulo.lib.email import send_mail
+from apps.volontulo.lib.export import VOLUNTEERS_HEADER
+from apps.volontulo.lib.export import iterate_volunteers
+from apps.volontulo.lib.export import stream_csv
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import ORGANIZATIONS
+from apps.volontulo.lib.page_cache import cache_anonymous_page
+from apps.volontulo.lib.page_cache import offer_key
+from apps.volontulo.lib.pagination import paginate
+from apps.volontulo.lib.search import search_offers
 from apps.volontulo.models import Offer, OfferImage, UserProfile
 from apps.volontulo.utils import correct_slug, save_history
 from apps.volontulo.views import logged_as_admin
 
+# volunteers listed on offer page, all of them are in CSV export:
+VOLUNTEERS_SHOWN = 50
+
 
 class OffersList(View):
     u"""View that handle list of offers."""
 
     @staticmethod
+    @cache_anonymous_page(lambda: [OFFERS, ORGANIZATIONS])
     def get(request):
         u"""It's used for volunteers to show active ones and for admins to show
         all of them.
@@ -34,12 +48,14 @@ class OffersList(View):
         :param request: WSGIRequest instance
         """
         if logged_as_admin(request):
-            offers = Offer.objects.all()
+            offers = Offer.objects.get_cards()
         else:
-            offers = Offer.objects.get_active()
+            offers = Offer.objects.get_active().as_cards()
+        page = paginate(request, offers, ('weight', 'id'))
 
         return render(request, "offers/offers_list.html", context={
-            'offers': offers,
+            'offers': page.items,
+            'page': page,
         })
 
     @staticmethod
@@ -59,6 +75,25 @@ class OffersList(View):
         return redirect('offers_list')
 
 
+class OffersSearch(View):
+    u"""View that handle searching active offers."""
+
+    @staticmethod
+    def get(request):
+        u"""Show active offers matching query, best matching first.
+
+        :param request: WSGIRequest instance
+        """
+        query = request.GET.get('q', '').strip()
+        return render(request, "offers/offers_list.html", context={
+            'offers': search_offers(
+                Offer.objects.get_active().as_cards(),
+                query,
+            ),
+            'query': query,
+        })
+
+
 class OffersCreate(View):
     u"""Class view supporting creation of new offer."""
 
@@ -136,7 +171,7 @@ class OffersReorder(View):
         :param id_:
         :return:
         """
-        offers = Offer.objects.get_weightened()
+        offers = Offer.objects.get_weightened().as_cards()
         return render(request, 'offers/reorder.html', {
             'offers': offers, 'id': id_})
 
@@ -149,18 +184,25 @@ class OffersReorder(View):
         :return:
         """
         if request.POST.get('submit') == 'reorder':
-            items = [item
-                     for item
-                     in request.POST.items()
-                     if item[0].startswith('weight_')]
-            weights = {id_.split('_')[1]: weight
-                       for id_, weight in items}
-            for id_, weight in weights.items():
-                Offer.objects.filter(id=id_).update(weight=weight)
+            try:
+                weights = {
+                    int(key.split('_')[1]): int(weight)
+                    for key, weight in request.POST.items()
+                    if key.startswith('weight_')
+                }
+            except ValueError:
+                messages.error(
+                    request,
+                    u"Wagi ofert muszą być liczbami całkowitymi."
+                )
+                return redirect(request.path)
 
+            changed = Offer.objects.update_weights(weights)
             messages.success(
                 request,
-                u"Uporządkowano oferty."
+                u"Uporządkowano oferty. Liczba zmienionych ofert: {}.".format(
+                    changed
+                )
             )
         return redirect('offers_list')
 
@@ -339,30 +381,36 @@ class OffersView(View):
     u"""Class view supporting offer preview."""
 
     @staticmethod
+    @cache_anonymous_page(
+        lambda slug, id_: [offer_key(id_), ORGANIZATIONS]
+    )
     @correct_slug(Offer, 'offers_view', 'title')
     def get(request, slug, id_):  # pylint: disable=unused-argument
         u"""View responsible for showing details of particular offer."""
-        offer = get_object_or_404(Offer, id=id_)
-        try:
-            main_image = OfferImage.objects.get(offer=offer, is_main=True)
-        except OfferImage.DoesNotExist:
-            main_image = ''
+        offer = get_object_or_404(
+            Offer.objects.select_related('organization', 'main_image'),
+            id=id_,
+        )
 
         volunteers = None
-        users = [u.user.id for u in offer.organization.userprofiles.all()]
+        more_volunteers = False
         if (
-                request.user.is_authenticated() and (
-                    request.user.userprofile.is_administrator or
-                    request.user.userprofile.id in users
-                )
+                request.user.is_authenticated() and
+                request.user.userprofile.can_edit_offer(offer=offer)
         ):
-            volunteers = offer.volunteers.all()
+            # the rest can be downloaded as CSV:
+            volunteers = list(
+                offer.volunteers.order_by('id')[:VOLUNTEERS_SHOWN + 1]
+            )
+            more_volunteers = len(volunteers) > VOLUNTEERS_SHOWN
+            volunteers = volunteers[:VOLUNTEERS_SHOWN]
 
         context = {
             'offer': offer,
             'volunteers': volunteers,
+            'more_volunteers': more_volunteers,
             'MEDIA_URL': settings.MEDIA_URL,
-            'main_image': main_image,
+            'main_image': offer.main_image or '',
         }
         return render(request, "offers/show_offer.html", context=context)
 
@@ -404,17 +452,13 @@ class OffersJoin(View):
                 )
                 return redirect('offers_list')
 
-        offer = Offer.objects.get(id=id_)
-        try:
-            main_image = OfferImage.objects.get(offer=offer, is_main=True)
-        except OfferImage.DoesNotExist:
-            main_image = ''
+        offer = Offer.objects.select_related('main_image').get(id=id_)
 
         context = {
             'form': OfferApplyForm(),
             'offer': offer,
             'MEDIA_URL': settings.MEDIA_URL,
-            'main_image': main_image,
+            'main_image': offer.main_image or '',
         }
 
         context['volunteer_user'] = UserProfile()
@@ -523,6 +567,31 @@ class OffersArchived(View):
 
         :param request: WSGIRequest instance
         """
+        page = paginate(
+            request,
+            Offer.objects.get_archived().as_cards(),
+            ('weight', 'id'),
+        )
         return render(request, 'offers/archived.html', {
-            'offers': Offer.objects.get_archived()
+            'offers': page.items,
+            'page': page,
         })
+
+
+@login_required
+def offer_volunteers_csv(request, slug, id_):
+    u"""Stream volunteers who applied for offer as CSV file.
+
+    :param request: WSGIRequest instance
+    :param slug: string Offer title slug
+    :param id_: Integer offer id
+    """
+    # pylint: disable=unused-argument
+    offer = get_object_or_404(Offer, id=id_)
+    if not request.user.userprofile.can_edit_offer(offer=offer):
+        return HttpResponseForbidden()
+    return stream_csv(
+        'wolontariusze-oferta-{}.csv'.format(offer.id),
+        VOLUNTEERS_HEADER,
+        iterate_volunteers(offer_id=offer.id),
+    )
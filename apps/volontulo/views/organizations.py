@@ -6,6 +6,7 @@ u"""
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
+from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
@@ -14,9 +15,15 @@ from django.views.generic import View
 
 from apps.volontulo.forms import VolounteerToOrganizationContactForm
 from apps.volontulo.lib.email import send_mail
+from apps.volontulo.lib.export import VOLUNTEERS_HEADER
+from apps.volontulo.lib.export import iterate_volunteers
+from apps.volontulo.lib.export import stream_csv
+from apps.volontulo.lib.page_cache import OFFERS
+from apps.volontulo.lib.page_cache import cache_anonymous_page
+from apps.volontulo.lib.page_cache import organization_key
+from apps.volontulo.lib.pagination import paginate
 from apps.volontulo.models import Offer
 from apps.volontulo.models import Organization
-from apps.volontulo.models import UserProfile
 from apps.volontulo.utils import correct_slug
 
 
@@ -25,11 +32,14 @@ def organizations_list(request):
 
     :param request: WSGIRequest instance
     """
-    organizations = Organization.objects.all()
+    page = paginate(request, Organization.objects.all(), ('name', 'id'))
     return render(
         request,
         "organizations/list.html",
-        {'organizations': organizations},
+        {
+            'organizations': page.items,
+            'page': page,
+        },
     )
 
 
@@ -110,7 +120,7 @@ def organization_form(request, slug, id_):
 
     if not (
             request.user.is_authenticated() and
-            UserProfile.objects.get(user=request.user).organizations
+            request.user.userprofile.organizations
     ):
         return redirect('homepage')
 
@@ -147,12 +157,15 @@ def organization_form(request, slug, id_):
     )
 
 
+@cache_anonymous_page(
+    lambda slug, id_: [organization_key(id_), OFFERS]
+)
 @correct_slug(Organization, 'organization_view', 'name')
 # pylint: disable=unused-argument
 def organization_view(request, slug, id_):
     u"""View responsible for viewing organization."""
     org = get_object_or_404(Organization, id=id_)
-    offers = Offer.objects.filter(organization_id=id_)
+    offers = Offer.objects.filter(organization_id=id_).as_cards()
     allow_contact = True
     allow_edit = False
     allow_offer_create = False
@@ -208,3 +221,22 @@ def organization_view(request, slug, id_):
             'allow_offer_create': allow_offer_create,
         }
     )
+
+
+@login_required
+def organization_volunteers_csv(request, slug, id_):
+    u"""Stream volunteers who applied for organization offers as CSV file.
+
+    :param request: WSGIRequest instance
+    :param slug: string Organization name slug
+    :param id_: Integer organization id
+    """
+    # pylint: disable=unused-argument
+    organization = get_object_or_404(Organization, id=id_)
+    if not request.user.userprofile.can_edit_organization(organization.id):
+        return HttpResponseForbidden()
+    return stream_csv(
+        'wolontariusze-organizacja-{}.csv'.format(organization.id),
+        VOLUNTEERS_HEADER,
+        iterate_volunteers(offer__organization_id=organization.id),
+    )
@@ -45,4 +45,10 @@ def update():
     ):
         run('python manage.py migrate --traceback'
             ' --settings=volontulo_org.settings.production')
+        run('python manage.py collectstatic --noinput'
+            ' --settings=volontulo_org.settings.production')
+        run('python manage.py warm_templates'
+            ' --settings=volontulo_org.settings.production')
+        run('python manage.py build_static_pages'
+            ' --settings=volontulo_org.settings.production')
         run('service apache2 restart')
@@ -55,6 +55,7 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    'apps.volontulo.lib.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -128,11 +129,26 @@ EMAIL_USE_TLS = False
 
 # verify if it's required for registering user
 AUTHENTICATION_BACKENDS = (
+    'apps.volontulo.backends.UserProfileBackend',
+    # kept for sessions created before UserProfileBackend was introduced:
     'django.contrib.auth.backends.ModelBackend',
 )
 
+# requests making more database queries are logged as warnings:
+QUERY_BUDGET = LOCAL_CONFIG.get('query_budget', 30)
+
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# front web server sending files served by Django: 'x-sendfile' (Apache with
+# mod_xsendfile), 'x-accel-redirect' (nginx) or None to stream them from Django
+SENDFILE_BACKEND = LOCAL_CONFIG.get('sendfile_backend')
+# nginx internal location mapped to project directory, files are sent from
+# paths under it, e.g. /internal/media/...
+SENDFILE_INTERNAL_PREFIX = LOCAL_CONFIG.get(
+    'sendfile_internal_prefix',
+    '/internal',
+)
+
 # settings required if we want to use @login_required decorator
 LOGIN_URL = 'login'
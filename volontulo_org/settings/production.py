@@ -6,3 +6,32 @@ Production Settings File
 from .base import *
 
 # Extra settings go here:
+
+# cache shared by all worker processes, so cached pages are invalidated
+# in all of them at once:
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': LOCAL_CONFIG.get(
+            'cache_dir',
+            os.path.join(BASE_DIR, 'cache'),
+        ),
+    }
+}
+
+# templates are compiled once per worker process and kept in memory:
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+WARM_TEMPLATES = True
+
+# in-memory search index (not used on PostgreSQL) is built when process starts
+# and rebuilt in background when offers change:
+WARM_SEARCH_INDEX = True
+
+# bundled, fingerprinted and precompressed static files:
+STATICFILES_STORAGE = 'apps.volontulo.lib.assets.AssetsStorage'
@@ -5,6 +5,8 @@ from django.conf.urls import include
 from django.conf.urls import url
 from django.contrib import admin
 
+from apps.volontulo.lib import serving
+
 PROJECT_ROOT = path.dirname(path.dirname(__file__))
 
 urlpatterns = [
@@ -12,14 +14,14 @@ urlpatterns = [
     url(r'^admin/', include(admin.site.urls)),
     url(
         r'^static/(?P<path>.*)$',
-        'django.views.static.serve',
+        serving.serve,
         {
             'document_root': path.join(PROJECT_ROOT, 'static')
         }
     ),
     url(
         r'^media/(?P<path>.*)$',
-        'django.views.static.serve',
+        serving.serve,
         {
             'document_root': settings.MEDIA_ROOT
         }
@@ -9,8 +9,26 @@ https://docs.djangoproject.com/en/1.8/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
+from django.db import connection
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "volontulo_org.settings")
 
 application = get_wsgi_application()
+
+from apps.volontulo.lib.search import offer_index  # noqa
+from apps.volontulo.lib.templates import warm_templates  # noqa
+
+# cached template loader keeps templates per process, so compile them before
+# the first request is served:
+if getattr(settings, 'WARM_TEMPLATES', False):
+    warm_templates()
+
+# in-memory search index is used on databases other than PostgreSQL, build it
+# before the first search is made:
+if getattr(settings, 'WARM_SEARCH_INDEX', False) and \
+        connection.vendor != 'postgresql':
+    offer_index.build()
+    # connection mustn't be shared by processes forked from this one:
+    connection.close()